@@ -1,40 +1,98 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from app.models.request import HackRXRequest
-from app.models.response import HackRXResponse, HackRXProductionResponse, HealthResponse
+from app.models.response import HackRXResponse, HackRXProductionResponse, HealthResponse, AgentMeta
 from app.core.auth import verify_token
 from app.services.preprocessors.document_processor import DocumentProcessor
 from app.services.retrievers.retrieval_service import RetrievalService
 from app.services.vector_stores.vector_store_factory import VectorStoreFactory
+from app.services.vector_stores.base_vector_store import BaseVectorStore
 from app.services.logging.supabase_logger import supabase_logger
 from app.services.agents.master_hackrx_agent import MasterHackRXAgent
 from app.providers.factory import LLMProviderFactory
+from app.providers.base import BaseLLMProvider
 from app.config.settings import settings
 from app.services.pipelines.traditional_rag import traditional_rag
+from dataclasses import asdict
+from functools import lru_cache, wraps
+import asyncio
+import threading
 import time
 import uuid
 from typing import Union, Optional
 
 router = APIRouter()
 
-vector_store = VectorStoreFactory.create_vector_store(settings)
+_IS_PROD = settings.ENVIRONMENT.lower() == "production"
 
-llm_provider = LLMProviderFactory.create_provider(
-    settings.DEFAULT_LLM_PROVIDER, 
-    settings
-)
+# Heavyweight singletons are built on first use so that importing the app
+# (and hitting /health) does not bring up every backing service.
+# prewarm runs in a worker thread while the first request may already be
+# asking for the same singletons, so first construction is serialized.
+_init_lock = threading.RLock()
 
-hackrx_agent = MasterHackRXAgent()
+def _singleton(factory):
+    """Cache a zero-argument factory, building its value at most once across threads"""
+    cached = lru_cache(maxsize=1)(factory)
+    
+    @wraps(factory)
+    def getter():
+        if cached.cache_info().currsize:
+            return cached()
+        with _init_lock:
+            return cached()
+    
+    getter.cache_info = cached.cache_info
+    return getter
+
+
+@_singleton
+def get_vector_store() -> BaseVectorStore:
+    """Return the shared vector store, creating it on first use"""
+    return VectorStoreFactory.create_vector_store(settings)
+
+@_singleton
+def get_llm_provider_pool() -> asyncio.Queue:
+    """Return the shared LLM provider pool, creating it on first use"""
+    return LLMProviderFactory.create_pool(
+        settings.DEFAULT_LLM_PROVIDER, 
+        settings,
+        size=settings.LLM_POOL_SIZE
+    )
+
+@_singleton
+def get_hackrx_agent() -> MasterHackRXAgent:
+    """Return the shared master agent, creating it on first use"""
+    return MasterHackRXAgent()
+
+@_singleton
+def get_document_processor() -> DocumentProcessor:
+    """Return the shared document processor, creating it on first use"""
+    return DocumentProcessor(
+        vector_store=get_vector_store(),
+        chunk_size=settings.CHUNK_SIZE,
+        chunk_overlap=settings.CHUNK_OVERLAP
+    )
+
+def prewarm():
+    """Build the singletons used by the configured processing mode ahead of the first request"""
+    if settings.AGENT_ENABLED:
+        get_hackrx_agent()
+    else:
+        get_llm_provider_pool()
+        get_document_processor()
 
-document_processor = DocumentProcessor(
-    vector_store=vector_store,
-    chunk_size=settings.CHUNK_SIZE,
-    chunk_overlap=settings.CHUNK_OVERLAP
-)
+async def get_llm_provider():
+    """Check out an LLM provider from the pool for the duration of a request"""
+    pool = get_llm_provider_pool()
+    provider = await pool.get()
+    try:
+        yield provider
+    finally:
+        pool.put_nowait(provider)
 
-retrieval_service = RetrievalService(
-    vector_store=vector_store,
-    llm_provider=llm_provider
-)
+async def _no_llm_provider() -> None:
+    """Agentic requests don't use a pooled provider, so none is checked out"""
+    return None
 
 async def log_request_background(
     document_url: str,
@@ -61,10 +119,70 @@ async def log_request_background(
     except Exception as e:
         print(f"Background logging failed: {e}")
 
+def _build_agent_handler():
+    """Build the request handler for agentic processing with tools"""
+    async def handler(request: HackRXRequest, document_id: str, llm_provider: Optional[BaseLLMProvider]):
+        agent_result = await get_hackrx_agent().process_request(
+            document_url=request.documents,
+            questions=request.questions,
+            k=request.k
+        )
+        
+        execution_log = agent_result.get("execution_log", [])
+        
+        document_metadata = asdict(AgentMeta(
+            document_id=document_id,
+            execution_log_length=len(execution_log)
+        ))
+        
+        raw_response = {
+            "processing_mode": "agentic",
+            "agent_execution_log": execution_log,
+            "total_questions": len(request.questions),
+            "k_value": request.k
+        }
+        
+        return agent_result["answers"], document_metadata, raw_response
+    
+    return handler
+
+def _build_rag_handler():
+    """Build the request handler for traditional RAG processing"""
+    async def handler(request: HackRXRequest, document_id: str, llm_provider: BaseLLMProvider):
+        vector_store = get_vector_store()
+        retrieval_service = RetrievalService(
+            vector_store=vector_store,
+            llm_provider=llm_provider
+        )
+        
+        return await traditional_rag(
+            document_id=document_id,
+            document_url=request.documents,
+            questions=request.questions,
+            k=request.k,
+            vector_store=vector_store,
+            document_processor=get_document_processor(),
+            retrieval_service=retrieval_service,
+            settings=settings
+        )
+    
+    return handler
+
+# Settings are fixed for the process lifetime, so pick the processing path once
+if settings.AGENT_ENABLED:
+    print("Using agentic processing with tools.")
+    _handle = _build_agent_handler()
+    _request_llm_provider = _no_llm_provider
+else:
+    print("Using traditional RAG processing")
+    _handle = _build_rag_handler()
+    _request_llm_provider = get_llm_provider
+
 @router.post("/run", response_model=Union[HackRXResponse, HackRXProductionResponse])
 async def run_hackrx(
     request: HackRXRequest,
     background_tasks: BackgroundTasks,
+    llm_provider: Optional[BaseLLMProvider] = Depends(_request_llm_provider),
     _: bool = Depends(verify_token)
 ):
     """Main HackRX endpoint - process document and answer questions
@@ -88,45 +206,7 @@ async def run_hackrx(
     error_message = None
     
     try:
-        if settings.AGENT_ENABLED:
-            print("Using agentic processing with tools.")
-            
-            agent_result = await hackrx_agent.process_request(
-                document_url=request.documents,
-                questions=request.questions,
-                k=request.k
-            )
-            
-            answers = agent_result["answers"]
-            execution_log = agent_result.get("execution_log", [])
-            
-            document_metadata = {
-                "document_id": document_id,
-                "processing_mode": "agentic",
-                "agent_used": True,
-                "execution_log_length": len(execution_log)
-            }
-            
-            raw_response = {
-                "processing_mode": "agentic",
-                "agent_execution_log": execution_log,
-                "total_questions": len(request.questions),
-                "k_value": request.k
-            }
-            
-        else:
-            print("Using traditional RAG processing")
-            
-            answers, document_metadata, raw_response = await traditional_rag(
-                document_id=document_id,
-                document_url=request.documents,
-                questions=request.questions,
-                k=request.k,
-                vector_store=vector_store,
-                document_processor=document_processor,
-                retrieval_service=retrieval_service,
-                settings=settings
-            )
+        answers, document_metadata, raw_response = await _handle(request, document_id, llm_provider)
 
         processing_time = time.time() - start_time
 
@@ -141,7 +221,7 @@ async def run_hackrx(
             success=success
         )
 
-        if settings.ENVIRONMENT.lower() == "production":
+        if _IS_PROD:
             return HackRXProductionResponse(
                 success=True,
                 answers=answers
@@ -194,24 +274,31 @@ async def run_hackrx(
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint
+    
+    Reports the document count only if the vector store has already been
+    initialized, so health pings never bring up the backing service.
+    """
     
     try:
-        if hasattr(vector_store, 'aget_document_count'):
-            doc_count = await vector_store.aget_document_count()
-        else:
-            doc_count = vector_store.get_document_count()
+        doc_count = 0
+        if get_vector_store.cache_info().currsize:
+            vector_store = get_vector_store()
+            if hasattr(vector_store, 'aget_document_count'):
+                doc_count = await vector_store.aget_document_count()
+            else:
+                doc_count = vector_store.get_document_count()
         
         return HealthResponse(
             status="healthy",
-            vector_store=vector_store.store_type,
-            llm_provider=llm_provider.provider_name,
+            vector_store=settings.DEFAULT_VECTOR_STORE.lower(),
+            llm_provider=settings.DEFAULT_LLM_PROVIDER.lower(),
             document_count=doc_count
         )
         
     except Exception as e:
         return HealthResponse(
             status=f"unhealthy: {str(e)}",
-            vector_store=vector_store.store_type,
-            llm_provider=llm_provider.provider_name
+            vector_store=settings.DEFAULT_VECTOR_STORE.lower(),
+            llm_provider=settings.DEFAULT_LLM_PROVIDER.lower()
         )
@@ -17,7 +17,12 @@ class Settings(BaseSettings):
     
     # Vector Store Configuration (Required)
     DEFAULT_VECTOR_STORE: str = os.getenv("DEFAULT_VECTOR_STORE", "inmemory")
+    HNSW_BACKEND: str = os.getenv("HNSW_BACKEND", "hnswlib")  # Graph index for the 'hnsw' store: hnswlib or usearch
+    IVFPQ_TRAIN_THRESHOLD: int = int(os.getenv("IVFPQ_TRAIN_THRESHOLD", "10000"))  # 'ivfpq' store: vectors before switching from exact search to IVF-PQ
+    IVFPQ_NPROBE: int = int(os.getenv("IVFPQ_NPROBE", "16"))  # 'ivfpq' store: inverted lists scanned per query
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))  # Texts per embedding request when Qdrant/Supabase ingest concurrently
+    EMBEDDING_CONCURRENCY: int = int(os.getenv("EMBEDDING_CONCURRENCY", "5"))  # Embedding requests in flight at once for Qdrant/Supabase ingest
     
     # Pinecone Configuration (Optional)
     PINECONE_API_KEY: str
@@ -30,9 +35,11 @@ class Settings(BaseSettings):
     QDRANT_COLLECTION_NAME: str = os.getenv("QDRANT_COLLECTION_NAME", "hackrx-documents")
     QDRANT_PATH: Optional[str] = os.getenv("QDRANT_PATH")  # For local on-disk storage
     QDRANT_PREFER_GRPC: bool = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+    QDRANT_POOL_SIZE: int = int(os.getenv("QDRANT_POOL_SIZE", "32"))  # Client connection pool, shared by concurrent upserts and searches
     
     # LLM Providers
     DEFAULT_LLM_PROVIDER: str = os.getenv("DEFAULT_LLM_PROVIDER", "openai")
+    LLM_POOL_SIZE: int = int(os.getenv("LLM_POOL_SIZE", "8"))  # Provider clients shared across concurrent requests
     
     # OpenAI Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
@@ -66,6 +73,7 @@ class Settings(BaseSettings):
     SUPABASE_TABLE_NAME: str = os.getenv("SUPABASE_TABLE_NAME", "documents")
     SUPABASE_QUERY_NAME: str = os.getenv("SUPABASE_QUERY_NAME", "match_documents")
     ENABLE_REQUEST_LOGGING: bool = os.getenv("ENABLE_REQUEST_LOGGING", "true").lower() == "true"
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")  # Level for the app loggers (DEBUG shows agent traces)
 
     # Processing Configuration (Required)
     CHUNK_SIZE: int = os.getenv("CHUNK_SIZE", 1000)
@@ -75,8 +83,27 @@ class Settings(BaseSettings):
     ENABLE_CACHING: bool = os.getenv("ENABLE_CACHING", "true").lower() == "true"  # Enable/disable caching
     CACHE_MIN_CHUNKS: int = int(os.getenv("CACHE_MIN_CHUNKS", "0"))  # Only cache docs with >0 chunks
     
+    # Agent answer cache (in-process LRU, plus Redis when REDIS_URL is set)
+    ANSWER_CACHE_ENABLED: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_SIZE: int = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+    ANSWER_CACHE_TTL: int = int(os.getenv("ANSWER_CACHE_TTL", "86400"))
+    REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
+    
+    # Traditional RAG answer cache: exact question hits, plus near-duplicate
+    # questions whose embeddings reach the cosine threshold
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_PATH: Optional[str] = os.getenv("SEMANTIC_CACHE_PATH")  # SQLite file to persist cached answers across restarts
+    
+    # Answer all questions of a request in one LLM call (traditional RAG)
+    RAG_BATCH_ANSWERS: bool = os.getenv("RAG_BATCH_ANSWERS", "true").lower() == "true"
+    RAG_DEBUG_CONTEXT: bool = os.getenv("RAG_DEBUG_CONTEXT", "false").lower() == "true"  # Include retrieved chunks and scores in debug_info
+    
     # Agent Configuration (Required)
     AGENT_ENABLED: bool = os.getenv("AGENT_ENABLED", "true").lower() == "true"  # Enable/disable agent
+    MAX_PARALLEL_QUESTIONS: int = int(os.getenv("MAX_PARALLEL_QUESTIONS", "8"))  # Concurrent worker loops per request
+    QA_CONCURRENCY: int = int(os.getenv("QA_CONCURRENCY", "8"))  # Concurrent LLM calls per request in traditional RAG
+    USE_LLM_SELECTOR: bool = os.getenv("USE_LLM_SELECTOR", "false").lower() == "true"  # LLM picks the mode when the rules don't
 
 
     class Config:
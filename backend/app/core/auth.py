@@ -2,9 +2,12 @@ from fastapi import HTTPException, status
 from fastapi.security import HTTPBearer
 from fastapi import Request
 from app.config.settings import settings
+import hmac
 
 security = HTTPBearer()
 
+_EXPECTED_TOKEN = settings.BEARER_TOKEN.encode()
+
 async def verify_token(request: Request) -> bool:
     auth_header = request.headers.get("Authorization")
     
@@ -20,9 +23,9 @@ async def verify_token(request: Request) -> bool:
             detail="Invalid authorization header format"
         )
     
-    token = auth_header.split(" ")[1]
+    token = auth_header[7:].encode()
     
-    if token != settings.BEARER_TOKEN:
+    if not hmac.compare_digest(token, _EXPECTED_TOKEN):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Union
+from typing import List, Tuple, Union
 import numpy as np
 
 
@@ -7,7 +7,7 @@ class BaseEmbedder(ABC):
     """Abstract base class for embedding models"""
     
     @abstractmethod
-    def embed(self, texts: Union[str, List[str]]) -> List[List[float]]:
+    def embed(self, texts: Union[str, List[str]]) -> np.ndarray:
         """
         Generate embeddings for input texts
         
@@ -15,7 +15,7 @@ class BaseEmbedder(ABC):
             texts: Single text string or list of text strings
             
         Returns:
-            List of embedding vectors (each vector is a list of floats)
+            float32 array of shape (N, dimension), one row per input text
         """
         pass
     
@@ -31,7 +31,7 @@ class BaseEmbedder(ABC):
         """Return the name/identifier of the embedding model"""
         pass
     
-    def embed_single(self, text: str) -> List[float]:
+    def embed_single(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text
         
@@ -39,6 +39,62 @@ class BaseEmbedder(ABC):
             text: Input text string
             
         Returns:
-            Single embedding vector as list of floats
+            Single embedding vector as a float32 array of shape (dimension,)
         """
         return self.embed([text])[0]
+    
+    def embed_int8(self, texts: Union[str, List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generate int8-quantized embeddings for input texts
+        
+        Each vector is scaled symmetrically by max(abs(v)) / 127, which keeps
+        embeddings 4x smaller than float32 for storage and transport.
+        
+        Args:
+            texts: Single text string or list of text strings
+            
+        Returns:
+            Tuple of (int8 vectors of shape (N, dimension), float32 per-vector scales of shape (N,))
+        """
+        return self.quantize_int8(self.embed(texts))
+    
+    @property
+    def dimension_int8(self) -> int:
+        """Return the dimension of the int8-quantized embedding vectors"""
+        return self.dimension
+    
+    @staticmethod
+    def quantize_int8(embeddings) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Quantize float embeddings to int8 with a per-vector scale
+        
+        Args:
+            embeddings: Embedding vectors (2D array or list of lists)
+            
+        Returns:
+            Tuple of (int8 vectors, float32 per-vector scales)
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[np.newaxis, :]
+        
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        # Avoid division by zero for all-zero vectors
+        scales[scales == 0] = 1.0
+        
+        quantized = np.clip(np.round(vectors / scales[:, np.newaxis]), -127, 127).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+    
+    @staticmethod
+    def dequantize_int8(quantized: np.ndarray, scales: np.ndarray) -> np.ndarray:
+        """
+        Restore float32 embeddings from int8 vectors and their scales
+        
+        Args:
+            quantized: int8 vectors of shape (N, dimension)
+            scales: Per-vector scales of shape (N,)
+            
+        Returns:
+            float32 vectors of shape (N, dimension)
+        """
+        return quantized.astype(np.float32) * np.asarray(scales, dtype=np.float32)[:, np.newaxis]
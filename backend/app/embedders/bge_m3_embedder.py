@@ -1,7 +1,14 @@
-from typing import List, Union, Optional
+from typing import List, Tuple, Union, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from .base_embedder import BaseEmbedder
+import contextlib
+import hashlib
 import os
+import threading
+import numpy as np
 import torch
+import torch.nn.functional as F
 
 
 class BGEM3Embedder(BaseEmbedder):
@@ -12,7 +19,12 @@ class BGEM3Embedder(BaseEmbedder):
         batch_size: int = 8, 
         max_length: int = 8192,
         device: Optional[str] = None,
-        use_fp16: Optional[bool] = None
+        use_fp16: Optional[bool] = None,
+        use_bf16: Optional[bool] = None,
+        compile_model: bool = True,
+        cache_size: int = 10_000,
+        multi_gpu: Optional[bool] = None,
+        pinned_output: Optional[bool] = None
     ):
         """
         Initialize BGE-M3 embedder
@@ -22,10 +34,24 @@ class BGEM3Embedder(BaseEmbedder):
             max_length: Maximum sequence length (default: 8192)
             device: Device to use ('cuda', 'cpu', or None for auto-detection)
             use_fp16: Whether to use fp16 precision (None for auto-detection based on device)
+            use_bf16: Whether to run the forward pass under bf16 autocast (None for auto-detection;
+                      enabled on bf16-capable GPUs when use_fp16 is not set explicitly)
+            compile_model: Whether to wrap the encoder with torch.compile
+            cache_size: Maximum number of embeddings kept in the LRU cache (0 disables it)
+            multi_gpu: Whether to shard batches across all visible GPUs
+                       (None reads the BGE_MULTI_GPU environment variable)
+            pinned_output: Whether to encode on a side CUDA stream with pinned host buffers; this
+                           path runs the uncompiled encoder (None reads the BGE_PINNED_OUTPUT
+                           environment variable, off by default)
         """
         self.batch_size = batch_size
         self.max_length = max_length
         
+        # LRU cache of text hash -> embedding, shared across calls
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
         # Handle device selection
         if device is None:
             # Check CUDA_VISIBLE_DEVICES environment variable
@@ -43,15 +69,52 @@ class BGEM3Embedder(BaseEmbedder):
         
         self.device = device
         
+        # Handle bf16 autocast (Ampere+ GPUs); it replaces fp16 weights when enabled
+        if use_bf16 is None:
+            use_bf16 = (
+                use_fp16 is None
+                and device.startswith("cuda")
+                and torch.cuda.is_bf16_supported()
+            )
+        
+        self.use_bf16 = use_bf16
+        
         # Handle fp16 precision
         if use_fp16 is None:
             # Use fp16 only on GPU for better speed
-            use_fp16 = device.startswith("cuda")
+            use_fp16 = device.startswith("cuda") and not use_bf16
         
         self.use_fp16 = use_fp16
+        self.compile_model = compile_model
+        
+        # Handle multi-GPU sharding
+        if multi_gpu is None:
+            multi_gpu = os.getenv("BGE_MULTI_GPU", "false").lower() == "true"
+        
+        self.multi_gpu = multi_gpu and device.startswith("cuda") and torch.cuda.device_count() > 1
+        self.model = None
+        self.replicas = []
+        self._replica_executor: Optional[ThreadPoolExecutor] = None
+        
+        # Side stream and double-buffered pinned host outputs for the CUDA path
+        if pinned_output is None:
+            pinned_output = os.getenv("BGE_PINNED_OUTPUT", "false").lower() == "true"
         
-        # Initialize the model
-        self._initialize_model()
+        self.pinned_output = pinned_output and device.startswith("cuda")
+        self._stream = None
+        self._pinned_out: List[torch.Tensor] = []
+        self._pinned_lock = threading.Lock()
+        
+        # The model is loaded on first use rather than at construction
+        self._model_lock = threading.Lock()
+    
+    def _ensure_model(self):
+        """Load the model on first use"""
+        if self.model is not None:
+            return
+        with self._model_lock:
+            if self.model is None:
+                self._initialize_model()
     
     def _initialize_model(self):
         """Initialize the BGE-M3 model"""
@@ -64,56 +127,280 @@ class BGEM3Embedder(BaseEmbedder):
             )
         
         # Initialize the model with specified parameters
-        self.model = BGEM3FlagModel(
+        model = BGEM3FlagModel(
             model_name_or_path='BAAI/bge-m3',
             use_fp16=self.use_fp16,
             device=self.device,
             batch_size=self.batch_size,
             max_length=self.max_length
         )
+        self.replicas = [model]
+        
+        # One replica per additional GPU; batches are split across them in embed
+        if self.multi_gpu:
+            primary_index = torch.device(self.device).index or 0
+            for gpu_index in range(torch.cuda.device_count()):
+                if gpu_index == primary_index:
+                    continue
+                self.replicas.append(BGEM3FlagModel(
+                    model_name_or_path='BAAI/bge-m3',
+                    use_fp16=self.use_fp16,
+                    device=f"cuda:{gpu_index}",
+                    batch_size=self.batch_size,
+                    max_length=self.max_length
+                ))
+            self._replica_executor = ThreadPoolExecutor(max_workers=len(self.replicas))
+        
+        if self.compile_model:
+            self._compile_encoder()
+        
+        if self.pinned_output:
+            self._stream = torch.cuda.Stream(device=self.device)
+            self._pinned_out = [
+                torch.empty((self.batch_size, self.dimension), dtype=torch.float32, pin_memory=True)
+                for _ in range(2)
+            ]
+        
+        print(f"Initialized BGE-M3 model on device: {self.device}, fp16: {self.use_fp16}, bf16: {self.use_bf16}, replicas: {len(self.replicas)}")
+        
+        if self.compile_model:
+            self._warmup()
+        
+        # Published last so other threads never see a half-initialized model
+        self.model = self.replicas[0]
+    
+    def _compile_encoder(self):
+        """Wrap each replica's underlying transformer with torch.compile, falling back to eager mode on failure"""
+        if not hasattr(torch, 'compile') or any(getattr(replica, 'model', None) is None for replica in self.replicas):
+            print("torch.compile not available for BGE-M3, using eager mode")
+            self.compile_model = False
+            return
+        
+        encoders = [replica.model for replica in self.replicas]
+        try:
+            mode = "reduce-overhead" if self.device.startswith("cuda") else "default"
+            for replica, encoder in zip(self.replicas, encoders):
+                replica.model = torch.compile(encoder, mode=mode, fullgraph=False)
+        except Exception as e:
+            print(f"torch.compile failed for BGE-M3, using eager mode: {e}")
+            for replica, encoder in zip(self.replicas, encoders):
+                replica.model = encoder
+            self.compile_model = False
+    
+    def _warmup(self):
+        """Run one dummy batch per replica so compilation happens at load time, not on the first real batch"""
+        try:
+            for replica in self.replicas:
+                self._encode_on(replica, ["warmup"] * self.batch_size)
+        except Exception as e:
+            print(f"BGE-M3 warmup failed: {e}")
+    
+    def _autocast(self):
+        """Return the autocast context used for encoding"""
+        if not self.use_bf16:
+            return contextlib.nullcontext()
+        device_type = "cuda" if self.device.startswith("cuda") else "cpu"
+        return torch.autocast(device_type=device_type, dtype=torch.bfloat16)
+    
+    def _cache_key(self, text: str) -> bytes:
+        """Build the cache key for a text from the model name and its content hash"""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the BGE-M3 model on texts and return dense embeddings, sharding across replicas if available"""
+        self._ensure_model()
+        if len(self.replicas) <= 1 or len(texts) <= self.batch_size:
+            return self._encode_on(self.model, texts)
+        
+        # Split into contiguous shards so results can be concatenated in order
+        shard_size = -(-len(texts) // len(self.replicas))
+        shards = [
+            (replica, texts[start:start + shard_size])
+            for replica, start in zip(self.replicas, range(0, len(texts), shard_size))
+        ]
+        results = self._replica_executor.map(lambda shard: self._encode_on(*shard), shards)
+        return np.concatenate(list(results))
+    
+    def _encode_on(self, model, texts: List[str]) -> np.ndarray:
+        """Run a single BGE-M3 replica on texts and return dense embeddings"""
+        if model is self.model and self._stream is not None:
+            tokenizer, encoder = self._get_encoder()
+            if encoder is not None:
+                return self._encode_pinned(tokenizer, encoder, texts)
+        
+        # Generate dense embeddings using BGE-M3
+        with self._autocast():
+            embeddings = model.encode(
+                texts,
+                batch_size=self.batch_size,
+                max_length=self.max_length,
+                return_dense=True,
+                return_sparse=False,
+                return_colbert_vecs=False
+            )
+        
+        # Newer versions of FlagEmbedding return a dict of outputs
+        vecs = embeddings['dense_vecs'] if isinstance(embeddings, dict) else embeddings
+        
+        # BGE-M3 returns dense embeddings as numpy arrays; keep them as a
+        # contiguous float32 matrix instead of materializing Python floats
+        return np.ascontiguousarray(vecs, dtype=np.float32).reshape(len(texts), -1)
+    
+    def _encode_pinned(self, tokenizer, encoder, texts: List[str]) -> np.ndarray:
+        """Encode on the side CUDA stream, copying each batch out through alternating pinned buffers
+        
+        The device-to-host copy of one batch runs asynchronously while the
+        next batch is tokenized and encoded; a buffer is only read back once
+        the copy that last wrote it has completed. Texts are batched in length
+        order to keep padding low, as FlagEmbedding's own encode does.
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        results = np.empty((len(texts), self.dimension), dtype=np.float32)
+        pending: List[Optional[Tuple[torch.cuda.Event, int, int]]] = [None, None]
+        
+        def drain(slot: int):
+            if pending[slot] is None:
+                return
+            event, start, n = pending[slot]
+            event.synchronize()
+            results[order[start:start + n]] = self._pinned_out[slot][:n].numpy()
+            pending[slot] = None
         
-        print(f"Initialized BGE-M3 model on device: {self.device}, fp16: {self.use_fp16}")
+        with self._pinned_lock, torch.inference_mode(), torch.cuda.stream(self._stream), self._autocast():
+            for batch_index, start in enumerate(range(0, len(texts), self.batch_size)):
+                slot = batch_index % 2
+                drain(slot)
+                
+                inputs = tokenizer(
+                    [texts[i] for i in order[start:start + self.batch_size]],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors='pt'
+                )
+                inputs = {name: tensor.pin_memory().to(self.device, non_blocking=True) for name, tensor in inputs.items()}
+                
+                dense = F.normalize(encoder(**inputs).last_hidden_state[:, 0].float(), dim=-1)
+                n = dense.shape[0]
+                self._pinned_out[slot][:n].copy_(dense, non_blocking=True)
+                
+                event = torch.cuda.Event()
+                event.record(self._stream)
+                pending[slot] = (event, start, n)
+            
+            for slot in range(2):
+                drain(slot)
+        
+        return results
     
-    def embed(self, texts: Union[str, List[str]]) -> List[List[float]]:
+    def embed(self, texts: Union[str, List[str]]) -> np.ndarray:
         """
         Generate embeddings for input texts
         
+        Texts seen before are served from the LRU cache; only cache misses
+        are sent through the model.
+        
         Args:
             texts: Single text string or list of text strings
             
         Returns:
-            List of embedding vectors (dense embeddings)
+            float32 array of shape (N, 1024) (dense embeddings)
         """
         if isinstance(texts, str):
             texts = [texts]
         
-        # Generate dense embeddings using BGE-M3
-        embeddings = self.model.encode(
-            texts,
-            batch_size=self.batch_size,
-            max_length=self.max_length,
-            return_dense=True,
-            return_sparse=False,
-            return_colbert_vecs=False
-        )
+        if self.cache_size <= 0:
+            return self._encode(texts)
+        
+        keys = [self._cache_key(text) for text in texts]
+        results = np.empty((len(texts), self.dimension), dtype=np.float32)
+        miss_indices: List[int] = []
         
-        # Check if embeddings are a dictionary (newer versions of FlagEmbedding)
-        if isinstance(embeddings, dict) and 'dense_vecs' in embeddings:
-            embeddings = embeddings['dense_vecs']
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    results[i] = cached
+                else:
+                    miss_indices.append(i)
+        
+        if miss_indices:
+            # Encode each distinct missing text once, even if repeated in the batch
+            unique_miss: "OrderedDict[bytes, str]" = OrderedDict()
+            for i in miss_indices:
+                unique_miss.setdefault(keys[i], texts[i])
             
-        # Check if embeddings are a dictionary (newer versions of FlagEmbedding)
-        if isinstance(embeddings, dict) and 'dense_vecs' in embeddings:
-            embeddings = embeddings['dense_vecs']
+            # Copy rows so cached vectors don't keep the whole batch matrix alive
+            encoded = {
+                key: np.array(vector)
+                for key, vector in zip(unique_miss.keys(), self._encode(list(unique_miss.values())))
+            }
             
-        # BGE-M3 returns dense embeddings as numpy arrays
-        # Convert to list of lists for consistency
-        if hasattr(embeddings, 'tolist'):
-            return embeddings.tolist()
-        elif isinstance(embeddings, list) and all(hasattr(emb, 'tolist') for emb in embeddings):
-            return [emb.tolist() for emb in embeddings]
-        else:
-            # Fallback conversion for other formats
-            return [list(emb) if not isinstance(emb, list) else emb for emb in embeddings]
+            for i in miss_indices:
+                results[i] = encoded[keys[i]]
+            
+            with self._cache_lock:
+                for key, vector in encoded.items():
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        return results
+    
+    def _get_encoder(self):
+        """Return (tokenizer, HF encoder) from the FlagEmbedding model, or (None, None) if not exposed"""
+        self._ensure_model()
+        tokenizer = getattr(self.model, 'tokenizer', None)
+        encoder = getattr(getattr(self.model, 'model', None), 'model', None)
+        if tokenizer is None or encoder is None:
+            return None, None
+        return tokenizer, encoder
+    
+    def embed_int8(self, texts: Union[str, List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generate int8-quantized embeddings with encode, normalize and quantize fused on device
+        
+        The dense (CLS) vectors stay on the model's device through L2
+        normalization and int8 quantization, so only the int8 vectors and
+        their scales are copied to the host, in a single transfer.
+        
+        Args:
+            texts: Single text string or list of text strings
+            
+        Returns:
+            Tuple of (int8 vectors of shape (N, 1024), float32 per-vector scales of shape (N,))
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        
+        tokenizer, encoder = self._get_encoder()
+        if encoder is None:
+            return super().embed_int8(texts)
+        
+        dense_batches = []
+        with torch.inference_mode(), self._autocast():
+            for start in range(0, len(texts), self.batch_size):
+                inputs = tokenizer(
+                    texts[start:start + self.batch_size],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors='pt'
+                ).to(self.device)
+                dense_batches.append(encoder(**inputs).last_hidden_state[:, 0])
+        
+            dense = F.normalize(torch.cat(dense_batches).float(), dim=-1)
+            scales = dense.abs().amax(dim=-1, keepdim=True).clamp_min(1e-12) / 127.0
+            quantized = torch.round(dense / scales).clamp(-127, 127).to(torch.int8)
+        
+        return quantized.cpu().numpy(), scales.squeeze(-1).cpu().numpy()
+    
+    def clear_cache(self):
+        """Drop all cached embeddings"""
+        with self._cache_lock:
+            self._cache.clear()
     
     @property
     def dimension(self) -> int:
@@ -124,3 +411,109 @@ class BGEM3Embedder(BaseEmbedder):
     def model_name(self) -> str:
         """Return the name/identifier of the embedding model"""
         return "bge-m3"
+
+
+def build_token_lookup(embedder: BGEM3Embedder, out_path: str, chunk_size: int = 1024) -> str:
+    """
+    Precompute a query-side token lookup table for FastQueryEmbedder
+    
+    Every vocabulary token is encoded on its own by the full BGE-M3 model and
+    the resulting vectors are written to a [vocab_size, 1024] float16 memmap.
+    This is an offline step; queries can then be embedded by averaging rows.
+    
+    Args:
+        embedder: BGEM3Embedder used to encode the tokens (loaded if it has not been yet)
+        out_path: Path of the memmap file to write
+        chunk_size: Number of tokens encoded per model call (default: 1024)
+        
+    Returns:
+        Path of the written lookup file
+    """
+    embedder._ensure_model()
+    tokenizer = embedder.model.tokenizer
+    vocab_size = len(tokenizer)
+    
+    lookup = np.memmap(out_path, dtype=np.float16, mode='w+', shape=(vocab_size, embedder.dimension))
+    
+    for start in range(0, vocab_size, chunk_size):
+        end = min(start + chunk_size, vocab_size)
+        tokens = [tokenizer.decode([token_id]) for token_id in range(start, end)]
+        lookup[start:end] = embedder._encode(tokens).astype(np.float16)
+        print(f"Encoded tokens {end}/{vocab_size}")
+    
+    lookup.flush()
+    del lookup
+    
+    print(f"Token lookup table written to: {out_path}")
+    return out_path
+
+
+class FastQueryEmbedder(BaseEmbedder):
+    """
+    Query embedder that averages precomputed BGE-M3 token vectors
+    
+    Replaces the transformer forward pass on the query side with a table
+    gather + mean over the query's token ids. Documents should still be
+    embedded with the full BGEM3Embedder.
+    """
+    
+    def __init__(self, lookup_path: str, tokenizer_name: str = 'BAAI/bge-m3', dimension: int = 1024):
+        """
+        Initialize the fast query embedder
+        
+        Args:
+            lookup_path: Path to the memmap written by build_token_lookup
+            tokenizer_name: Tokenizer matching the lookup table (default: 'BAAI/bge-m3')
+            dimension: Dimension of the lookup vectors (default: 1024)
+        """
+        try:
+            from transformers import AutoTokenizer
+        except ImportError:
+            raise ImportError(
+                "transformers is required for the BGE-M3 token lookup embedder. "
+                "Install it with: pip install -U transformers"
+            )
+        
+        self._dimension = dimension
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        self.lookup = np.memmap(lookup_path, dtype=np.float16, mode='r').reshape(-1, dimension)
+        
+        print(f"Loaded BGE-M3 token lookup table with {self.lookup.shape[0]} tokens")
+    
+    def embed(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """
+        Generate embeddings for input texts by averaging token vectors
+        
+        Args:
+            texts: Single text string or list of text strings
+            
+        Returns:
+            float32 array of shape (N, 1024), L2-normalized
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        
+        results = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        encoded = self.tokenizer(texts, add_special_tokens=False)['input_ids']
+        
+        for i, token_ids in enumerate(encoded):
+            if not token_ids:
+                continue
+            
+            vector = self.lookup[token_ids].astype(np.float32).mean(axis=0)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector /= norm
+            results[i] = vector
+        
+        return results
+    
+    @property
+    def dimension(self) -> int:
+        """Return the dimension of the embedding vectors"""
+        return self._dimension
+    
+    @property
+    def model_name(self) -> str:
+        """Return the name/identifier of the embedding model"""
+        return "bge-m3-token-lookup"
@@ -1,7 +1,7 @@
 from typing import Optional, Dict, Any
 from .base_embedder import BaseEmbedder
 from .openai_embedder import OpenAIEmbedder
-from .bge_m3_embedder import BGEM3Embedder
+from .bge_m3_embedder import BGEM3Embedder, FastQueryEmbedder
 
 
 def get_embedding_model(
@@ -28,6 +28,8 @@ def get_embedding_model(
         - "text-embedding-3-large": OpenAI text-embedding-3-large  
         - "text-embedding-ada-002": OpenAI text-embedding-ada-002
         - "bge-m3": BGE-M3 model
+        - "bge-m3-token-lookup": BGE-M3 query embedder backed by a precomputed
+          token lookup table (requires the `lookup_path` kwarg)
     """
     name = name.lower().strip()
     
@@ -47,15 +49,31 @@ def get_embedding_model(
             bge_params["device"] = kwargs["device"]
         if "use_fp16" in kwargs:
             bge_params["use_fp16"] = kwargs["use_fp16"]
+        if "use_bf16" in kwargs:
+            bge_params["use_bf16"] = kwargs["use_bf16"]
+        if "compile_model" in kwargs:
+            bge_params["compile_model"] = kwargs["compile_model"]
+        if "cache_size" in kwargs:
+            bge_params["cache_size"] = kwargs["cache_size"]
+        if "multi_gpu" in kwargs:
+            bge_params["multi_gpu"] = kwargs["multi_gpu"]
             
         return BGEM3Embedder(**bge_params)
     
+    # BGE-M3 token lookup (query side only)
+    elif name == "bge-m3-token-lookup":
+        if "lookup_path" not in kwargs:
+            raise ValueError("lookup_path is required for the bge-m3-token-lookup embedder")
+        
+        return FastQueryEmbedder(lookup_path=kwargs["lookup_path"])
+    
     else:
         supported_models = [
             "text-embedding-3-small",
             "text-embedding-3-large", 
             "text-embedding-ada-002",
-            "bge-m3"
+            "bge-m3",
+            "bge-m3-token-lookup"
         ]
         raise ValueError(
             f"Unsupported embedding model: {name}. "
@@ -1,21 +1,101 @@
-from typing import List
+from typing import List, Optional, Tuple
+import numpy as np
 from langchain_core.embeddings import Embeddings
 from .base_embedder import BaseEmbedder
+import asyncio
+
+
+class QueryBatcher:
+    """
+    Coalesces concurrent query embeddings into a single batched embed call
+    """
+    
+    def __init__(self, embedder: BaseEmbedder, max_batch: int = 64, max_wait_ms: float = 5.0):
+        """
+        Initialize the batcher
+        
+        Args:
+            embedder: BaseEmbedder instance used for the batched calls
+            max_batch: Maximum number of queries per embed call
+            max_wait_ms: How long to wait for more queries before flushing
+        """
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    def _ensure_worker(self):
+        """Start the flush loop on the running event loop if needed"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+    
+    async def _run(self):
+        """Collect pending queries and embed them in batches"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await asyncio.to_thread(self.embedder.embed, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding.tolist())
+    
+    async def embed(self, text: str) -> List[float]:
+        """Queue a query and wait for its embedding"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
 
 
 class LangChainEmbeddingWrapper(Embeddings):
     """
     LangChain-compatible wrapper for our embedding models
+    
+    Embedders return float32 numpy arrays; they are converted to lists only
+    here, at the LangChain boundary.
     """
     
-    def __init__(self, embedder: BaseEmbedder):
+    def __init__(
+        self,
+        embedder: BaseEmbedder,
+        query_embedder: Optional[BaseEmbedder] = None,
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0
+    ):
         """
         Initialize wrapper with an embedder instance
         
         Args:
             embedder: BaseEmbedder instance
+            query_embedder: Optional embedder used for queries only (e.g. FastQueryEmbedder);
+                            defaults to embedder
+            max_batch: Maximum number of queries coalesced into one async embed call
+            max_wait_ms: Time window for coalescing concurrent async queries
         """
         self.embedder = embedder
+        self.query_embedder = query_embedder or embedder
+        self._query_batcher = QueryBatcher(self.query_embedder, max_batch=max_batch, max_wait_ms=max_wait_ms)
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
@@ -27,7 +107,19 @@ class LangChainEmbeddingWrapper(Embeddings):
         Returns:
             List of embeddings.
         """
-        return self.embedder.embed(texts)
+        return self.embedder.embed(texts).tolist()
+    
+    def embed_documents_int8(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Embed search docs as int8-quantized vectors.
+        
+        Args:
+            texts: List of text to embed.
+        
+        Returns:
+            Tuple of (int8 embeddings, per-vector float32 scales).
+        """
+        return self.embedder.embed_int8(texts)
     
     def embed_query(self, text: str) -> List[float]:
         """
@@ -39,4 +131,41 @@ class LangChainEmbeddingWrapper(Embeddings):
         Returns:
             Embedding.
         """
-        return self.embedder.embed_single(text)
+        return self.query_embedder.embed_single(text).tolist()
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several query texts in one batched call.
+        
+        Args:
+            texts: List of queries to embed.
+        
+        Returns:
+            List of embeddings, in the same order as texts.
+        """
+        return self.query_embedder.embed(texts).tolist()
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Embed query text asynchronously, batching concurrent callers together.
+        
+        Args:
+            text: Text to embed.
+        
+        Returns:
+            Embedding.
+        """
+        return await self._query_batcher.embed(text)
+    
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several query texts asynchronously in one batched call.
+        
+        Args:
+            texts: List of queries to embed.
+        
+        Returns:
+            List of embeddings, in the same order as texts.
+        """
+        embeddings = await asyncio.to_thread(self.query_embedder.embed, texts)
+        return embeddings.tolist()
@@ -1,6 +1,7 @@
 from typing import List, Union
 from langchain_openai import OpenAIEmbeddings
 from .base_embedder import BaseEmbedder
+import numpy as np
 import os
 
 
@@ -34,7 +35,7 @@ class OpenAIEmbedder(BaseEmbedder):
             "text-embedding-3-large": 3072
         }
     
-    def embed(self, texts: Union[str, List[str]]) -> List[List[float]]:
+    def embed(self, texts: Union[str, List[str]]) -> np.ndarray:
         """
         Generate embeddings for input texts
         
@@ -42,14 +43,14 @@ class OpenAIEmbedder(BaseEmbedder):
             texts: Single text string or list of text strings
             
         Returns:
-            List of embedding vectors
+            float32 array of shape (N, dimension)
         """
         if isinstance(texts, str):
             texts = [texts]
         
         # Use LangChain's OpenAI embeddings
         embeddings = self.embeddings.embed_documents(texts)
-        return embeddings
+        return np.asarray(embeddings, dtype=np.float32)
     
     @property
     def dimension(self) -> int:
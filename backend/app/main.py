@@ -1,14 +1,29 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api.v1.router import api_router
 from app.config.settings import settings
+from app.services.logging.supabase_logger import supabase_logger
+from logging.handlers import QueueHandler, QueueListener
 import asyncio
+import logging
 import platform
+import queue
+
+# Log records are handed to a queue and written by a listener thread, so
+# handler I/O never runs on the event loop
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.StreamHandler(), respect_handler_level=True)
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
+    handlers=[QueueHandler(_log_queue)],
+)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version="1.0.0",
-    description="LLM-Powered Intelligent Query-Retrieval and Agentic System for Document and Query Processing"
+    description="LLM-Powered Intelligent Query-Retrieval and Agentic System for Document and Query Processing",
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -25,19 +40,40 @@ app.include_router(api_router)
 async def startup_event():
     """Handle startup events"""
     print("Starting HackRX API Server...")
+    _log_listener.start()
+    supabase_logger.start()
+    
+    # Singletons are lazy; in production build them in the background so the
+    # first request does not pay for it, without delaying startup itself
+    if settings.ENVIRONMENT.lower() == "production":
+        from app.api.v1.endpoints.hackrx import prewarm
+        asyncio.create_task(asyncio.to_thread(prewarm))
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Handle shutdown events and cleanup"""
     print("Shutting down HackRX API Server...")
     
+    try:
+        await supabase_logger.stop()
+    except Exception as e:
+        print(f"Error flushing request logs: {e}")
+    
     try:
         from app.tools.url_request_tool import URLRequestTool
         await URLRequestTool.cleanup_session()
     except Exception as e:
         print(f"Error cleaning up HTTP session: {e}")
     
+    try:
+        from app.services.preprocessors.file_processor import FileProcessor
+        await FileProcessor.cleanup_http_client()
+        FileProcessor.cleanup_pdf_pool()
+    except Exception as e:
+        print(f"Error cleaning up document HTTP client: {e}")
+    
     await asyncio.sleep(0.1)
+    _log_listener.stop()
     print("Cleanup completed")
 
 @app.get("/")
@@ -57,6 +93,12 @@ if __name__ == "__main__":
     
     if platform.system() == "Windows":
         asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    else:
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            print("uvloop not installed, using default asyncio event loop")
     
     uvicorn.run(
         app, 
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from dataclasses import dataclass
 from typing import List, Dict, Optional
 
 class HackRXResponse(BaseModel):
@@ -18,3 +19,18 @@ class HealthResponse(BaseModel):
     vector_store: str
     llm_provider: str
     document_count: Optional[int] = None
+
+@dataclass(slots=True)
+class AgentMeta:
+    document_id: str
+    execution_log_length: int
+    processing_mode: str = "agentic"
+    agent_used: bool = True
+
+@dataclass(slots=True)
+class RagMeta:
+    document_id: str
+    chunks_processed: int
+    vector_store: str
+    cache_used: bool
+    processing_mode: str = "traditional"
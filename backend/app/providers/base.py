@@ -28,7 +28,8 @@ class BaseLLMProvider(ABC):
         self, 
         messages: List[Dict[str, Any]], 
         tools: List[Dict[str, Any]], 
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        tool_choice: str = "auto"
     ) -> Any:
         """
         Chat completion with function calling support
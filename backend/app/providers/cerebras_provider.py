@@ -67,7 +67,8 @@ class CerebrasProvider(BaseLLMProvider):
         self, 
         messages: List[Dict[str, Any]], 
         tools: List[Dict[str, Any]], 
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        tool_choice: str = "auto"
     ) -> Any:
         """
         Chat completion with function calling support
@@ -76,6 +77,7 @@ class CerebrasProvider(BaseLLMProvider):
             messages: List of messages in OpenAI format
             tools: List of available tools/functions
             temperature: Temperature for generation
+            tool_choice: "auto", or "none" to force a plain answer with the tools still declared
         
         Returns:
             Cerebras response object (OpenAI-compatible format via Cerebras endpoint)
@@ -96,7 +98,7 @@ class CerebrasProvider(BaseLLMProvider):
                 model=self.model,
                 messages=messages,
                 tools=functions,
-                tool_choice="auto",
+                tool_choice=tool_choice,
                 temperature=temperature
             )
             
@@ -6,6 +6,9 @@ from app.providers.cerebras_provider import CerebrasProvider
 from app.providers.openrouter_provider import OpenRouterProvider
 from app.providers.lmstudio_provider import LMStudioProvider
 from app.config.settings import Settings
+from functools import lru_cache
+from typing import Any
+import asyncio
 
 class LLMProviderFactory:
     @staticmethod
@@ -59,6 +62,27 @@ class LLMProviderFactory:
         else:
             raise ValueError(f"Unsupported LLM provider: {provider_type}")
     
+    @staticmethod
+    def create_pool(provider_type: str, settings: Settings, size: int = 8) -> asyncio.Queue:
+        """Create a pool of independent provider instances (each with its own HTTP client)"""
+        pool: asyncio.Queue = asyncio.Queue(maxsize=size)
+        for _ in range(size):
+            pool.put_nowait(LLMProviderFactory.create_provider(provider_type, settings))
+        return pool
+    
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def get_shared_provider(provider_type: str) -> BaseLLMProvider:
+        """Return a process-wide provider instance built from the global settings"""
+        from app.config.settings import settings
+        return LLMProviderFactory.create_provider(provider_type, settings)
+    
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def get_shared_langchain_llm(provider_type: str) -> Any:
+        """Return the LangChain LLM of the shared provider for provider_type"""
+        return LLMProviderFactory.get_shared_provider(provider_type).get_langchain_llm()
+    
     @staticmethod
     def get_available_providers() -> list[str]:
         return ["openai", "gemini", "groq", "cerebras", "openrouter", "lmstudio"]
\ No newline at end of file
@@ -69,7 +69,8 @@ class LMStudioProvider(BaseLLMProvider):
         self, 
         messages: List[Dict[str, Any]], 
         tools: List[Dict[str, Any]], 
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        tool_choice: str = "auto"
     ) -> Any:
         """
         Chat completion with function calling support
@@ -78,6 +79,7 @@ class LMStudioProvider(BaseLLMProvider):
             messages: List of messages in OpenAI format
             tools: List of available tools/functions
             temperature: Temperature for generation
+            tool_choice: "auto", or "none" to force a plain answer with the tools still declared
         
         Returns:
             LM Studio response object (OpenAI-compatible format)
@@ -98,7 +100,7 @@ class LMStudioProvider(BaseLLMProvider):
                 model=self.model,
                 messages=messages,
                 tools=functions,
-                tool_choice="auto",
+                tool_choice=tool_choice,
                 temperature=temperature
             )
             
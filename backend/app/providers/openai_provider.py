@@ -2,6 +2,7 @@ from app.providers.base import BaseLLMProvider
 from app.prompts.traditional_rag_prompt import TraditionalRagPrompt
 from langchain_openai import ChatOpenAI
 from typing import Dict, Any, List
+import hashlib
 import json
 import openai
 
@@ -63,7 +64,8 @@ class OpenAIProvider(BaseLLMProvider):
         self, 
         messages: List[Dict[str, Any]], 
         tools: List[Dict[str, Any]], 
-        temperature: float = 1
+        temperature: float = 1,
+        tool_choice: str = "auto"
     ) -> Any:
         """
         Chat completion with function calling support
@@ -72,6 +74,7 @@ class OpenAIProvider(BaseLLMProvider):
             messages: List of messages in OpenAI format
             tools: List of available tools/functions
             temperature: Temperature for generation
+            tool_choice: "auto", or "none" to force a plain answer with the tools still declared
         
         Returns:
             OpenAI response object
@@ -88,12 +91,19 @@ class OpenAIProvider(BaseLLMProvider):
                     }
                 })
             
+            # Route requests sharing a system prompt to the same prompt cache
+            extra_body = None
+            if messages and messages[0].get("role") == "system":
+                prompt_hash = hashlib.sha256(str(messages[0]["content"]).encode()).hexdigest()[:16]
+                extra_body = {"prompt_cache_key": f"{self.model}:{prompt_hash}"}
+            
             response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 tools=functions,
-                tool_choice="auto",
-                temperature=temperature
+                tool_choice=tool_choice,
+                temperature=temperature,
+                extra_body=extra_body
             )
             
             return response
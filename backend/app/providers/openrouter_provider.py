@@ -68,7 +68,8 @@ class OpenRouterProvider(BaseLLMProvider):
         self, 
         messages: List[Dict[str, Any]], 
         tools: List[Dict[str, Any]], 
-        temperature: float = 0.1
+        temperature: float = 0.1,
+        tool_choice: str = "auto"
     ) -> Any:
         """
         Chat completion with function calling support
@@ -77,6 +78,7 @@ class OpenRouterProvider(BaseLLMProvider):
             messages: List of messages in OpenAI format
             tools: List of available tools/functions
             temperature: Temperature for generation
+            tool_choice: "auto", or "none" to force a plain answer with the tools still declared
         
         Returns:
             OpenRouter response object (OpenAI-compatible format via OpenRouter endpoint)
@@ -97,7 +99,7 @@ class OpenRouterProvider(BaseLLMProvider):
                 model=self.model,
                 messages=messages,
                 tools=functions,
-                tool_choice="auto",
+                tool_choice=tool_choice,
                 temperature=temperature
             )
             
@@ -0,0 +1,90 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerCache:
+    """Two-tier cache of final worker answers.
+    
+    Keys are derived from the system prompt, the question, a document key and
+    the LLM that wrote the answer, so a hit is only possible for the exact
+    same question against the same document content and model. The first
+    tier is an in-process LRU; the optional second tier is Redis (enabled by
+    setting REDIS_URL), shared across workers.
+    """
+    
+    def __init__(self, maxsize: int = 1024, redis_url: Optional[str] = None, ttl: int = 86400):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        
+        if redis_url:
+            try:
+                import redis.asyncio as redis
+                self._redis = redis.from_url(redis_url, decode_responses=True)
+            except ImportError:
+                logger.warning("redis package not installed, answer cache is in-process only")
+    
+    @staticmethod
+    def make_key(system_prompt: str, question: str, document_key: str, llm: str) -> str:
+        """Build the cache key for a question against a document, answered by llm"""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (system_prompt, question, document_key, llm):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return f"answer:{digest.hexdigest()}"
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached answer for key, or None"""
+        with self._lock:
+            answer = self._local.get(key)
+            if answer is not None:
+                self._local.move_to_end(key)
+                return answer
+        
+        if self._redis is None:
+            return None
+        
+        try:
+            answer = await self._redis.get(key)
+        except Exception as e:
+            logger.warning("Answer cache lookup failed: %s", e)
+            return None
+        
+        if answer is not None:
+            self._set_local(key, answer)
+        return answer
+    
+    async def set(self, key: str, answer: str):
+        """Store an answer in both tiers"""
+        self._set_local(key, answer)
+        
+        if self._redis is None:
+            return
+        
+        try:
+            await self._redis.set(key, answer, ex=self.ttl)
+        except Exception as e:
+            logger.warning("Answer cache store failed: %s", e)
+    
+    def _set_local(self, key: str, answer: str):
+        with self._lock:
+            self._local[key] = answer
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+
+answer_cache = AnswerCache(
+    maxsize=settings.ANSWER_CACHE_SIZE,
+    redis_url=settings.REDIS_URL,
+    ttl=settings.ANSWER_CACHE_TTL
+)
@@ -1,6 +1,7 @@
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
+import re
 from urllib.parse import urlparse
 
 from app.tools.registry import tool_registry
@@ -11,21 +12,60 @@ from app.services.agents.worker_hackrx_agent import WorkerHackRXAgent
 from app.services.vector_stores.vector_store_factory import VectorStoreFactory
 
 
+_SUPPORTED_FILE_EXT = frozenset({
+    ".pdf", ".doc", ".docx", ".ppt", ".pptx", ".txt", ".md", ".xlsx", ".xls", ".jpg", ".jpeg", ".png"
+})
+_SELECTOR_PROMPT = MasterAgentPrompt.get_master_agent_prompt()
+_URL_PATTERN = re.compile(r"https?://")
+_AGENTIC_KEYWORDS = re.compile(r"\b(?:flights?|endpoints?|steps?|apis?)\b", re.IGNORECASE)
+
+
 class MasterHackRXAgent:
     """Coordinates preprocessing and question answering.
 
     Execution flow:
     1. Classify the incoming `document_url` → (is_supported_file, unsupported_ext).
-    2. If it is a supported local file → preprocess & fetch context snippet.
-    3. Decide `mode_token` using simple heuristics + an LLM selector prompt.
-       - unsupported file ext      → agentic (changed from traditional)
+    2. Decide `mode_token` with a rule table (see `_select_mode`).
+       - unsupported file ext      → early error response
        - non-file URL              → agentic
-       - otherwise                 → LLM decides
+       - URLs / API-style wording  → agentic
+       - otherwise                 → traditional (or the LLM selector, if USE_LLM_SELECTOR)
+    3. If it is a supported file → preprocess once with the loader the mode needs.
     4. Execute the chosen pipeline with graceful fallback to agentic.
     """
     def __init__(self):
         self.worker_agent = WorkerHackRXAgent()
 
+    @staticmethod
+    def _select_mode(is_supported_file: bool, questions: List[str]) -> Optional[str]:
+        """Rule-based mode selection; returns None when the LLM selector should decide.
+
+        Non-file URLs and questions that reference URLs or multi-step/API work
+        go agentic, everything else traditional. With USE_LLM_SELECTOR enabled
+        the remaining supported-file cases are left to the LLM instead.
+        """
+        if not is_supported_file:
+            return "agentic"
+        if any(_URL_PATTERN.search(q) or _AGENTIC_KEYWORDS.search(q) for q in questions):
+            return "agentic"
+        return None if settings.USE_LLM_SELECTOR else "traditional"
+
+    async def _select_mode_with_llm(
+        self, is_supported_file: bool, ext: str, questions: List[str], document_url: str
+    ) -> str:
+        """Ask the LLM selector prompt for the mode, defaulting to agentic on failure"""
+        llm = LLMProviderFactory.get_shared_langchain_llm(settings.DEFAULT_LLM_PROVIDER)
+        info_blob = (
+            f"supported_file: {is_supported_file}, ext: {ext or 'n/a'}, "
+            f"questions: {len(questions)}\n"
+            f"url: {document_url[:200]}"
+        )
+        selector_prompt = _SELECTOR_PROMPT.format(info=info_blob)
+        try:
+            return await asyncio.to_thread(lambda: llm.invoke(selector_prompt).content.strip().lower())
+        except Exception:
+            return "agentic"
+
     async def process_request(
         self,
         document_url: str,
@@ -36,17 +76,15 @@ class MasterHackRXAgent:
         url_path = urlparse(document_url).path.lower()
         ext = os.path.splitext(url_path)[1].lower()
 
-        SUPPORTED_FILE_EXT = {
-            ".pdf", ".doc", ".docx", ".ppt", ".pptx", ".txt", ".md", ".xlsx", ".xls", ".jpg", ".jpeg", ".png"
-        }
-        is_supported_file = ext in SUPPORTED_FILE_EXT
+        is_supported_file = ext in _SUPPORTED_FILE_EXT
         unsupported_extension = bool(ext) and (not is_supported_file)
 
         VectorStoreFactory.create_vector_store(settings).delete_all_documents()
 
-        chunks_processed = None
-        context_snippet: str = ""
         document_id: str = ""
+        # Content-aware key of the processed document; answers are only cached
+        # for uploaded files, never for live URLs whose responses may change
+        document_key: Optional[str] = None
         
         # Early return for unsupported file types
         if unsupported_extension:
@@ -55,11 +93,23 @@ class MasterHackRXAgent:
                 "execution_log": [{"mode": "error", "reason": f"unsupported_extension: {ext}"}],
                 "preprocessed": False,
             }
-        
+
+        # --------------------------------------------------------------
+        # Decide execution path (traditional vs agentic) up front from cheap
+        # request signals, so the document is only loaded once, with the
+        # loader the chosen path needs
+        # --------------------------------------------------------------
+        mode_token = self._select_mode(is_supported_file, questions)
+        if mode_token is None:
+            mode_token = await self._select_mode_with_llm(is_supported_file, ext, questions, document_url)
+
         if is_supported_file:
-            # Initial preprocessing (standard PDF loader: PyMuPDF)
+            # Standard PDF loader (PyMuPDF) for traditional RAG, llm-friendly (PyMuPDF4LLM) for agentic
             proc_res = await tool_registry.execute_tool(
-                "process_document", document_url=document_url, use_cache=True, llm_friendly=False
+                "process_document",
+                document_url=document_url,
+                use_cache=True,
+                llm_friendly=mode_token != "traditional",
             )
             if not proc_res.success:
                 # If preprocessing fails, return error instead of continuing
@@ -68,38 +118,8 @@ class MasterHackRXAgent:
                     "execution_log": [{"mode": "error", "reason": "preprocessing_failed"}],
                     "preprocessed": False,
                 }
-            chunks_processed = proc_res.result.get("chunks_processed") if proc_res.success else None
-            document_id = proc_res.result.get("document_id") if proc_res.success else None
-            try:
-                rc_res = await tool_registry.execute_tool(
-                    "retrieve_context",
-                    questions=questions[:1],
-                    k=5,
-                )
-                context_snippet = rc_res.result.get("summary") if rc_res.success else ""
-            except Exception:
-                context_snippet = ""
-
-        # --------------------------------------------------------------
-        # Decide execution path (traditional vs agentic) using a lightweight LLM call
-        # --------------------------------------------------------------
-        llm_provider = LLMProviderFactory.create_provider(settings.DEFAULT_LLM_PROVIDER, settings)
-        llm = llm_provider.get_langchain_llm()
-        info_blob = (
-            f"supported_file: {is_supported_file}, ext: {ext or 'n/a'}, "
-            f"chunks: {chunks_processed}, questions: {len(questions)}\n"
-            f"context: {context_snippet[:500]}"
-        )
-        selector_prompt = MasterAgentPrompt.get_master_agent_prompt().format(info=info_blob)
-        
-        # unsupported extensions should use agentic mode
-        if not is_supported_file:
-            mode_token = "agentic"
-        else:
-            try:
-                mode_token = await asyncio.to_thread(lambda: llm.invoke(selector_prompt).content.strip().lower())
-            except Exception:
-                mode_token = "agentic"
+            document_id = proc_res.result.get("document_id")
+            document_key = proc_res.result.get("cache_key")
 
         # --------------------------------------------------------------
         # Execute chosen path
@@ -119,11 +139,11 @@ class MasterHackRXAgent:
                 # Fall back to agentic if traditional fails
                 pass
 
-        # If agentic path is chosen ensure we have a llm-friendly cache (PyMuPDF4LLM)
-        if mode_token == "agentic" and is_supported_file:
-            await tool_registry.execute_tool(
+            # Falling back to agentic: the worker needs the llm-friendly load
+            llm_res = await tool_registry.execute_tool(
                 "process_document", document_url=document_url, use_cache=True, llm_friendly=True
             )
+            document_key = llm_res.result.get("cache_key") if llm_res.success else None
 
         # default agentic path
         prepared_questions: List[str] = []
@@ -133,10 +153,23 @@ class MasterHackRXAgent:
             else:
                 prepared_questions.append(f"{q}\nSource URL: {document_url}")
 
-        tasks = [
-            self.worker_agent.answer_question(pq, k=k) for pq in prepared_questions
-        ]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Bound concurrent worker loops so a large request doesn't trip provider
+        # rate limits; answers are collected as they finish, in any order
+        semaphore = asyncio.Semaphore(settings.MAX_PARALLEL_QUESTIONS)
+
+        async def run_question(idx: int, question: str):
+            async with semaphore:
+                try:
+                    return idx, await self.worker_agent.answer_question(question, k=k, document_key=document_key)
+                except Exception as exc:
+                    return idx, exc
+
+        results: List[Any] = [None] * len(prepared_questions)
+        for next_result in asyncio.as_completed(
+            [run_question(idx, pq) for idx, pq in enumerate(prepared_questions)]
+        ):
+            idx, res = await next_result
+            results[idx] = res
 
         final_answers: List[str] = []
         execution_log: List[Dict[str, Any]] = []
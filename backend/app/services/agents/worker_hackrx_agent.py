@@ -1,21 +1,35 @@
-import json
+import orjson
 import asyncio
-import uuid
-from typing import List, Dict, Any
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional
 
 from app.tools.registry import tool_registry
 from app.providers.factory import LLMProviderFactory
 from app.config.settings import settings
 from app.prompts.worker_agent_prompt import WorkerAgentPrompt   
 from app.prompts.output_parser_prompt import OutputParserPrompt
+from app.services.agents.answer_cache import answer_cache
+
+logger = logging.getLogger(__name__)
+
+_WORKER_TOOLS = frozenset({"retrieve_context", "url_request"})
 
 
 class WorkerHackRXAgent:
+    # Per-chunk character budget for retrieved context fed back to the LLM
+    MAX_CHUNK_CHARS = 800
+
     def __init__(self):
-        self.llm_provider = LLMProviderFactory.create_provider(
-            settings.DEFAULT_LLM_PROVIDER, settings
-        )
+        self.llm_provider = LLMProviderFactory.get_shared_provider(settings.DEFAULT_LLM_PROVIDER)
         self.max_iterations = 15
+        
+        # The system prompt and tool schema lead every request and must stay
+        # byte-identical across questions so providers can reuse the cached prefix
+        self.system_prompt = WorkerAgentPrompt.get_worker_agent_prompt()
+        self._available_tools: List[Dict[str, Any]] = [
+            t for t in tool_registry.get_tools_for_llm() if t["name"] in _WORKER_TOOLS
+        ]
 
     async def _parse_output(self, question: str, draft_answer: str) -> str:
         """Post-process the raw LLM answer so that it strictly follows the
@@ -30,37 +44,88 @@ class WorkerHackRXAgent:
         except Exception:
             return draft_answer.strip()
 
+    @staticmethod
+    async def _invalid_tool_args(tool_name: str, tool_args: Any):
+        """Stand-in tool call that fails, for arguments that are not a JSON object"""
+        raise ValueError(f"arguments for '{tool_name}' must be a JSON object, got {type(tool_args).__name__}")
+
+    def _render_tool_result(self, tool_name: str, result: Any, seen_chunks: set[int], k: int) -> str:
+        """Render a successful tool result for the conversation.
+
+        Retrieved chunks already shown earlier in the conversation are dropped,
+        the rest are limited to the top-k by score and trimmed, and the result
+        is rendered as compact JSON; other tools' results are passed through.
+        """
+        if tool_name != "retrieve_context" or not isinstance(result, dict) or "chunks" not in result:
+            return f"Tool '{tool_name}' result: {result}"
+
+        new_chunks = []
+        for chunk in sorted(result["chunks"], key=lambda c: c.get("similarity_score", 0.0), reverse=True):
+            content = chunk.get("content", "")
+            chunk_hash = int.from_bytes(hashlib.blake2b(content.encode("utf-8"), digest_size=8).digest(), "big")
+            if chunk_hash in seen_chunks:
+                continue
+            seen_chunks.add(chunk_hash)
+            new_chunks.append({
+                "content": content[:self.MAX_CHUNK_CHARS],
+                "score": round(chunk.get("similarity_score", 0.0), 4),
+            })
+            if len(new_chunks) >= k:
+                break
+
+        payload = {"summary": result.get("summary", ""), "chunks": new_chunks}
+        if not new_chunks and result["chunks"]:
+            payload["note"] = "All retrieved chunks were already provided earlier in this conversation"
+        return f"Tool '{tool_name}' result: {orjson.dumps(payload).decode()}"
+
     async def answer_question(
         self,
         question: str,
         k: int = 10,
+        document_key: Optional[str] = None,
     ) -> tuple[str, List[Dict[str, Any]]]:
         """Answer a single question.
 
+        `document_key` identifies the document content the question is asked
+        against; when given, final answers are cached under it and repeated
+        questions skip the tool loop entirely.
+
         Returns tuple of (answer, tool_call_log)."""
 
-        system_prompt = WorkerAgentPrompt.get_worker_agent_prompt()
-        question_id = uuid.uuid4().hex[:8]
-        system_prompt = f"{question_id}\n\n{system_prompt}"
+        cache_key = None
+        if document_key and settings.ANSWER_CACHE_ENABLED:
+            # Answers depend on the model that wrote them; the Redis tier outlives model changes
+            llm = f"{self.llm_provider.provider_name}/{getattr(self.llm_provider, 'model', '')}"
+            cache_key = answer_cache.make_key(self.system_prompt, question, document_key, llm)
+            cached_answer = await answer_cache.get(cache_key)
+            if cached_answer is not None:
+                logger.debug("✅ Answer served from cache")
+                return cached_answer, [{"tool": "answer_cache", "arguments": {}, "result": {"success": True}}]
 
         conversation: List[Dict[str, Any]] = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": self.system_prompt},
             {"role": "user", "content": question},
         ]
 
-        available_tools = [t for t in tool_registry.get_tools_for_llm() if t["name"] in ("retrieve_context", "url_request")]
+        available_tools = self._available_tools
 
         tool_call_log: List[Dict[str, Any]] = []
+        # Hashes of retrieved chunks already shown to the LLM in this conversation
+        seen_chunks: set[int] = set()
+        # (tool name, canonical arguments) of every tool call made so far
+        seen_tool_calls: set[tuple[str, bytes]] = set()
+        force_answer = False
 
         for iteration in range(self.max_iterations):
-            temp = 0.1 + (int(question_id, 16) % 100) / 1000.0
-
-            print(f"\n🧠 [Iteration {iteration+1}] Sending conversation with {len(conversation)} messages to LLM…")
+            logger.debug("🧠 [Iteration %d] Sending conversation with %d messages to LLM…", iteration + 1, len(conversation))
             response = await self.llm_provider.chat_completion_with_tools(
-                messages=conversation, tools=available_tools, temperature=temp
+                messages=conversation,
+                tools=available_tools,
+                temperature=0.1,
+                tool_choice="none" if force_answer else "auto",
             )
             msg = response.choices[0].message
-            print(f"🤖 LLM response received. Tool calls: {len(msg.tool_calls) if msg.tool_calls else 0}")
+            logger.debug("🤖 LLM response received. Tool calls: %d", len(msg.tool_calls) if msg.tool_calls else 0)
 
             if msg.tool_calls:
                 assistant_entry = {
@@ -80,23 +145,39 @@ class WorkerHackRXAgent:
                 }
                 conversation.append(assistant_entry)
 
-                print(f"🔧 Executing {len(msg.tool_calls)} tools in parallel...")
+                logger.debug("🔧 Executing %d tools in parallel...", len(msg.tool_calls))
                 
                 tool_tasks = []
                 tool_call_ids = []
+                parsed_args: List[Dict[str, Any]] = []
                 
                 for tc in msg.tool_calls:
                     tool_name = tc.function.name
                     tool_args = {}
                     try:
-                        tool_args = json.loads(tc.function.arguments)
+                        tool_args = orjson.loads(tc.function.arguments or "{}")
                     except Exception:
                         pass
+                    
+                    if not isinstance(tool_args, dict):
+                        # Reported back to the LLM as a failed call rather than raising here
+                        parsed_args.append(tool_args)
+                        tool_tasks.append(self._invalid_tool_args(tool_name, tool_args))
+                        tool_call_ids.append(tc.id)
+                        continue
+                    
+                    # Logged as sent by the LLM, before defaults are filled in
+                    parsed_args.append(dict(tool_args))
+                    
+                    signature = (tool_name, orjson.dumps(tool_args, option=orjson.OPT_SORT_KEYS))
+                    if signature in seen_tool_calls:
+                        force_answer = True
+                    seen_tool_calls.add(signature)
 
                     if tool_name == "retrieve_context":
                         tool_args.setdefault("k", k)
 
-                    print(f"🔧 Preparing tool '{tool_name}' with args: {tool_args}")
+                    logger.debug("🔧 Preparing tool '%s' with args: %s", tool_name, tool_args)
                     
                     task = tool_registry.execute_tool(tool_name, **tool_args)
                     tool_tasks.append(task)
@@ -104,43 +185,54 @@ class WorkerHackRXAgent:
                 
                 tool_results = await asyncio.gather(*tool_tasks, return_exceptions=True)
                 
-                for i, (tc, tool_result) in enumerate(zip(msg.tool_calls, tool_results)):
+                for tc, tool_args, tool_result in zip(msg.tool_calls, parsed_args, tool_results):
                     tool_name = tc.function.name
                     
                     if isinstance(tool_result, Exception):
-                        print(f"❌ Tool '{tool_name}' failed: {tool_result}")
+                        logger.warning("❌ Tool '%s' failed: %s", tool_name, tool_result)
                         tool_call_log.append({
                             "tool": tool_name,
-                            "arguments": json.loads(tc.function.arguments) if tc.function.arguments else {},
+                            "arguments": tool_args,
                             "result": {"success": False, "error": str(tool_result)}
                         })
                         tool_content = f"Tool '{tool_name}' error: {str(tool_result)}"
                     else:
-                        print(f"✅ Tool '{tool_name}' success={tool_result.success}")
+                        logger.debug("✅ Tool '%s' success=%s", tool_name, tool_result.success)
                         tool_call_log.append({
                             "tool": tool_name,
-                            "arguments": json.loads(tc.function.arguments) if tc.function.arguments else {},
+                            "arguments": tool_args,
                             "result": tool_result.model_dump(),
                         })
                         tool_content = (
-                            f"Tool '{tool_name}' result: {tool_result.result}"
+                            self._render_tool_result(tool_name, tool_result.result, seen_chunks, k)
                             if tool_result.success
                             else f"Tool '{tool_name}' error: {tool_result.error}"
                         )
                     
-                    print(f"📥 Appending tool response for id {tc.id}")
+                    logger.debug("📥 Appending tool response for id %s", tc.id)
                     conversation.append({
                         "role": "tool",
                         "content": tool_content,
                         "tool_call_id": tc.id,
                     })
                 
-                print(f"✅ Completed {len(msg.tool_calls)} tools in parallel")
+                logger.debug("✅ Completed %d tools in parallel", len(msg.tool_calls))
+                
+                # A repeated identical call means the loop is going in circles;
+                # the next turn must answer with what has been gathered so far
+                if force_answer:
+                    logger.debug("🔁 Repeated tool call detected, requesting final answer")
+                    conversation.append({
+                        "role": "system",
+                        "content": "You have already called this tool with identical arguments; produce the final answer now.",
+                    })
                 continue
             else:
-                print("✅ Final answer received from LLM without further tool calls")
+                logger.debug("✅ Final answer received from LLM without further tool calls")
                 cleaned_answer = await self._parse_output(question, msg.content or "")
+                if cleaned_answer and cache_key:
+                    await answer_cache.set(cache_key, cleaned_answer)
                 return cleaned_answer or "No answer", tool_call_log
 
-        print("⚠️ Max iterations reached without final answer")
+        logger.warning("⚠️ Max iterations reached without final answer")
         return "Max iterations reached", tool_call_log
@@ -2,17 +2,27 @@ from supabase import create_client, Client
 from app.config.settings import settings
 from typing import List, Dict, Optional, Any
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+import asyncio
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 class SupabaseLogger:
+    MAX_QUEUE_SIZE = 10_000
+    MAX_BATCH_SIZE = 256
+    FLUSH_INTERVAL = 0.2  # seconds
+    
     def __init__(self):
         self.client: Optional[Client] = None
         self.enabled = settings.ENABLE_REQUEST_LOGGING
         
+        # Log entries are queued and bulk-inserted by a background flusher
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._stopped = False
+        
         if self.enabled and settings.SUPABASE_URL and settings.SUPABASE_ANON_KEY:
             try:
                 if not settings.SUPABASE_URL.startswith('https://'):
@@ -73,6 +83,81 @@ class SupabaseLogger:
         
         return result
     
+    def start(self):
+        """Start the background flusher on the running event loop
+        
+        Called on app startup, and lazily by the first log call if needed.
+        """
+        if not self.enabled or not self.client:
+            return
+        
+        self._stopped = False
+        if self._flusher_task is None or self._flusher_task.done():
+            self._queue = asyncio.Queue(maxsize=self.MAX_QUEUE_SIZE)
+            self._flusher_task = asyncio.get_running_loop().create_task(self._flusher())
+            logger.info("Supabase log flusher started")
+    
+    async def stop(self):
+        """Flush queued entries and stop the background flusher (call on app shutdown)"""
+        self._stopped = True
+        if self._flusher_task is None or self._flusher_task.done():
+            return
+        
+        await self._queue.put(None)
+        await self._flusher_task
+        self._flusher_task = None
+        logger.info("Supabase log flusher stopped")
+    
+    async def _flusher(self):
+        """Drain the queue, inserting up to MAX_BATCH_SIZE entries per FLUSH_INTERVAL"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is None:
+                break
+            
+            batch = [entry]
+            deadline = loop.time() + self.FLUSH_INTERVAL
+            
+            while len(batch) < self.MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            
+            # The supabase client is synchronous; keep its round-trip off the event loop
+            await asyncio.to_thread(self._insert_batch, batch)
+    
+    def _insert_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        """Insert a batch of log entries with a single request"""
+        try:
+            result = self.client.table("hackrx_requests").insert(batch).execute()
+            
+            if result.data:
+                logger.info(f"Logged {len(batch)} HackRX request(s)")
+                return True
+            else:
+                logger.error(f"Failed to log requests: {result}")
+                return False
+                
+        except Exception as e:
+            error_type = type(e).__name__
+            if "getaddrinfo failed" in str(e) or "11001" in str(e):
+                logger.error(f"DNS/Network error logging HackRX requests: {str(e)}")
+                logger.error(f"   Check your internet connection and Supabase URL: {settings.SUPABASE_URL}")
+            else:
+                logger.error(f"Error logging {len(batch)} HackRX request(s) ({error_type}): {str(e)}")
+            return False
+    
     async def log_hackrx_request(
         self,
         document_url: str,
@@ -84,48 +169,49 @@ class SupabaseLogger:
         success: bool = True,
         error_message: Optional[str] = None
     ) -> Optional[str]:
-        """Log a HackRX API request to Supabase"""
+        """Queue a HackRX API request for logging to Supabase
+        
+        The entry is written by the background flusher, which is started on
+        first use; after shutdown the entry is inserted directly (off the
+        event loop).
+        """
         
         if not self.enabled or not self.client:
             logger.debug("Supabase logging disabled - skipping log entry")
             return None
         
+        request_id = str(uuid.uuid4())
+        
+        log_entry = {
+            "id": request_id,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "document_url": document_url,
+            "questions": questions,  # JSON array
+            "answers": answers,  # JSONB array
+            "processing_time": processing_time,
+            "document_metadata": document_metadata,  # JSONB
+            "raw_response": raw_response,  # JSONB
+            "success": success,
+            "error_message": error_message,
+            "questions_count": len(questions),
+            "chunks_processed": document_metadata.get("chunks_processed", 0),
+            "vector_store": document_metadata.get("vector_store", "unknown")
+        }
+        
+        if self._stopped:
+            inserted = await asyncio.to_thread(self._insert_batch, [log_entry])
+            return request_id if inserted else None
+        
+        if self._flusher_task is None or self._flusher_task.done():
+            self.start()
+        
         try:
-            request_id = str(uuid.uuid4())
-            
-            log_entry = {
-                "id": request_id,
-                "timestamp": datetime.utcnow().isoformat(),
-                "document_url": document_url,
-                "questions": questions,  # JSON array
-                "answers": answers,  # JSONB array
-                "processing_time": processing_time,
-                "document_metadata": document_metadata,  # JSONB
-                "raw_response": raw_response,  # JSONB
-                "success": success,
-                "error_message": error_message,
-                "questions_count": len(questions),
-                "chunks_processed": document_metadata.get("chunks_processed", 0),
-                "vector_store": document_metadata.get("vector_store", "unknown")
-            }
-            
-            result = self.client.table("hackrx_requests").insert(log_entry).execute()
-            
-            if result.data:
-                logger.info(f"Logged HackRX request: {request_id}")
-                return request_id
-            else:
-                logger.error(f"Failed to log request: {result}")
-                return None
-                
-        except Exception as e:
-            error_type = type(e).__name__
-            if "getaddrinfo failed" in str(e) or "11001" in str(e):
-                logger.error(f"DNS/Network error logging HackRX request: {str(e)}")
-                logger.error(f"   Check your internet connection and Supabase URL: {settings.SUPABASE_URL}")
-            else:
-                logger.error(f"Error logging HackRX request ({error_type}): {str(e)}")
+            self._queue.put_nowait(log_entry)
+        except asyncio.QueueFull:
+            logger.warning(f"Supabase log queue full - dropping log entry {request_id}")
             return None
+        
+        return request_id
     
 
 supabase_logger = SupabaseLogger()
@@ -1,5 +1,36 @@
+import asyncio
 import time
-from typing import List, Tuple, Dict, Any
+from dataclasses import asdict
+from typing import List, Tuple, Dict, Any, Optional
+
+from app.models.response import RagMeta
+
+
+async def _answer_questions(retrieval_service, document_id: str, questions: List[str], k: int, settings,
+                            cache_scope: Optional[str] = None) -> Dict[str, Any]:
+    """Answer questions in one batched LLM call, or one call per question if batching is disabled."""
+    if settings.RAG_BATCH_ANSWERS:
+        return await retrieval_service.answer_batch(
+            document_id=document_id,
+            questions=questions,
+            k=k,
+            cache_scope=cache_scope,
+            debug=settings.RAG_DEBUG_CONTEXT,
+        )
+    return await retrieval_service.process_document_queries(
+        document_id=document_id,
+        questions=questions,
+        k=k,
+        cache_scope=cache_scope,
+        debug=settings.RAG_DEBUG_CONTEXT,
+    )
+
+
+def _save_cache(vector_store, cache_key: str, content_cache_key: Optional[str]) -> bool:
+    """Dump the store once under its content key and point the URL key at the same file."""
+    if not content_cache_key:
+        return vector_store.save_to_cache(cache_key)
+    return vector_store.save_to_cache(content_cache_key) and vector_store.alias_cache(cache_key, content_cache_key)
 
 
 async def traditional_rag(
@@ -53,23 +84,19 @@ async def traditional_rag(
 
 
     # ----------------------------------------------------------------------------------
-    # 1. Ensure a clean vector store
-    # ----------------------------------------------------------------------------------
-    if hasattr(vector_store, "adelete_all_documents"):
-        await vector_store.adelete_all_documents()
-    else:
-        vector_store.delete_all_documents()
-
-    # ----------------------------------------------------------------------------------
-    # 2. Try loading a cached store for the exact document URL
+    # 1. Try loading a cached store for the exact document URL (loading replaces
+    #    the store's contents, so no wipe is needed on a hit)
     # ----------------------------------------------------------------------------------
+    # Probe the store's cache support once and reuse the answers below
     cache_used = False
-    if (
-        settings.ENABLE_CACHING
-        and vector_store.supports_caching()
-        and vector_store.has_cache(document_url)
-    ):
-        if vector_store.load_from_cache(document_url):
+    cache_key = None
+    caching_enabled = settings.ENABLE_CACHING and vector_store.supports_caching()
+    if caching_enabled:
+        cache_key = await document_processor.get_cache_key(document_url, variant="std")
+    has_cache = caching_enabled and vector_store.has_cache(cache_key)
+
+    if has_cache:
+        if vector_store.load_from_cache(cache_key):
             cache_used = True
             try:
                 cached_chunks = (
@@ -80,18 +107,15 @@ async def traditional_rag(
             except Exception:
                 cached_chunks = -1
 
-            document_metadata = {
-                "document_id": document_id,
-                "chunks_processed": cached_chunks,
-                "vector_store": vector_store.store_type,
-                "cache_used": True,
-                "processing_mode": "traditional",
-            }
-
-            query_results = await retrieval_service.process_document_queries(
+            document_metadata = asdict(RagMeta(
                 document_id=document_id,
-                questions=questions,
-                k=k,
+                chunks_processed=cached_chunks,
+                vector_store=vector_store.store_type,
+                cache_used=True,
+            ))
+
+            query_results = await _answer_questions(
+                retrieval_service, document_id, questions, k, settings, cache_scope=cache_key
             )
 
             answers = query_results["answers"]
@@ -107,22 +131,41 @@ async def traditional_rag(
             }
 
     # ----------------------------------------------------------------------------------
-    # 3. If no cache, process the document from scratch
+    # 2. If no cache, clear the store and process the document from scratch
     # ----------------------------------------------------------------------------------
     if not cache_used:
+        if hasattr(vector_store, "adelete_all_documents"):
+            await vector_store.adelete_all_documents()
+        else:
+            vector_store.delete_all_documents()
+
         processing_result = await document_processor.process_document_url(
             document_url=document_url,
             document_id=document_id,
+            cache_variant="std" if caching_enabled else None,
         )
 
         if not processing_result["success"]:
             raise RuntimeError(processing_result["error"])
 
-        query_results = await retrieval_service.process_document_queries(
-            document_id=document_id,
-            questions=questions,
-            k=k,
+        # Write the cache in the background while the questions are answered;
+        # LLM generation dominates the request, so the dump is hidden behind it
+        background_tasks = []
+        chunks_count = processing_result["chunks_processed"]
+        content_cache_key = processing_result.get("content_cache_key")
+        if caching_enabled and processing_result["cache_used"]:
+            # Loaded from the content-keyed cache; let the URL key find it directly next time
+            if content_cache_key:
+                vector_store.alias_cache(cache_key, content_cache_key)
+        elif caching_enabled and chunks_count > settings.CACHE_MIN_CHUNKS:
+            background_tasks.append(
+                asyncio.create_task(asyncio.to_thread(_save_cache, vector_store, cache_key, content_cache_key))
+            )
+
+        query_results = await _answer_questions(
+            retrieval_service, document_id, questions, k, settings, cache_scope=cache_key
         )
+        await asyncio.gather(*background_tasks, return_exceptions=True)
 
         answers = query_results["answers"]
         debug_info = query_results["debug_info"]
@@ -131,29 +174,20 @@ async def traditional_rag(
             "chunks_per_question": k,
             "total_questions": len(questions),
             "retrieval_method": "LangChain RetrievalQA",
-            "cache_used": False,
+            "cache_used": processing_result["cache_used"],
             "processing_mode": "traditional",
             "debug_info": debug_info,
         }
 
-        document_metadata = {
-            "document_id": document_id,
-            "chunks_processed": processing_result["chunks_processed"],
-            "vector_store": processing_result["vector_store"],
-            "cache_used": False,
-            "processing_mode": "traditional",
-        }
-
-        chunks_count = processing_result["chunks_processed"]
-        if (
-            settings.ENABLE_CACHING
-            and vector_store.supports_caching()
-            and chunks_count > settings.CACHE_MIN_CHUNKS
-        ):
-            vector_store.save_to_cache(document_url)
+        document_metadata = asdict(RagMeta(
+            document_id=document_id,
+            chunks_processed=processing_result["chunks_processed"],
+            vector_store=processing_result["vector_store"],
+            cache_used=processing_result["cache_used"],
+        ))
 
     # ----------------------------------------------------------------------------------
-    # 4. Done – return consolidated result
+    # 3. Done – return consolidated result
     # ----------------------------------------------------------------------------------
     duration = time.time() - start_time
     return answers, document_metadata, raw_response
\ No newline at end of file
@@ -1,14 +1,38 @@
 from app.services.vector_stores.base_vector_store import BaseVectorStore
 from app.services.preprocessors.file_processor import FileProcessor
+from app.services.vector_stores.vector_store_cache import VectorStoreCache
+from app.config.settings import settings
+from pathlib import Path
+import asyncio
+import concurrent.futures
+import hashlib
+import itertools
+import logging
+import pickle
+import threading
 import uuid
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 class DocumentProcessor:
     def __init__(self, vector_store: BaseVectorStore, chunk_size: int = 1000, chunk_overlap: int = 200, 
                  clean_content: bool = True, min_chunk_length: int = 100, batch_size: int = 2000,
-                 use_llm_pdf_loader: bool = True):
+                 use_llm_pdf_loader: bool = True, stream_batch_size: int = 256, queue_size: int = 4,
+                 max_concurrency: int = 8, chunk_cache_dir: str = "vector_store_cache",
+                 embed_batch_size: int = 64, upsert_batch_size: Optional[int] = None,
+                 flush_interval: float = 0.2):
         self.vector_store = vector_store
         self.batch_size = batch_size
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size or batch_size
+        self.flush_interval = flush_interval
+        self.max_concurrency = max_concurrency
+        self.stream_batch_size = stream_batch_size
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.chunk_cache_dir = Path(chunk_cache_dir)
         self.file_processor = FileProcessor(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
@@ -17,72 +41,357 @@ class DocumentProcessor:
             use_llm_pdf_loader=use_llm_pdf_loader
         )
     
+    async def get_cache_key(self, document_url: str, variant: Optional[str] = None) -> str:
+        """Build the vector-store cache key for a document URL
+        
+        The key covers the remote file's ETag/Last-Modified, the chunking
+        settings and the embedding model, so cached stores are only reused
+        when they would be rebuilt identically.
+        """
+        fingerprint = await self.file_processor.get_remote_fingerprint(document_url)
+        
+        return VectorStoreCache.build_cache_key(
+            document_url,
+            fingerprint=fingerprint,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            embedding_model=getattr(self.vector_store, "embedding_model", None),
+            variant=variant
+        )
+    
+    def get_content_cache_key(self, content_hash: str, variant: Optional[str] = None) -> str:
+        """Build the vector-store cache key for downloaded document bytes
+        
+        Unlike get_cache_key this survives URL changes (signed URLs, query
+        strings), since it only depends on the file contents.
+        """
+        return VectorStoreCache.build_cache_key(
+            f"blake2b:{content_hash}",
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            embedding_model=getattr(self.vector_store, "embedding_model", None),
+            variant=variant
+        )
+    
+    def _chunk_cache_path(self, content_hash: str) -> Path:
+        """Path of the on-disk chunk cache for a document under the current chunking settings"""
+        fp = self.file_processor
+        config = (
+            f"{content_hash}:{self.chunk_size}/{self.chunk_overlap}:{fp.clean_content}:"
+            f"{fp.chunk_cleaner.min_chunk_length}:{fp.use_llm_pdf_loader}:{fp.use_pptx_ocr}:"
+            f"{fp.document_splitter.dedup}"
+        )
+        key = hashlib.blake2b(config.encode(), digest_size=16).hexdigest()
+        return self.chunk_cache_dir / f"{key}.chunks.pkl"
+    
+    def _iter_cached_chunks(self, cache_path: Path, info: Dict) -> Iterator[List]:
+        """Yield chunks from the chunk cache in stream-sized batches"""
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+        
+        info.update(cached["info"])
+        chunks = cached["chunks"]
+        for i in range(0, len(chunks), self.stream_batch_size):
+            yield chunks[i:i + self.stream_batch_size]
+    
+    def _save_chunk_cache(self, cache_path: Path, chunks: List, info: Dict):
+        """Write chunks to the chunk cache; failures only cost a re-parse next time"""
+        try:
+            self.chunk_cache_dir.mkdir(exist_ok=True)
+            temp_path = cache_path.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+            with open(temp_path, "wb") as f:
+                pickle.dump({"chunks": chunks, "info": info}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            temp_path.replace(cache_path)
+        except Exception as e:
+            logger.warning("Error writing chunk cache: %s", e)
+    
     async def _store_chunks_in_batches(
         self, 
         texts: list, 
         metadatas: list, 
         batch_size: int = 2000
     ) -> list:
-        """Store chunks in batches to avoid overwhelming the vector database"""
-        all_ids = []
+        """Store chunks in batches to avoid overwhelming the vector database
+        
+        Chunks are grouped by length so each embedding batch pads to a similar
+        size, and batches are upserted concurrently, at most max_concurrency at
+        a time; the returned ids are in the same order as texts. Stores that
+        accept precomputed vectors go through _embed_and_upsert instead.
+        """
         total_chunks = len(texts)
+        order = sorted(range(total_chunks), key=lambda i: len(texts[i]))
+        sorted_texts = [texts[i] for i in order]
+        sorted_metadatas = [metadatas[i] for i in order]
         
-        print(f"Processing {total_chunks} chunks in batches of {batch_size}...")
+        if hasattr(self.vector_store, 'aadd_with_vectors'):
+            sorted_ids = await self._embed_and_upsert(sorted_texts, sorted_metadatas)
+            all_ids = [None] * total_chunks
+            for position, doc_id in zip(order, sorted_ids):
+                all_ids[position] = doc_id
+            return all_ids
         
-        for i in range(0, total_chunks, batch_size):
-            batch_start = i
-            batch_end = min(i + batch_size, total_chunks)
-            batch_texts = texts[batch_start:batch_end]
-            batch_metadatas = metadatas[batch_start:batch_end]
-            
-            batch_num = (i // batch_size) + 1
-            total_batches = (total_chunks + batch_size - 1) // batch_size
-            
-            print(f"Processing batch {batch_num}/{total_batches} ({len(batch_texts)} chunks)")
+        batches = [
+            (sorted_texts[i:i + batch_size], sorted_metadatas[i:i + batch_size])
+            for i in range(0, total_chunks, batch_size)
+        ]
+        total_batches = len(batches)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        logger.debug("Processing %d chunks in %d batches of %d...", total_chunks, total_batches, batch_size)
+        
+        async def upsert(batch_num: int, batch_texts: list, batch_metadatas: list) -> list:
+            async with semaphore:
+                logger.debug("Processing batch %d/%d (%d chunks)", batch_num, total_batches, len(batch_texts))
+                
+                try:
+                    if hasattr(self.vector_store, 'aadd_documents'):
+                        batch_ids = await self.vector_store.aadd_documents(
+                            texts=batch_texts, 
+                            metadatas=batch_metadatas
+                        )
+                    else:
+                        batch_ids = self.vector_store.add_documents(
+                            texts=batch_texts, 
+                            metadatas=batch_metadatas
+                        )
+                    
+                    logger.debug("Batch %d/%d completed successfully (%d chunks stored)", batch_num, total_batches, len(batch_ids))
+                    return batch_ids
+                    
+                except Exception as e:
+                    logger.error("Error processing batch %d/%d: %s", batch_num, total_batches, e)
+                    raise e
+        
+        ids_lists = await asyncio.gather(*[
+            upsert(batch_num, batch_texts, batch_metadatas)
+            for batch_num, (batch_texts, batch_metadatas) in enumerate(batches, 1)
+        ])
+        all_ids = [None] * total_chunks
+        for position, doc_id in zip(order, itertools.chain.from_iterable(ids_lists)):
+            all_ids[position] = doc_id
+        
+        logger.debug("All batches completed! Total chunks stored: %d", len(all_ids))
+        return all_ids
+    
+    async def _embed_and_upsert(self, texts: list, metadatas: list) -> list:
+        """Embed in small batches and upsert in large ones, as two concurrent stages
+        
+        Embedding favours small batches while vector-store writes favour large
+        ones, so embedded micro-batches are fed through a queue to an
+        accumulator that upserts once upsert_batch_size vectors are pending or
+        flush_interval has passed. Returns ids in the same order as texts.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        ids: List[Optional[str]] = [None] * len(texts)
+        pending: List[Tuple[int, List[float]]] = []
+        
+        async def embed(start: int):
+            async with semaphore:
+                vectors = await self.vector_store.embeddings.aembed_documents(
+                    texts[start:start + self.embed_batch_size]
+                )
+            await queue.put((start, vectors))
+        
+        async def embed_all():
+            try:
+                await asyncio.gather(*[embed(start) for start in range(0, len(texts), self.embed_batch_size)])
+            finally:
+                await queue.put(None)
+        
+        async def flush():
+            positions = [position for position, _ in pending]
+            batch_ids = await self.vector_store.aadd_with_vectors(
+                texts=[texts[p] for p in positions],
+                metadatas=[metadatas[p] for p in positions],
+                vectors=[vector for _, vector in pending]
+            )
+            for position, doc_id in zip(positions, batch_ids):
+                ids[position] = doc_id
+            logger.debug("Upserted %d embedded chunks", len(batch_ids))
+            pending.clear()
+        
+        logger.debug(
+            "Embedding %d chunks in batches of %d, upserting in batches of up to %d...",
+            len(texts), self.embed_batch_size, self.upsert_batch_size
+        )
+        
+        producer = asyncio.create_task(embed_all())
+        try:
+            deadline = 0.0
+            while True:
+                timeout = max(0.0, deadline - loop.time()) if pending else None
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    await flush()
+                    continue
+                
+                if item is None:
+                    break
+                
+                start, vectors = item
+                if not pending:
+                    deadline = loop.time() + self.flush_interval
+                pending.extend(zip(range(start, start + len(vectors)), vectors))
+                if len(pending) >= self.upsert_batch_size:
+                    await flush()
             
+            if pending:
+                await flush()
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+        
+        return ids
+    
+    def _chunk_metadatas(
+        self, chunks: List, document_url: str, document_id: str, start_index: int, namespace: Optional[str]
+    ) -> List[Dict]:
+        """Build the vector-store metadata for a batch of chunks, numbered from start_index"""
+        base = {
+            "document_id": document_id,
+            "source": document_url,
+            "content_cleaned": self.file_processor.clean_content
+        }
+        
+        # if chunk.metadata.get('extraction_method'):
+        #     metadata['extraction_method'] = chunk.metadata['extraction_method']
+        
+        if self.vector_store.store_type == "pinecone" and namespace:
+            base["namespace"] = namespace
+        
+        return [
+            {**base, "page": chunk.metadata.get("page", 0), "chunk_index": i}
+            for i, chunk in enumerate(chunks, start_index)
+        ]
+    
+    async def _stream_chunks_to_store(
+        self,
+        document_path: str,
+        detected_type: str,
+        document_url: str,
+        document_id: str,
+        namespace: Optional[str] = None,
+        content_hash: Optional[str] = None
+    ) -> Tuple[List[str], int, Dict]:
+        """Load/chunk the document and store the chunks as a two-stage pipeline
+        
+        A worker thread loads and chunks the document, handing batches of
+        chunks to the event loop through a bounded queue; batches are stored
+        as they arrive, so storing overlaps with parsing and a slow vector
+        store applies backpressure to the loader. When content_hash is given,
+        chunks are read from (or written to) the on-disk chunk cache instead
+        of re-parsing the file. Returns (ids, chunk count, extraction info).
+        Load/chunk failures are raised as ValueError.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        extraction_info: Dict = {}
+        
+        def put(item):
+            # Blocks while the queue is full, but gives up once the consumer has stopped
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    return future.result(timeout=0.5)
+                except concurrent.futures.TimeoutError:
+                    if stop.is_set():
+                        future.cancel()
+                        return
+        
+        def produce():
             try:
-                if hasattr(self.vector_store, 'aadd_documents'):
-                    batch_ids = await self.vector_store.aadd_documents(
-                        texts=batch_texts, 
-                        metadatas=batch_metadatas
-                    )
+                cache_path = self._chunk_cache_path(content_hash) if content_hash else None
+                collected: Optional[List] = None
+                if cache_path is not None and cache_path.exists():
+                    logger.info("Loading chunks from chunk cache")
+                    source = self._iter_cached_chunks(cache_path, extraction_info)
                 else:
-                    batch_ids = self.vector_store.add_documents(
-                        texts=batch_texts, 
-                        metadatas=batch_metadatas
-                    )
+                    source = self.file_processor.iter_chunks(document_path, detected_type, extraction_info)
+                    if cache_path is not None:
+                        collected = []
                 
-                all_ids.extend(batch_ids)
-                print(f"Batch {batch_num}/{total_batches} completed successfully ({len(batch_ids)} chunks stored)")
+                pending: List = []
+                for chunks in source:
+                    if stop.is_set():
+                        return
+                    if collected is not None:
+                        collected.extend(chunks)
+                    pending.extend(chunks)
+                    while len(pending) >= self.stream_batch_size:
+                        put(pending[:self.stream_batch_size])
+                        pending = pending[self.stream_batch_size:]
+                if pending and not stop.is_set():
+                    put(pending)
                 
+                if collected and not stop.is_set():
+                    self._save_chunk_cache(cache_path, collected, extraction_info)
+            except ValueError:
+                raise
             except Exception as e:
-                print(f"Error processing batch {batch_num}/{total_batches}: {str(e)}")
-                raise e
+                raise ValueError(self.file_processor.DEFAULT_ERROR_MSG) from e
+            finally:
+                put(None)
         
-        print(f"All batches completed! Total chunks stored: {len(all_ids)}")
-        return all_ids
+        producer = asyncio.create_task(asyncio.to_thread(produce))
+        
+        all_ids: List[str] = []
+        chunk_count = 0
+        store_error: Optional[Exception] = None
+        
+        try:
+            while (batch := await queue.get()) is not None:
+                # After a failed store keep draining so the producer finishes promptly
+                if store_error is not None:
+                    continue
+                
+                texts = [chunk.page_content for chunk in batch]
+                metadatas = self._chunk_metadatas(batch, document_url, document_id, chunk_count, namespace)
+                chunk_count += len(batch)
+                
+                try:
+                    all_ids.extend(await self._store_chunks_in_batches(texts, metadatas, self.upsert_batch_size))
+                except Exception as e:
+                    store_error = e
+                    stop.set()
+        finally:
+            stop.set()
+        
+        await producer
+        if store_error is not None:
+            raise store_error
+        
+        logger.info("Stored %d chunks in vector database", chunk_count)
+        return all_ids, chunk_count, extraction_info
     
     async def process_document_url(
         self, 
         document_url: str, 
         document_id: Optional[str] = None,
-        namespace: Optional[str] = None
+        namespace: Optional[str] = None,
+        cache_variant: Optional[str] = None
     ) -> Dict:
-        """Process document from URL and store in vector DB"""
+        """Process document from URL and store in vector DB
+        
+        With cache_variant set (and caching enabled), a vector store cached
+        under the hash of the downloaded bytes is loaded instead of
+        re-embedding, so a document reached through a different URL is not
+        processed twice. The key is returned as content_cache_key; saving the
+        store under it is left to the caller, which can do it off the
+        request path.
+        """
         
         if not document_id:
             document_id = str(uuid.uuid4())
         
         try:
-            validation_result = self.file_processor.validate_file_url(document_url)
-            if not validation_result["valid"]:
-                return {
-                    "success": False,
-                    "error": validation_result["error"],
-                    "document_id": document_id
-                }
-            
-            download_result = self.file_processor.download_and_validate_file(document_url)
+            # Extension, size and content checks all run on the streamed GET;
+            # there is no separate HEAD round-trip
+            download_result = await self.file_processor.download_and_validate_file(document_url)
             if not download_result["success"]:
                 return {
                     "success": False,
@@ -92,54 +401,46 @@ class DocumentProcessor:
             
             document_path = download_result["file_path"]
             detected_type = download_result["detected_type"]
+            content_hash = download_result["content_hash"]
+            
+            content_cache_key = None
+            if cache_variant and settings.ENABLE_CACHING and self.vector_store.supports_caching():
+                content_cache_key = self.get_content_cache_key(content_hash, variant=cache_variant)
+                if self.vector_store.has_cache(content_cache_key) and self.vector_store.load_from_cache(content_cache_key):
+                    self.file_processor.cleanup_file(document_path)
+                    return {
+                        "success": True,
+                        "document_id": document_id,
+                        "chunks_processed": self.vector_store.get_document_count(namespace),
+                        "vector_ids": [],
+                        "vector_store": self.vector_store.store_type,
+                        "extraction_method": None,
+                        "patterns_detected": 0,
+                        "content_hash": content_hash,
+                        "content_cache_key": content_cache_key,
+                        "cache_used": True
+                    }
             
-            load_result = self.file_processor.load_document(document_path, detected_type)
-            if not load_result["success"]:
+            try:
+                ids, chunk_count, extraction_info = await self._stream_chunks_to_store(
+                    document_path, detected_type, document_url, document_id, namespace, content_hash
+                )
+            except ValueError as e:
                 self.file_processor.cleanup_file(document_path)
                 return {
                     "success": False,
-                    "error": load_result["error"],
+                    "error": str(e),
                     "document_id": document_id
                 }
             
-            documents = load_result["documents"]
-            
-            chunk_result = self.file_processor.process_to_chunks(documents, detected_type)
-            if not chunk_result["success"]:
+            if not chunk_count:
                 self.file_processor.cleanup_file(document_path)
                 return {
                     "success": False,
-                    "error": chunk_result["error"],
+                    "error": self.file_processor.DEFAULT_ERROR_MSG,
                     "document_id": document_id
                 }
             
-            chunks = chunk_result["chunks"]
-            
-            texts = [chunk.page_content for chunk in chunks]
-            metadatas = []
-            
-            for i, chunk in enumerate(chunks):
-                metadata = {
-                    "document_id": document_id,
-                    "page": chunk.metadata.get("page", 0),
-                    "source": document_url,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                    "content_cleaned": self.file_processor.clean_content
-                }
-                
-                # if chunk.metadata.get('extraction_method'):
-                #     metadata['extraction_method'] = chunk.metadata['extraction_method']
-                
-                if self.vector_store.store_type == "pinecone" and namespace:
-                    metadata["namespace"] = namespace
-                    
-                metadatas.append(metadata)
-            
-            print(f"Storing {len(chunks)} chunks in vector database...")
-            
-            ids = await self._store_chunks_in_batches(texts, metadatas, self.batch_size)
-            
             # print(f"Final verification: Testing document retrieval...")
             # try:
             #     verification_results = self.vector_store.similarity_search(
@@ -159,11 +460,14 @@ class DocumentProcessor:
             return {
                 "success": True,
                 "document_id": document_id,
-                "chunks_processed": len(chunks),
+                "chunks_processed": chunk_count,
                 "vector_ids": ids,
                 "vector_store": self.vector_store.store_type,
-                "extraction_method": chunk_result.get("extraction_method"),
-                "patterns_detected": chunk_result.get("patterns_detected", 0)
+                "extraction_method": extraction_info.get("extraction_method"),
+                "patterns_detected": extraction_info.get("patterns_detected", 0),
+                "content_hash": content_hash,
+                "content_cache_key": content_cache_key,
+                "cache_used": False
             }
             
         except Exception as e:
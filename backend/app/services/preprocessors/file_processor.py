@@ -5,18 +5,61 @@ from langchain_core.documents import Document
 from app.services.utils.file_processor.chunk_cleaner import ChunkCleaner
 from app.services.utils.file_processor.document_splitter import DocumentSplitter
 from app.services.utils.file_processor.custom_pptx_loader import CustomPptxLoader
+from app.services.utils.file_processor.ocr import image_to_text
 import uuid
 import os
+import hashlib
 import tempfile
-import requests
+import httpx
 import mimetypes
-from typing import Dict, Optional, List
+import multiprocessing
+import threading
+from typing import Dict, Optional, List, ClassVar, Iterator, Iterable
 from urllib.parse import urlparse
-import pytesseract
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
 from PIL import Image
 
+# Leading-byte signatures, checked in order
+_SIGS = (
+    (b'%PDF', 'application/pdf'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'PK\x05\x06', 'application/zip'),
+    (b'\xFF\xD8\xFF', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+)
+
+_OFFICE_TYPES = {
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+@lru_cache(maxsize=1024)
+def _guess_type(filename: str) -> Optional[str]:
+    return mimetypes.guess_type(filename)[0]
+
+
+def _load_pdf(file_path: str, use_llm_pdf_loader: bool) -> List[Document]:
+    """Load a PDF in a worker process (module-level so it can be pickled)"""
+    if use_llm_pdf_loader:
+        return PyMuPDF4LLMLoader(file_path, mode='single').load()
+    return PyMuPDFLoader(file_path).load()
+
+
 class FileProcessor:
     DEFAULT_ERROR_MSG = "Sorry, I cannot answer this question. If you have any other queries, feel free to ask."
+    
+    _http_client: ClassVar[Optional[httpx.AsyncClient]] = None
+    _pdf_pool: ClassVar[Optional[ProcessPoolExecutor]] = None
+    _pdf_pool_lock: ClassVar[threading.Lock] = threading.Lock()
+    
+    # PDFs above this size are parsed in a worker process, so the parse neither
+    # holds the GIL nor competes with other requests' parses on one core
+    PDF_POOL_THRESHOLD = 5 * 1024 * 1024
+    PDF_POOL_TIMEOUT = 300  # seconds to wait for a worker-process parse
+    
     def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, 
                  clean_content: bool = True, min_chunk_length: int = 100,
                  use_pptx_ocr: bool = True,
@@ -35,6 +78,7 @@ class FileProcessor:
         }
 
         self.max_file_size = 500 * 1024 * 1024  # 500MB
+        self.download_chunk_size = 1 << 20  # 1MB
         self.clean_content = clean_content
         self.use_pptx_ocr = use_pptx_ocr
         self.use_llm_pdf_loader = use_llm_pdf_loader
@@ -42,132 +86,128 @@ class FileProcessor:
         self.chunk_cleaner = ChunkCleaner(min_chunk_length)
         self.document_splitter = DocumentSplitter(chunk_size, chunk_overlap)
 
-    def _invalid(self):
-        return {"valid": False, "error": self.DEFAULT_ERROR_MSG}
-
     def _fail(self, msg: str | None = None):
         return {"success": False, "error": msg or self.DEFAULT_ERROR_MSG}
 
+    @classmethod
+    def get_http_client(cls) -> httpx.AsyncClient:
+        """Get or create the shared HTTP/2 client used for document fetches"""
+        if cls._http_client is None or cls._http_client.is_closed:
+            cls._http_client = httpx.AsyncClient(
+                http2=True,
+                timeout=30,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            )
+            print("Created shared HTTP/2 client for document fetches")
+        return cls._http_client
+
+    @classmethod
+    async def cleanup_http_client(cls):
+        """Close the shared HTTP client (call this on app shutdown)"""
+        if cls._http_client is not None and not cls._http_client.is_closed:
+            await cls._http_client.aclose()
+            cls._http_client = None
+            print("Cleaned up shared document HTTP client")
 
-    def validate_file_url(self, url: str) -> Dict:
-        """Validate file URL and check if file type is supported"""
+    async def get_remote_fingerprint(self, url: str) -> str:
+        """Return the ETag / Last-Modified validator of a remote file, or '' if unavailable"""
         try:
-            response = requests.head(url, allow_redirects=True, timeout=10)
+            response = await self.get_http_client().head(url, timeout=10)
             response.raise_for_status()
-            
-            content_length = response.headers.get('content-length')
-            
-            if content_length and int(content_length) > self.max_file_size:
-                return self._invalid()
-            
-            parsed_url = urlparse(url)
-            filename = os.path.basename(parsed_url.path.split('?')[0])
-            file_extension = os.path.splitext(filename)[1].lower()
-            
-            if not file_extension or file_extension not in self.supported_extensions:
-                return self._invalid()
-            
-            return {
-                "valid": True,
-                "file_extension": file_extension,
-                "filename": filename
-            }
-            
-        except requests.RequestException as e:
-            parsed_url = urlparse(url)
-            filename = os.path.basename(parsed_url.path.split('?') [0])
-            file_extension = os.path.splitext(filename)[1].lower()
-            
-            return self._invalid()
+            return response.headers.get('etag') or response.headers.get('last-modified') or ''
+        except httpx.HTTPError:
+            return ''
 
-    def _bytes_to_tempfile(self, content: bytes, suffix: str = '.tmp') -> str:
-        """Write bytes to a temporary file and return its path."""
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    @staticmethod
+    def _advise_sequential_read(fd: int):
+        """Hint the kernel that the file is about to be read front to back (Linux only)"""
+        if not hasattr(os, 'posix_fadvise'):
+            return
         try:
-            tmp.write(content)
-            tmp.close()
-            return tmp.name
-        except Exception:
-            if os.path.exists(tmp.name):
-                os.unlink(tmp.name)
-            raise
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+
+    def _detect_type(self, filename: str, file_extension: str, header: bytes) -> str:
+        """Detect MIME type from the filename, the file extension and the leading bytes of the file"""
+        detected_type = (
+            _guess_type(filename)
+            or self.supported_extensions.get(file_extension, 'application/octet-stream')
+        )
+        
+        # Basic content-based detection for common formats
+        if detected_type == 'application/octet-stream':
+            detected_type = next((mime for sig, mime in _SIGS if header.startswith(sig)), detected_type)
+        
+        # Handle Office document MIME types
+        if detected_type in ('application/zip', 'application/x-zip-compressed'):
+            detected_type = _OFFICE_TYPES.get(file_extension, detected_type)
+        
+        return detected_type
 
-    def download_and_validate_file(self, url: str) -> Dict:
-        """Download file and perform validation with in-memory buffer."""
+    async def download_and_validate_file(self, url: str) -> Dict:
+        """Stream the file to a temp file, sniffing its type from the first chunk
+        
+        The result includes a blake2b hash of the downloaded bytes, computed as
+        they stream in, for content-addressed caching.
+        """
+        tmp = None
         try:
-            # Download content to memory first
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            content = response.content
-            
-            if len(content) > self.max_file_size:
-                return self._fail()
-            
             # Parse URL and filename
             parsed_url = urlparse(url)
             filename = os.path.basename(parsed_url.path.split('?')[0]) or "document"
             file_extension = os.path.splitext(filename)[1].lower()
             
-            # Detect MIME type using filename and content analysis
-            detected_type = None
-            
-            # First try mimetypes based on URL/filename
-            detected_type = mimetypes.guess_type(url)[0]
-            
-            # If mimetypes fails, use file extension mapping
-            if not detected_type:
-                detected_type = self.supported_extensions.get(file_extension, 'application/octet-stream')
-            
-            # Basic content-based detection for common formats
-            if not detected_type or detected_type == 'application/octet-stream':
-                # Check for PDF signature
-                if content.startswith(b'%PDF'):
-                    detected_type = 'application/pdf'
-                # Check for ZIP-based formats (Office documents)
-                elif content.startswith(b'PK\x03\x04') or content.startswith(b'PK\x05\x06'):
-                    if file_extension == '.docx':
-                        detected_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                    elif file_extension == '.pptx':
-                        detected_type = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
-                    elif file_extension == '.xlsx':
-                        detected_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                # Check for image formats
-                elif content.startswith(b'\xFF\xD8\xFF'):  # JPEG
-                    detected_type = 'image/jpeg'
-                elif content.startswith(b'\x89PNG\r\n\x1a\n'):  # PNG
-                    detected_type = 'image/png'
-            
-            # Handle Office document MIME types
-            if detected_type in ['application/zip', 'application/x-zip-compressed'] and file_extension in ['.docx', '.pptx', '.xlsx']:
-                if file_extension == '.docx':
-                    detected_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                elif file_extension == '.pptx':
-                    detected_type = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
-                elif file_extension == '.xlsx':
-                    detected_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            
             # Validate file extension
             if file_extension not in self.supported_extensions:
                 return self._fail()
             
-            # Write to temp file only if validation passes
-            temp_path = self._bytes_to_tempfile(content, file_extension)
+            async with self.get_http_client().stream("GET", url) as response:
+                response.raise_for_status()
+                
+                content_length = response.headers.get('content-length')
+                if content_length and int(content_length) > self.max_file_size:
+                    return self._fail()
+                
+                # Chunks are written while the rest of the body is still arriving,
+                # so at most one chunk of the file is held in memory
+                tmp = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension)
+                header = b''
+                written = 0
+                digest = hashlib.blake2b(digest_size=16)
+                async for chunk in response.aiter_bytes(chunk_size=self.download_chunk_size):
+                    if len(header) < 8:
+                        header += chunk[:8 - len(header)]
+                    written += len(chunk)
+                    if written > self.max_file_size:
+                        raise ValueError("File exceeds maximum size")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                tmp.flush()
+                self._advise_sequential_read(tmp.fileno())
+                tmp.close()
             
             return {
                 "success": True,
-                "file_path": temp_path,
-                "detected_type": detected_type,
-                "filename": filename
+                "file_path": tmp.name,
+                "detected_type": self._detect_type(filename, file_extension, header),
+                "filename": filename,
+                "content_hash": digest.hexdigest()
             }
             
         except Exception as e:
+            if tmp is not None:
+                tmp.close()
+                self.cleanup_file(tmp.name)
             return self._fail()
 
     def _extract_text_from_image(self, file_path: str) -> Dict:
         """Extract text from image using OCR"""
         try:
-            image = Image.open(file_path)
-            text = pytesseract.image_to_string(image)
+            with Image.open(file_path) as image:
+                text = image_to_text(image)
             
             if not text.strip():
                 return self._fail()
@@ -189,29 +229,76 @@ class FileProcessor:
         except Exception as e:
             return self._fail()
 
+    def _get_loader(self, file_path: str, detected_type: str):
+        """Pick the document loader for a file type; returns None for images (OCR) and unsupported types"""
+        file_extension = os.path.splitext(file_path)[1].lower()
+        
+        if detected_type == 'application/pdf' or file_extension == '.pdf':
+            # Choose loader implementation based on initialization flag
+            if self.use_llm_pdf_loader:
+                return PyMuPDF4LLMLoader(file_path, mode='single')
+            return PyMuPDFLoader(file_path)
+        elif 'word' in detected_type or file_extension in ['.docx', '.doc']:
+            return DocxLoader(file_path)
+        elif 'presentation' in detected_type or file_extension in ['.pptx', '.ppt']:
+            return CustomPptxLoader(file_path, use_ocr=self.use_pptx_ocr)
+        elif 'spreadsheet' in detected_type or file_extension in ['.xlsx', '.xls']:
+            return XlsxLoader(file_path)
+        return None
+
+    @classmethod
+    def get_pdf_pool(cls) -> ProcessPoolExecutor:
+        """Get or create the shared process pool used for large PDFs
+        
+        Workers are spawned rather than forked, since the server process
+        already runs threads (and possibly CUDA) that a fork would copy.
+        """
+        if cls._pdf_pool is None:
+            with cls._pdf_pool_lock:
+                if cls._pdf_pool is None:
+                    cls._pdf_pool = ProcessPoolExecutor(
+                        max_workers=os.cpu_count(),
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return cls._pdf_pool
+
+    @classmethod
+    def cleanup_pdf_pool(cls):
+        """Shut down the PDF process pool (call this on app shutdown)"""
+        with cls._pdf_pool_lock:
+            if cls._pdf_pool is not None:
+                cls._pdf_pool.shutdown(cancel_futures=True)
+                cls._pdf_pool = None
+
+    def _load_pages(self, loader, file_path: str, detected_type: str, lazy: bool = False) -> Iterable[Document]:
+        """Run a loader, sending large PDFs to the process pool"""
+        file_extension = os.path.splitext(file_path)[1].lower()
+        is_pdf = detected_type == 'application/pdf' or file_extension == '.pdf'
+        
+        if is_pdf and os.path.getsize(file_path) > self.PDF_POOL_THRESHOLD:
+            future = self.get_pdf_pool().submit(_load_pdf, file_path, self.use_llm_pdf_loader)
+            try:
+                return future.result(timeout=self.PDF_POOL_TIMEOUT)
+            except FutureTimeoutError:
+                future.cancel()
+                raise
+        
+        if lazy and hasattr(loader, 'lazy_load'):
+            return loader.lazy_load()
+        return loader.load()
+
     def load_document(self, file_path: str, detected_type: str) -> Dict:
         """Load document using appropriate loader based on file type"""
         try:
             file_extension = os.path.splitext(file_path)[1].lower()
             
-            if detected_type == 'application/pdf' or file_extension == '.pdf':
-                # Choose loader implementation based on initialization flag
-                if self.use_llm_pdf_loader:
-                    loader = PyMuPDF4LLMLoader(file_path, mode='single')
-                else:
-                    loader = PyMuPDFLoader(file_path)
-            elif 'word' in detected_type or file_extension in ['.docx', '.doc']:
-                loader = DocxLoader(file_path)
-            elif 'presentation' in detected_type or file_extension in ['.pptx', '.ppt']:
-                loader = CustomPptxLoader(file_path, use_ocr=self.use_pptx_ocr)
-            elif 'spreadsheet' in detected_type or file_extension in ['.xlsx', '.xls']:
-                loader = XlsxLoader(file_path)
-            elif 'image' in detected_type or file_extension in ['.jpg', '.jpeg', '.png']:
-                return self._extract_text_from_image(file_path)
-            else:
+            loader = self._get_loader(file_path, detected_type)
+            if loader is None:
+                if 'image' in detected_type or file_extension in ['.jpg', '.jpeg', '.png']:
+                    return self._extract_text_from_image(file_path)
                 return self._fail()
             
-            documents = loader.load()
+            documents = self._load_pages(loader, file_path, detected_type)
             
             if not documents or not any(doc.page_content.strip() for doc in documents):
                 return self._fail()
@@ -224,6 +311,73 @@ class FileProcessor:
         except Exception as e:
             return self._fail()
     
+    @staticmethod
+    def _drain(documents: List) -> Iterator:
+        """Yield documents in order, removing each from the list so it can be freed once processed"""
+        documents.reverse()
+        while documents:
+            yield documents.pop()
+    
+    def iter_chunks(self, file_path: str, detected_type: str, info: Dict) -> Iterator[List]:
+        """Yield cleaned chunks page by page as the document is loaded
+        
+        Falls back to loading the whole document first when cleaning needs
+        every page (PDF header/footer detection) or there is no page loader
+        for the file (images, which are OCR'd in one pass).
+        Raises ValueError if the document cannot be loaded or chunked;
+        extraction details are written into info.
+        """
+        loader = self._get_loader(file_path, detected_type)
+        
+        needs_whole_document = loader is None or (
+            self.clean_content and not self.use_llm_pdf_loader and detected_type == 'application/pdf'
+        )
+        
+        if needs_whole_document:
+            load_result = self.load_document(file_path, detected_type)
+            if not load_result["success"]:
+                raise ValueError(load_result["error"])
+            
+            # Take the only reference to the pages so each one is freed once it is split
+            documents = load_result.pop("documents")
+            is_ocr_content = any(doc.metadata.get('extraction_method') == 'OCR' for doc in documents)
+            extraction_method = 'OCR' if is_ocr_content else None
+            
+            repetitive_patterns = []
+            if self.clean_content and detected_type == 'application/pdf':
+                repetitive_patterns = self.chunk_cleaner.detect_repetitive_patterns(documents)
+            
+            info["extraction_method"] = extraction_method
+            info["patterns_detected"] = len(repetitive_patterns)
+            
+            # Patterns need every page, but splitting and cleaning can still go page by page
+            for chunks in self.document_splitter.split_documents_iter(self._drain(documents)):
+                chunks = self._clean_chunks(chunks, detected_type, extraction_method, repetitive_patterns)
+                if chunks:
+                    yield chunks
+            return
+        
+        info["extraction_method"] = None
+        info["patterns_detected"] = 0
+        
+        documents = self._load_pages(loader, file_path, detected_type, lazy=True)
+        pages = (document for document in documents if document.page_content.strip())
+        for chunks in self.document_splitter.split_documents_iter(pages):
+            chunks = self._clean_chunks(chunks, detected_type, None, [])
+            if chunks:
+                yield chunks
+    
+    def _clean_chunks(self, chunks: List, detected_type: str, extraction_method: Optional[str],
+                      repetitive_patterns: List[str]) -> List:
+        """Apply the cleaning configured for this processor to a list of chunks"""
+        if self.clean_content and not self.use_llm_pdf_loader:
+            if detected_type == 'application/pdf' and repetitive_patterns:
+                return self.chunk_cleaner._aggressive_clean_chunks(chunks, repetitive_patterns)
+            return self.chunk_cleaner.clean_chunks_by_type(chunks, detected_type, extraction_method)
+        elif extraction_method == 'OCR':
+            return self.chunk_cleaner._minimal_clean_chunks(chunks)
+        return chunks
+
     def process_to_chunks(self, documents: List, detected_type: str) -> Dict:
         """Process documents into cleaned chunks"""
         try:
@@ -237,14 +391,7 @@ class FileProcessor:
                 repetitive_patterns = self.chunk_cleaner.detect_repetitive_patterns(documents)
             
             chunks = self.document_splitter.split_documents(documents)
-            
-            if self.clean_content and not self.use_llm_pdf_loader:
-                if detected_type == 'application/pdf' and repetitive_patterns:
-                    chunks = self.chunk_cleaner._aggressive_clean_chunks(chunks, repetitive_patterns)
-                else:
-                    chunks = self.chunk_cleaner.clean_chunks_by_type(chunks, detected_type, extraction_method)
-            elif is_ocr_content:
-                chunks = self.chunk_cleaner._minimal_clean_chunks(chunks)
+            chunks = self._clean_chunks(chunks, detected_type, extraction_method, repetitive_patterns)
             
             return {
                 "success": True,
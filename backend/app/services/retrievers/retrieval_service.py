@@ -1,110 +1,196 @@
 from app.services.vector_stores.base_vector_store import BaseVectorStore
 from app.providers.base import BaseLLMProvider
 from app.prompts.traditional_rag_prompt import TraditionalRagPrompt
-from typing import List, Dict, Optional
+from app.services.retrievers.semantic_answer_cache import semantic_answer_cache
+from app.config.settings import settings
+from pydantic import BaseModel
+from typing import Awaitable, Callable, Iterable, List, Dict, Optional, Tuple
 import asyncio
+import logging
 import time
 
+logger = logging.getLogger(__name__)
+
+class BatchAnswers(BaseModel):
+    """Structured output schema for answering several questions in one LLM call"""
+    answers: List[str]
+
+def _document_order(docs_with_scores: List[tuple]) -> List:
+    """Order retrieved chunks by their position in the document
+    
+    Prompts built from the same chunks then share an identical prefix whatever
+    the questions' retrieval ranking, which lets providers with prompt/prefix
+    caching (OpenAI, vLLM --enable-prefix-caching, Ollama) reuse it.
+    """
+    return [
+        doc for doc, _ in sorted(
+            docs_with_scores,
+            key=lambda pair: (pair[0].metadata.get("chunk_index", 0), pair[0].page_content[:32])
+        )
+    ]
+
+def _split_prompt(template: str) -> Tuple[str, str]:
+    """Split a prompt template around its {context} field
+    
+    Formatting with a placeholder resolves escaped braces once; each request
+    then only concatenates prefix + context + suffix.
+    """
+    prefix, _, suffix = template.format(context="\0").partition("\0")
+    return prefix, suffix
+
+def _build_prompt(prompt: Tuple[str, str], contents: Iterable[str]) -> str:
+    """Join chunk contents with blank lines between a split prompt's prefix and suffix
+    
+    The prompt is built in a single join, without a separate context string.
+    """
+    prefix, suffix = prompt
+    parts = [prefix]
+    for content in contents:
+        parts += (content, "\n\n")
+    if len(parts) > 1:
+        parts.pop()
+    parts.append(suffix)
+    return "".join(parts)
+
+def _debug_entry(question: str, answer: str, docs_with_scores: List[tuple], debug: bool) -> Dict:
+    """Per-question debug info; the retrieved chunks are only included when debug is set"""
+    entry = {
+        "question": question,
+        "answer": answer,
+        "chunks_count": len(docs_with_scores)
+    }
+    if debug:
+        entry["context_documents"] = [doc.page_content for doc, _ in docs_with_scores]
+        entry["context_with_scores"] = [
+            {"content": doc.page_content, "metadata": doc.metadata, "similarity_score": float(score)}
+            for doc, score in docs_with_scores
+        ]
+    return entry
+
 class RetrievalService:
     def __init__(self, vector_store: BaseVectorStore, llm_provider: BaseLLMProvider):
         self.vector_store = vector_store
         self.llm_provider = llm_provider
+        self._rag_prompt = _split_prompt(TraditionalRagPrompt.get_traditional_rag_prompt())
+        self._batch_rag_prompt = _split_prompt(TraditionalRagPrompt.get_batch_rag_prompt())
         
     async def process_document_queries(
         self, 
         document_id: str, 
         questions: List[str],
         namespace: Optional[str] = None,
-        k: int = 10
+        k: int = 10,
+        cache_scope: Optional[str] = None,
+        debug: bool = False
     ) -> Dict:
-        """Process multiple questions for a document with detailed debugging info (parallelized)"""
+        """Process multiple questions for a document (parallelized)
         
-        async def process_single_question(i: int, question: str) -> Dict:
-            """Process a single question and return the result"""
-            
+        Questions answered before for the same cache_scope (default: the
+        document_id) are served from the answer cache. With debug set, each
+        question's debug info also carries the retrieved chunks and scores.
+        """
+        return await self._with_answer_cache(
+            lambda pending, vectors: self._process_document_queries(document_id, pending, namespace, k, vectors, debug),
+            document_id, questions, namespace, k, cache_scope
+        )
+    
+    async def _with_answer_cache(
+        self,
+        compute: Callable[[List[str], Optional[List[List[float]]]], Awaitable[Dict]],
+        document_id: str,
+        questions: List[str],
+        namespace: Optional[str],
+        k: int,
+        cache_scope: Optional[str]
+    ) -> Dict:
+        """Serve cached answers and run compute(questions, vectors) for the rest
+        
+        vectors are the question embeddings when they were computed for the
+        near-duplicate lookup, so compute can search with them directly.
+        """
+        if not settings.ANSWER_CACHE_ENABLED:
+            return await compute(questions, None)
+        
+        scope = cache_scope or document_id
+        # Answers depend on the model that wrote them, not only on the retrieval
+        llm = f"{self.llm_provider.provider_name}/{getattr(self.llm_provider, 'model', '')}"
+        keys = [semantic_answer_cache.make_key(scope, question, k, namespace, llm) for question in questions]
+        results: Dict[int, Dict] = {}
+        for i, key in enumerate(keys):
+            cached = semantic_answer_cache.get(key)
+            if cached is not None:
+                results[i] = cached
+        
+        missing = [i for i in range(len(questions)) if i not in results]
+        vectors: Dict[int, List[float]] = {}
+        if missing and settings.SEMANTIC_CACHE_ENABLED:
             try:
-                if hasattr(self.vector_store, 'asimilarity_search_with_score'):
-                    docs_with_scores = await self.vector_store.asimilarity_search_with_score(
-                        query=question,
-                        k=k,
-                        filter={"document_id": document_id},
-                        namespace=namespace
-                    )
-                else:
-                    docs_with_scores = self.vector_store.similarity_search_with_score(
-                        query=question,
-                        k=k,
-                        filter={"document_id": document_id},
-                        namespace=namespace
-                    )
-                
-                if not docs_with_scores:
-                    result = {
-                        "answer": "No relevant information found in the document.",
-                        "debug_info": {
-                            "question": question,
-                            "answer": "No relevant information found in the document.",
-                            "context_with_scores": [],
-                            "chunks_count": 0
-                        }
-                    }
-                    return result
-                
-                llm = self.llm_provider.get_langchain_llm()
-                traditional_rag_prompt = TraditionalRagPrompt.get_traditional_rag_prompt()
-
-                context = "\n\n".join([doc.page_content for doc, _ in docs_with_scores])
-
-                prompt = traditional_rag_prompt.format(context=context)
-
-                answer = await asyncio.to_thread(
-                    lambda: llm.invoke([{"role": "system", "content": prompt}, {"role": "user", "content": question}]).content
-                )
-                
-                context_with_scores = []
-                for doc, score in docs_with_scores:
-                    context_with_scores.append({
-                        "content": doc.page_content,
-                        "metadata": doc.metadata,
-                        "similarity_score": float(score)
-                    })
-                
-                result = {
-                    "answer": answer,
-                    "debug_info": {
-                        "question": question,
-                        "answer": answer,
-                        "context_documents": [doc.page_content for doc, _ in docs_with_scores],
-                        "context_with_scores": context_with_scores,
-                        "chunks_count": len(docs_with_scores)
-                    }
-                }
-                
-                # print(f"✅ Answer: {answer}")
-                return result
-                
+                embedded = await self._embed_questions([questions[i] for i in missing])
             except Exception as e:
-                error_msg = f"Error processing question: {str(e)}"
-                result = {
-                    "answer": error_msg,
-                    "debug_info": {
-                        "question": question,
-                        "answer": error_msg,
-                        "chunks_count": 0,
-                        "error": str(e)
-                    }
-                }
-                print(f"Error: {error_msg}")
-                return result
+                logger.warning("Question embedding for the answer cache failed: %s", e)
+                embedded = None
+            
+            if embedded is not None:
+                for i, vector in zip(missing, embedded):
+                    vectors[i] = vector
+                    cached = semantic_answer_cache.get_similar(scope, vector, llm)
+                    if cached is not None:
+                        results[i] = {
+                            "answer": cached["answer"],
+                            "debug_info": {**cached["debug_info"], "question": questions[i], "cached_question": cached["debug_info"].get("question")}
+                        }
+                missing = [i for i in missing if i not in results]
+        
+        if len(missing) < len(questions):
+            logger.info("Answer cache: %d/%d questions served from cache", len(questions) - len(missing), len(questions))
+        
+        if missing:
+            computed = await compute(
+                [questions[i] for i in missing],
+                [vectors[i] for i in missing] if vectors else None
+            )
+            for j, i in enumerate(missing):
+                result = {"answer": computed["answers"][j], "debug_info": computed["debug_info"][j]}
+                results[i] = result
+                # Only cache real answers, not errors or empty retrievals
+                if result["debug_info"].get("chunks_count") and "error" not in result["debug_info"]:
+                    semantic_answer_cache.set(keys[i], scope, result, vectors.get(i), llm)
         
-        print(f"Processing {len(questions)} questions in parallel...")
+        return {
+            "answers": [results[i]["answer"] for i in range(len(questions))],
+            "debug_info": [results[i]["debug_info"] for i in range(len(questions))]
+        }
+    
+    async def _process_document_queries(
+        self,
+        document_id: str,
+        questions: List[str],
+        namespace: Optional[str],
+        k: int,
+        vectors: Optional[List[List[float]]] = None,
+        debug: bool = False
+    ) -> Dict:
+        """Answer each question with its own retrieval and LLM call, in parallel"""
+        
+        llm = self.llm_provider.get_langchain_llm()
+        logger.info("Processing %d questions in parallel", len(questions))
         start_time = time.time()
+        # Bounds concurrent LLM calls so large question sets do not trip provider rate limits
+        semaphore = asyncio.Semaphore(settings.QA_CONCURRENCY)
         
-        tasks = [process_single_question(i, question) for i, question in enumerate(questions)]
+        try:
+            search_results = await self._search_all(document_id, questions, namespace, k, vectors)
+        except Exception as e:
+            logger.warning("Batched retrieval failed, searching per question: %s", e)
+            search_results = [None] * len(questions)
+        
+        tasks = [
+            self._process_single_question(llm, semaphore, document_id, question, docs_with_scores, namespace, k, debug)
+            for question, docs_with_scores in zip(questions, search_results)
+        ]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        end_time = time.time()
-        print(f"Total processing time: {end_time - start_time:.2f} seconds")
+        logger.info("Total processing time: %.2f seconds", time.time() - start_time)
         
         answers = []
         debug_info = []
@@ -128,4 +214,168 @@ class RetrievalService:
             "debug_info": debug_info
         }
     
-    
\ No newline at end of file
+    async def _process_single_question(
+        self,
+        llm,
+        semaphore: asyncio.Semaphore,
+        document_id: str,
+        question: str,
+        docs_with_scores: Optional[List[tuple]],
+        namespace: Optional[str],
+        k: int,
+        debug: bool
+    ) -> Dict:
+        """Answer one question from its retrieved chunks, searching first if none were passed in"""
+        
+        try:
+            if docs_with_scores is None:
+                docs_with_scores = await self._search(document_id, question, namespace, k)
+            
+            if not docs_with_scores:
+                answer = "No relevant information found in the document."
+                return {"answer": answer, "debug_info": _debug_entry(question, answer, [], debug)}
+            
+            prompt = _build_prompt(self._rag_prompt, (doc.page_content for doc in _document_order(docs_with_scores)))
+            
+            async with semaphore:
+                response = await llm.ainvoke([{"role": "system", "content": prompt}, {"role": "user", "content": question}])
+            answer = response.content
+            
+            return {"answer": answer, "debug_info": _debug_entry(question, answer, docs_with_scores, debug)}
+            
+        except Exception as e:
+            error_msg = f"Error processing question: {str(e)}"
+            result = {
+                "answer": error_msg,
+                "debug_info": {
+                    "question": question,
+                    "answer": error_msg,
+                    "chunks_count": 0,
+                    "error": str(e)
+                }
+            }
+            return result
+    
+    async def _search(self, document_id: str, question: str, namespace: Optional[str], k: int):
+        """Run a filtered similarity search for a single question"""
+        return await self.vector_store.asimilarity_search_with_score(
+            query=question,
+            k=k,
+            filter={"document_id": document_id},
+            namespace=namespace
+        )
+    
+    async def _embed_questions(self, questions: List[str]) -> Optional[List[List[float]]]:
+        """Embed questions with the vector store's embedder in one call; None if the store has none"""
+        embeddings = getattr(self.vector_store, 'embeddings', None)
+        if embeddings is None:
+            return None
+        if hasattr(embeddings, 'aembed_queries'):
+            return await embeddings.aembed_queries(questions)
+        return await embeddings.aembed_documents(questions)
+    
+    async def _search_all(
+        self,
+        document_id: str,
+        questions: List[str],
+        namespace: Optional[str],
+        k: int,
+        vectors: Optional[List[List[float]]] = None
+    ):
+        """Run the similarity searches for all questions
+        
+        Stores that accept precomputed query vectors get one embedding call for
+        all questions (skipped if vectors are passed in) and one batched
+        search; others use the store's batch search.
+        """
+        if hasattr(self.vector_store, 'asimilarity_search_by_vectors') and hasattr(self.vector_store, 'embeddings'):
+            if vectors is None:
+                vectors = await self._embed_questions(questions)
+            return await self.vector_store.asimilarity_search_by_vectors(
+                vectors,
+                k=k,
+                filter={"document_id": document_id},
+                namespace=namespace
+            )
+        
+        return await self.vector_store.asimilarity_search_batch(
+            questions,
+            k=k,
+            filter={"document_id": document_id},
+            namespace=namespace
+        )
+    
+    async def answer_batch(
+        self,
+        document_id: str,
+        questions: List[str],
+        namespace: Optional[str] = None,
+        k: int = 10,
+        cache_scope: Optional[str] = None,
+        debug: bool = False
+    ) -> Dict:
+        """Answer all questions for a document with a single structured-output LLM call
+        
+        Retrieval still runs per question (in parallel); the retrieved chunks are
+        deduplicated into one shared context. Returns the same shape as
+        process_document_queries, and falls back to it if the batched call fails
+        or does not return one answer per question. Cached questions are
+        answered from the answer cache and left out of the call.
+        """
+        return await self._with_answer_cache(
+            lambda pending, vectors: self._answer_batch(document_id, pending, namespace, k, vectors, debug),
+            document_id, questions, namespace, k, cache_scope
+        )
+    
+    async def _answer_batch(
+        self,
+        document_id: str,
+        questions: List[str],
+        namespace: Optional[str],
+        k: int,
+        vectors: Optional[List[List[float]]] = None,
+        debug: bool = False
+    ) -> Dict:
+        """Uncached body of answer_batch"""
+        if len(questions) <= 1:
+            return await self._process_document_queries(document_id, questions, namespace, k, vectors, debug)
+        
+        logger.info("Answering %d questions in one batched call", len(questions))
+        start_time = time.time()
+        
+        try:
+            search_results = await self._search_all(document_id, questions, namespace, k, vectors)
+            
+            # Shared context: each chunk once, in document order
+            unique_chunks = list(dict.fromkeys(
+                doc.page_content
+                for doc in _document_order([pair for docs_with_scores in search_results for pair in docs_with_scores])
+            ))
+            if not unique_chunks:
+                return await self._process_document_queries(document_id, questions, namespace, k, vectors, debug)
+            
+            prompt = _build_prompt(self._batch_rag_prompt, unique_chunks)
+            user_message = "\n\n".join(
+                f"<QUESTION {i}>\n{question}\n</QUESTION {i}>"
+                for i, question in enumerate(questions, start=1)
+            )
+            
+            llm = self.llm_provider.get_langchain_llm().with_structured_output(BatchAnswers)
+            result = await llm.ainvoke([{"role": "system", "content": prompt}, {"role": "user", "content": user_message}])
+            
+            if result is None or len(result.answers) != len(questions):
+                raise ValueError(f"expected {len(questions)} answers, got {0 if result is None else len(result.answers)}")
+            
+        except Exception as e:
+            logger.warning("Batched answering failed, falling back to per-question calls: %s", e)
+            return await self._process_document_queries(document_id, questions, namespace, k, vectors, debug)
+        
+        logger.info("Total processing time: %.2f seconds", time.time() - start_time)
+        
+        return {
+            "answers": result.answers,
+            "debug_info": [
+                _debug_entry(question, answer, docs_with_scores, debug)
+                for question, answer, docs_with_scores in zip(questions, result.answers, search_results)
+            ]
+        }
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """Two-tier cache of per-question RAG results
+
+    Exact hits are keyed on (scope, question, k, namespace, llm), where llm
+    names the provider and model that wrote the answer. Near-duplicate
+    questions are found with random-projection LSH over the question
+    embeddings: num_tables hash tables of num_bits hyperplanes each, with a
+    candidate accepted only if its cosine similarity reaches threshold.
+    Entries are grouped by scope (normally the document cache key) and llm, so
+    a hit is only possible against the same document and model. Stored
+    embeddings are int8 with a per-vector scale, a quarter of the float32 size.
+
+    Given a path, entries are also written to a SQLite database (WAL mode) and
+    the most recent maxsize of them are loaded back on startup, so cached
+    answers survive a restart. Writes are queued to a background thread, so
+    callers on the event loop never wait on the disk.
+    """
+
+    def __init__(self, maxsize: int = 1024, threshold: float = 0.95, num_tables: int = 8, num_bits: int = 12, seed: int = 0,
+                 path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.num_tables = num_tables
+        self.num_bits = num_bits
+        self._rng = np.random.default_rng(seed)
+        self._planes: Optional[np.ndarray] = None
+        self._powers = 1 << np.arange(num_bits)
+
+        self._exact: "OrderedDict[str, Tuple[str, Dict]]" = OrderedDict()
+        # entry id -> (scope, int8 unit vector, scale, result, bucket keys)
+        self._entries: "OrderedDict[int, Tuple[str, np.ndarray, float, Dict, List[tuple]]]" = OrderedDict()
+        self._buckets: Dict[tuple, Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        # (statement, params) pairs, applied in order by the writer thread
+        self._write_queue: "queue.Queue[Tuple[str, tuple]]" = queue.Queue()
+        if path:
+            self._open_db(path)
+
+    def _open_db(self, path: str):
+        """Open the persistent store and load its most recent entries"""
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, scope TEXT NOT NULL, result TEXT NOT NULL, vector BLOB, scale REAL, "
+                "llm TEXT NOT NULL DEFAULT '')"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(answers)")}
+            if "llm" not in columns:
+                self._db.execute("ALTER TABLE answers ADD COLUMN llm TEXT NOT NULL DEFAULT ''")
+            self._db.execute("CREATE INDEX IF NOT EXISTS answers_scope ON answers (scope)")
+            self._db.commit()
+
+            rows = self._db.execute(
+                "SELECT key, scope, result, vector, scale, llm FROM answers ORDER BY rowid DESC LIMIT ?", (self.maxsize,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Answer cache database unavailable, caching in memory only: %s", e)
+            self._db = None
+            return
+
+        for key, scope, result, vector, scale, llm in reversed(rows):
+            result = json.loads(result)
+            self._exact[key] = (scope, result)
+            if vector is not None:
+                self._insert_vector(scope, np.frombuffer(vector, dtype=np.int8) * np.float32(scale), result, llm)
+        logger.info("Loaded %d cached answers from %s", len(rows), path)
+
+        threading.Thread(target=self._write_loop, name="answer-cache-writer", daemon=True).start()
+
+    def _write_loop(self):
+        """Apply queued writes, committing once per drained batch"""
+        while True:
+            statements = [self._write_queue.get()]
+            while True:
+                try:
+                    statements.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                for statement, params in statements:
+                    self._db.execute(statement, params)
+                    if statement.startswith("INSERT"):
+                        self._writes += 1
+                        if self._writes % 64 == 0:
+                            self._db.execute(
+                                "DELETE FROM answers WHERE rowid NOT IN (SELECT rowid FROM answers ORDER BY rowid DESC LIMIT ?)",
+                                (self.maxsize,)
+                            )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning("Answer cache write failed: %s", e)
+                self._db.rollback()
+
+    @staticmethod
+    def make_key(scope: str, question: str, k: int, namespace: Optional[str], llm: str) -> str:
+        """Build the exact-match key for a question against a document, answered by llm"""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (scope, question, str(k), namespace or "", llm):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _bucket_keys(self, scope: str, llm: str, vector: np.ndarray) -> List[tuple]:
+        """LSH bucket of the vector in every table"""
+        if self._planes is None or self._planes.shape[1] != vector.shape[0]:
+            self._planes = self._rng.standard_normal((self.num_tables * self.num_bits, vector.shape[0])).astype(np.float32)
+            self._buckets.clear()
+            self._entries.clear()
+
+        bits = (self._planes @ vector > 0).reshape(self.num_tables, self.num_bits)
+        codes = bits @ self._powers
+        return [(scope, llm, table, int(code)) for table, code in enumerate(codes)]
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    @staticmethod
+    def _quantize(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+        """int8 copy of the vector and the scale that maps it back"""
+        scale = max(float(np.abs(vector).max()), 1e-12) / 127.0
+        return np.round(vector / scale).astype(np.int8), scale
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result for an exact key, or None"""
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is None:
+                return None
+            self._exact.move_to_end(key)
+            return entry[1]
+
+    def get_similar(self, scope: str, vector, llm: str = "") -> Optional[Dict]:
+        """Return the cached result of the most similar earlier question, if it is similar enough"""
+        vector = self._normalize(vector)
+
+        with self._lock:
+            candidates: Set[int] = set()
+            for bucket in self._bucket_keys(scope, llm, vector):
+                candidates |= self._buckets.get(bucket, set())
+
+            best_id, best_score = None, self.threshold
+            for entry_id in candidates:
+                _, quantized, scale, _, _ = self._entries[entry_id]
+                score = float(quantized @ vector) * scale
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                return None
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id][3]
+
+    def set(self, key: str, scope: str, result: Dict, vector=None, llm: str = ""):
+        """Store a result under its exact key and, given its question embedding, in the LSH tables"""
+        with self._lock:
+            self._exact[key] = (scope, result)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.maxsize:
+                self._exact.popitem(last=False)
+
+            entry = None
+            if vector is not None:
+                entry = self._insert_vector(scope, vector, result, llm)
+
+            if self._db is not None:
+                # Queued under the lock so writes reach the database in the
+                # same order as clears
+                self._persist(key, scope, result, entry, llm)
+
+    def _insert_vector(self, scope: str, vector, result: Dict, llm: str = "") -> Tuple[np.ndarray, float]:
+        """Add a result to the LSH tables; returns the stored int8 vector and scale"""
+        vector = self._normalize(vector)
+        buckets = self._bucket_keys(scope, llm, vector)
+        entry_id = self._next_id
+        self._next_id += 1
+        quantized, scale = self._quantize(vector)
+        self._entries[entry_id] = (scope, quantized, scale, result, buckets)
+        for bucket in buckets:
+            self._buckets.setdefault(bucket, set()).add(entry_id)
+
+        while len(self._entries) > self.maxsize:
+            self._evict(next(iter(self._entries)))
+        return quantized, scale
+
+    def _persist(self, key: str, scope: str, result: Dict, entry: Optional[Tuple[np.ndarray, float]], llm: str):
+        """Queue an entry to be written to the database"""
+        vector, scale = (entry[0].tobytes(), entry[1]) if entry is not None else (None, None)
+        self._write_queue.put((
+            "INSERT OR REPLACE INTO answers (key, scope, result, vector, scale, llm) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, scope, json.dumps(result, default=str), vector, scale, llm)
+        ))
+
+    def _evict(self, entry_id: int):
+        _, _, _, _, buckets = self._entries.pop(entry_id)
+        for bucket in buckets:
+            members = self._buckets.get(bucket)
+            if members is not None:
+                members.discard(entry_id)
+                if not members:
+                    del self._buckets[bucket]
+
+    def clear(self, scope: Optional[str] = None):
+        """Drop cached results for one scope, or everything"""
+        with self._lock:
+            if scope is None:
+                self._exact.clear()
+                self._entries.clear()
+                self._buckets.clear()
+                self._delete_rows("DELETE FROM answers", ())
+                return
+
+            for key in [key for key, (entry_scope, _) in self._exact.items() if entry_scope == scope]:
+                del self._exact[key]
+            for entry_id in [entry_id for entry_id, entry in self._entries.items() if entry[0] == scope]:
+                self._evict(entry_id)
+            self._delete_rows("DELETE FROM answers WHERE scope = ?", (scope,))
+
+    def _delete_rows(self, statement: str, params: tuple):
+        if self._db is not None:
+            self._write_queue.put((statement, params))
+
+semantic_answer_cache = SemanticAnswerCache(
+    maxsize=settings.ANSWER_CACHE_SIZE,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    path=settings.SEMANTIC_CACHE_PATH
+)
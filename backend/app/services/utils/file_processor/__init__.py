@@ -2,5 +2,6 @@
 from .custom_pptx_loader import CustomPptxLoader, load_pptx_with_options
 from .chunk_cleaner import ChunkCleaner
 from .document_splitter import DocumentSplitter
+from .ocr import binarize, image_to_text
 
-__all__ = ['CustomPptxLoader', 'load_pptx_with_options', 'ChunkCleaner', 'DocumentSplitter']
+__all__ = ['CustomPptxLoader', 'load_pptx_with_options', 'ChunkCleaner', 'DocumentSplitter', 'binarize', 'image_to_text']
@@ -1,7 +1,61 @@
+import logging
 import re
-from typing import List
+from typing import Collection, List
 from collections import Counter
-import unicodedata
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Compiled once at import; used for every line of every document.
+# Header/footer heuristics in one pass: page numbers, "X of Y", company
+# suffixes, policy/document identifiers and long numbers (IDs, postal codes)
+_PAT_REPETITIVE = re.compile(r'page \d+|\d+ of \d+|(?:ltd|inc|corp)\.?$|uin:|policy|premises|plot|\d{6,}', re.I)
+
+# Deletion tables for the "mostly numbers and punctuation" line check
+# (\s matches all Unicode whitespace, so the tables do too)
+_NOISE_CHARS = '0123456789-.,/' + ''.join(chr(c) for c in range(0x3001) if chr(c).isspace())
+_DEL_NUMERIC_NOISE = str.maketrans('', '', _NOISE_CHARS)
+_DEL_NUMERIC_NOISE_INTL = str.maketrans('', '', _NOISE_CHARS + '()')
+_PAT_WHITESPACE = re.compile(r'\s+')
+
+# Script classification by Unicode block. Class ids index _SCRIPT_NAMES;
+# _SKIP marks whitespace, ASCII digits and common punctuation, which are not counted
+_SCRIPT_NAMES = ("latin", "indic", "arabic", "cjk", "other")
+_LATIN, _INDIC, _ARABIC, _CJK, _OTHER, _SKIP = range(6)
+
+_BLOCKS = (
+    (0x0000, _OTHER),   # ASCII is classified by _ASCII_CLASS
+    (0x00C0, _LATIN), (0x00D7, _OTHER), (0x00D8, _LATIN), (0x00F7, _OTHER), (0x00F8, _LATIN),
+    (0x02B0, _OTHER),
+    (0x0600, _ARABIC), (0x0700, _OTHER),
+    (0x0750, _ARABIC), (0x0780, _OTHER),
+    (0x08A0, _ARABIC),
+    (0x0900, _INDIC),   # Devanagari, Bengali, Gurmukhi, Gujarati, Oriya, Tamil, Telugu, Kannada, Malayalam
+    (0x0D80, _OTHER),
+    (0x1E00, _LATIN), (0x1F00, _OTHER),
+    (0x2C60, _LATIN), (0x2C80, _OTHER),
+    (0x3040, _CJK), (0x3100, _OTHER),   # Hiragana, Katakana
+    (0x3400, _CJK), (0x4DC0, _OTHER),
+    (0x4E00, _CJK), (0xA000, _OTHER),
+    (0xA720, _LATIN), (0xA800, _OTHER),
+    (0xA8E0, _INDIC), (0xA900, _OTHER),
+    (0xF900, _CJK), (0xFB00, _OTHER),
+    (0xFB50, _ARABIC), (0xFE00, _OTHER),
+    (0xFE70, _ARABIC), (0xFF00, _OTHER),
+    (0x20000, _CJK), (0x30000, _OTHER),
+)
+_BLOCK_STARTS = np.array([start for start, _ in _BLOCKS], dtype=np.uint32)
+_BLOCK_CLASS = np.array([cls for _, cls in _BLOCKS], dtype=np.uint8)
+
+_ASCII_CLASS = np.full(128, _OTHER, dtype=np.uint8)
+for _c in range(128):
+    _ch = chr(_c)
+    if _ch.isalpha():
+        _ASCII_CLASS[_c] = _LATIN
+    elif _ch.isspace() or _ch.isdigit() or _ch in ".,!?-()[]{}":
+        _ASCII_CLASS[_c] = _SKIP
+
+_UNICODE_SPACES = np.array([c for c in range(128, 0x3001) if chr(c).isspace()], dtype=np.uint32)
 
 class ChunkCleaner:
     """Handles chunk cleaning and processing for different file types"""
@@ -11,49 +65,24 @@ class ChunkCleaner:
     
     def _detect_script_type(self, text: str) -> str:
         """Detect the primary script type of the text"""
-        if not text:
+        # Most documents are plain English; "other" and "latin" are cleaned alike,
+        # so ASCII-only text needs no classification
+        if not text or text.isascii():
             return "latin"
         
-        script_counts = {}
-        for char in text:
-            if char.isspace() or char.isdigit() or char in ".,!?-()[]{}":
-                continue
-            
-            script = unicodedata.name(char, "").split()[0] if unicodedata.name(char, "") else "UNKNOWN"
-            
-            if script.startswith("LATIN"):
-                script_type = "latin"
-            elif script.startswith("DEVANAGARI"):
-                script_type = "indic"
-            elif script.startswith("MALAYALAM"):
-                script_type = "indic"
-            elif script.startswith("TAMIL"):
-                script_type = "indic"
-            elif script.startswith("BENGALI"):
-                script_type = "indic"
-            elif script.startswith("GUJARATI"):
-                script_type = "indic"
-            elif script.startswith("GURMUKHI"):
-                script_type = "indic"
-            elif script.startswith("KANNADA"):
-                script_type = "indic"
-            elif script.startswith("TELUGU"):
-                script_type = "indic"
-            elif script.startswith("ORIYA"):
-                script_type = "indic"
-            elif script.startswith("ARABIC"):
-                script_type = "arabic"
-            elif script.startswith("CJK") or script.startswith("HIRAGANA") or script.startswith("KATAKANA"):
-                script_type = "cjk"
-            else:
-                script_type = "other"
-            
-            script_counts[script_type] = script_counts.get(script_type, 0) + 1
+        # Lone surrogates (e.g. from broken PDF text layers) can't be encoded strictly
+        codepoints = np.frombuffer(text.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+        classes = _BLOCK_CLASS[np.searchsorted(_BLOCK_STARTS, codepoints, side="right") - 1]
         
-        if not script_counts:
+        ascii_mask = codepoints < 128
+        classes[ascii_mask] = _ASCII_CLASS[codepoints[ascii_mask]]
+        classes[np.isin(codepoints, _UNICODE_SPACES)] = _SKIP
+        
+        counts = np.bincount(classes, minlength=len(_SCRIPT_NAMES) + 1)[:len(_SCRIPT_NAMES)]
+        if not counts.any():
             return "latin"
         
-        return max(script_counts, key=script_counts.get)
+        return _SCRIPT_NAMES[int(np.argmax(counts))]
     
     def clean_chunks_by_type(self, chunks: List, file_type: str, extraction_method: str = None) -> List:
         """Clean chunks based on file type and extraction method"""
@@ -80,7 +109,7 @@ class ChunkCleaner:
                 
             processed_chunks.append(chunk)
         
-        print(f"Minimal cleaning (OCR): {len(chunks)} chunks → {len(processed_chunks)} clean chunks")
+        logger.debug("Minimal cleaning (OCR): %d chunks → %d clean chunks", len(chunks), len(processed_chunks))
         return processed_chunks
     
     def _basic_clean_chunks(self, chunks: List, extraction_method: str = None) -> List:
@@ -119,14 +148,14 @@ class ChunkCleaner:
                 
             processed_chunks.append(chunk)
         
-        print(f"Basic cleaning ({script_type} script): {len(chunks)} chunks → {len(processed_chunks)} clean chunks")
+        logger.debug("Basic cleaning (%s script): %d chunks → %d clean chunks", script_type, len(chunks), len(processed_chunks))
         return processed_chunks
     
     def _aggressive_clean_chunks(self, chunks: List, repetitive_patterns: List[str] = None) -> List:
         """Aggressive cleaning for PDF documents with pattern removal"""
         
-        if repetitive_patterns is None:
-            repetitive_patterns = []
+        # Lines are checked against the patterns one by one, so look them up in a set
+        repetitive_patterns = frozenset(repetitive_patterns or ())
         
         processed_chunks = []
         
@@ -150,31 +179,32 @@ class ChunkCleaner:
             chunk.page_content = cleaned_content
             processed_chunks.append(chunk)
         
-        print(f"Aggressive cleaning (PDF): {len(chunks)} chunks → {len(processed_chunks)} clean chunks")
+        logger.debug("Aggressive cleaning (PDF): %d chunks → %d clean chunks", len(chunks), len(processed_chunks))
         return processed_chunks
     
     def detect_repetitive_patterns(self, documents: List) -> List[str]:
         """Detect repetitive patterns across document pages that are likely headers/footers"""
         
-        total_content = ' '.join([doc.page_content for doc in documents])
-        total_length = len(total_content)
+        if not documents:
+            return []
+        
+        # Length and script are taken without joining the pages; the script
+        # is detected on a sample from the first and last page
+        total_length = sum(len(doc.page_content) for doc in documents)
         
-        script_type = self._detect_script_type(total_content)
+        script_type = self._detect_script_type(documents[0].page_content[:4096] + documents[-1].page_content[:4096])
         
         if script_type in ["indic", "cjk", "arabic"] or total_length < 400:
-            print(f"Skipping repetitive pattern detection for {script_type} script or short document ({total_length} chars)")
+            logger.debug("Skipping repetitive pattern detection for %s script or short document (%d chars)", script_type, total_length)
             return []
         
         if total_length < 200:
-            print(f"Document too short ({total_length} chars) - skipping pattern detection")
+            logger.debug("Document too short (%d chars) - skipping pattern detection", total_length)
             return []
         
-        all_lines = []
+        line_counter = Counter()
         for doc in documents:
-            lines = [line.strip() for line in doc.page_content.split('\n') if line.strip()]
-            all_lines.extend(lines)
-        
-        line_counter = Counter(all_lines)
+            line_counter.update(line for line in map(str.strip, doc.page_content.split('\n')) if line)
         
         total_pages = len(documents)
         repetitive_patterns = []
@@ -184,21 +214,17 @@ class ChunkCleaner:
                 if (
                     len(line) < 100 and 
                     (
-                        re.search(r'page \d+', line.lower()) or  # Page numbers
-                        re.search(r'\d+ of \d+', line) or  # Page X of Y
-                        re.search(r'ltd\.?$|inc\.?$|corp\.?$', line.lower()) or  # Company suffixes
-                        re.search(r'uin:|policy|premises|plot', line.lower()) or  # Policy/document identifiers
-                        re.search(r'\d{6,}', line) or  # Long numbers (IDs, postal codes)
+                        _PAT_REPETITIVE.search(line) or  # Page numbers, identifiers, company suffixes
                         line.count('-') > 2 or  # Dashes (addresses, IDs)
                         len(line.split()) <= 3  # Very short lines
                     )
                 ):
                     repetitive_patterns.append(line)
         
-        print(f"Detected {len(repetitive_patterns)} repetitive patterns to remove")
+        logger.debug("Detected %d repetitive patterns to remove", len(repetitive_patterns))
         return repetitive_patterns
     
-    def _clean_document_content(self, content: str, repetitive_patterns: List[str]) -> str:
+    def _clean_document_content(self, content: str, repetitive_patterns: Collection[str]) -> str:
         """Clean document content by removing repetitive patterns and noise"""
         
         lines = content.split('\n')
@@ -229,16 +255,16 @@ class ChunkCleaner:
             
             if script_type == "indic" or script_type == "cjk" or script_type == "arabic":
 
-                non_numeric_chars = re.sub(r'[0-9\-\.\,\s\/\(\)]+', '', line)
+                non_numeric_chars = line.translate(_DEL_NUMERIC_NOISE_INTL)
                 if len(non_numeric_chars) < 2: 
                     continue
             else:
-                if len(re.sub(r'[0-9\-\.\,\s\/]', '', line)) < 5:
+                if len(line.translate(_DEL_NUMERIC_NOISE)) < 5:
                     continue
             
             cleaned_lines.append(line)
         
         cleaned_content = ' '.join(cleaned_lines)
-        cleaned_content = re.sub(r'\s+', ' ', cleaned_content)
+        cleaned_content = _PAT_WHITESPACE.sub(' ', cleaned_content)
         
         return cleaned_content.strip()
@@ -1,23 +1,88 @@
+import logging
 import os
 import tempfile
+import threading
 import io
-from typing import List, Optional, Literal
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Literal, Union
 from langchain_core.documents import Document
 from langchain_markitdown import PptxLoader as BasePptxLoader
 from PIL import Image
-import pytesseract
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
-import cv2
 import numpy as np
 import easyocr
+from .ocr import image_to_text
+
+
+logger = logging.getLogger(__name__)
+
+# EasyOCR readers load their detection and recognition models onto the GPU,
+# so one reader per (languages, gpu) is shared by every loader
+_easyocr_readers = {}
+_easyocr_lock = threading.Lock()
+
+
+def _get_easyocr_reader(languages: tuple = ('en',), gpu: bool = True) -> "easyocr.Reader":
+    """Return the shared EasyOCR reader for these languages, creating it on first use"""
+    key = (tuple(languages), gpu)
+    with _easyocr_lock:
+        reader = _easyocr_readers.get(key)
+        if reader is None:
+            logger.info("Initializing EasyOCR reader")
+            reader = easyocr.Reader(list(languages), gpu=gpu)
+            _easyocr_readers[key] = reader
+            logger.info("EasyOCR reader initialized")
+        return reader
+
+
+def _decode_image(blob: bytes) -> Image.Image:
+    """Decode an embedded picture to an RGB PIL image"""
+    with Image.open(io.BytesIO(blob)) as image:
+        return image.convert("RGB")
+
+
+def _iter_shapes(shapes):
+    """Yield every shape, descending into group shapes"""
+    for shape in shapes:
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            yield from _iter_shapes(shape.shapes)
+        else:
+            yield shape
+
+
+def _shape_text(shape) -> str:
+    """Text of a shape's text frame, or of its table cells row by row"""
+    if shape.has_text_frame:
+        return shape.text_frame.text.strip()
+    if getattr(shape, 'has_table', False):
+        rows = (
+            ' | '.join(cell.text.strip() for cell in row.cells)
+            for row in shape.table.rows
+        )
+        return '\n'.join(row for row in rows if row.strip(' |'))
+    return ''
+
+
+def _normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace, for comparing OCR and slide text"""
+    return ' '.join(text.lower().split())
+
+
 class CustomPptxLoader:
     """
     Custom PPTX loader that can extract text using standard text extraction
     or OCR from slide images.
     """
     
-    def __init__(self, file_path: str, use_ocr: bool = False, ocr_engine: Literal["pytesseract", "easyocr"] = "easyocr"):
+    def __init__(
+        self,
+        file_path: str,
+        use_ocr: bool = False,
+        ocr_engine: Literal["pytesseract", "easyocr"] = "easyocr",
+        ocr_batch_size: int = 8,
+        combine_with_standard: bool = True
+    ):
         """
         Initialize the custom PPTX loader.
         
@@ -25,16 +90,18 @@ class CustomPptxLoader:
             file_path (str): Path to the PPTX file
             use_ocr (bool): Whether to use OCR for text extraction
             ocr_engine (str): OCR engine to use ("pytesseract" or "easyocr")
+            ocr_batch_size (int): Images per EasyOCR recognition batch
+            combine_with_standard (bool): In OCR mode, also return each slide's own text
         """
         self.file_path = file_path
         self.use_ocr = use_ocr
         self.ocr_engine = ocr_engine
+        self.ocr_batch_size = ocr_batch_size
+        self.combine_with_standard = combine_with_standard
         
         self._easyocr_reader = None
         if self.use_ocr and self.ocr_engine == "easyocr":
-            print("Initializing EasyOCR reader...")
-            self._easyocr_reader = easyocr.Reader(['en'], gpu=True) 
-            print("EasyOCR reader initialized")
+            self._easyocr_reader = _get_easyocr_reader(('en',), gpu=True)
     
     def load(self) -> List[Document]:
         """
@@ -82,7 +149,8 @@ class CustomPptxLoader:
             print("Loading PPTX presentation and extracting images...")
             prs = Presentation(self.file_path)
             
-            images_with_metadata = self._extract_images_from_pptx(prs)
+            slide_texts = {}
+            images_with_metadata = self._extract_images_from_pptx(prs, slide_texts)
             
             if not images_with_metadata:
                 print("⚠️ No images found in presentation, falling back to standard text extraction")
@@ -90,13 +158,22 @@ class CustomPptxLoader:
             
             print(f"🔍 Found {len(images_with_metadata)} images, extracting text using {self.ocr_engine.upper()}...")
             
-            for img_data in images_with_metadata:
+            standard_texts = {slide_num: _normalize_text(text) for slide_num, text in slide_texts.items()} if self.combine_with_standard else {}
+            
+            ocr_results = self._extract_text_from_images([img_data['image'] for img_data in images_with_metadata])
+            
+            for img_data, ocr_result in zip(images_with_metadata, ocr_results):
                 try:
-                    image = img_data['image']
                     slide_num = img_data['slide_number']
                     image_index = img_data['image_index']
                     
-                    text = self._extract_text_from_image(image)
+                    if isinstance(ocr_result, Exception):
+                        raise ocr_result
+                    text = ocr_result
+                    
+                    if text.strip() and _normalize_text(text) in standard_texts.get(slide_num, ""):
+                        # Already present in the slide's own text
+                        continue
                     
                     if text.strip():
                         doc = Document(
@@ -125,7 +202,7 @@ class CustomPptxLoader:
                         documents.append(doc)
                         
                 except Exception as e:
-                    print(f"⚠️ Failed to extract text from slide {slide_num}, image {image_index}: {str(e)}")
+                    logger.warning("Failed to extract text from slide %s, image %s: %s", slide_num, image_index, e)
                     doc = Document(
                         page_content=f"[Slide {slide_num}, Image {image_index} - Error extracting text: {str(e)}]",
                         metadata={
@@ -139,17 +216,22 @@ class CustomPptxLoader:
                     )
                     documents.append(doc)
             
-            if not documents:
+            if not documents and not (self.combine_with_standard and slide_texts):
                 print("No text could be extracted from images, falling back to standard text extraction")
                 return self._load_standard()
             
-            try:
-                standard_docs = self._load_standard()
-                for doc in standard_docs:
-                    doc.metadata['extraction_method'] = 'standard_combined'
-                documents.extend(standard_docs)
-            except Exception as e:
-                print(f"Could not extract standard text: {str(e)}")
+            if self.combine_with_standard:
+                # Slide text was collected from the already-parsed presentation
+                for slide_num, text in sorted(slide_texts.items()):
+                    documents.append(Document(
+                        page_content=text,
+                        metadata={
+                            'source': self.file_path,
+                            'slide_number': slide_num,
+                            'extraction_method': 'standard_combined',
+                            'file_type': 'pptx'
+                        }
+                    ))
             
             print(f"Successfully extracted text from {len([d for d in documents if not d.metadata.get('no_text') and not d.metadata.get('error')])} sources")
             
@@ -170,7 +252,7 @@ class CustomPptxLoader:
         """
         try:
             if self.ocr_engine == "pytesseract":
-                return pytesseract.image_to_string(image, config='--psm 6')
+                return image_to_text(image, config='--psm 6')
             elif self.ocr_engine == "easyocr":
                 if self._easyocr_reader is None:
                     raise RuntimeError("EasyOCR reader not initialized")
@@ -191,45 +273,108 @@ class CustomPptxLoader:
         except Exception as e:
             raise Exception(f"Failed to extract text using {self.ocr_engine}: {str(e)}")
     
-    def _extract_images_from_pptx(self, prs: Presentation) -> List[dict]:
+    def _extract_text_from_images(self, images: List[Image.Image]) -> List[Union[str, Exception]]:
+        """
+        Extract text from several images, batching EasyOCR calls on the GPU.
+        
+        EasyOCR can only batch images of the same size, so images are grouped
+        by shape; a group whose batched call fails is retried image by image.
+        
+        Args:
+            images (List[Image.Image]): PIL Image objects
+            
+        Returns:
+            List[Union[str, Exception]]: Extracted text, or the error, for each image in order
+        """
+        results: List[Union[str, Exception]] = [None] * len(images)
+        
+        if self.ocr_engine == "easyocr" and self._easyocr_reader is not None:
+            groups = {}
+            arrays = []
+            for i, image in enumerate(images):
+                image_np = np.asarray(image.convert("RGB"))
+                arrays.append(image_np)
+                groups.setdefault(image_np.shape, []).append(i)
+            
+            for indices in groups.values():
+                if len(indices) < 2:
+                    continue
+                try:
+                    batch_results = self._easyocr_reader.readtext_batched(
+                        [arrays[i] for i in indices], detail=0, batch_size=self.ocr_batch_size
+                    )
+                except Exception as e:
+                    logger.warning("Batched OCR failed for %d images, retrying one by one: %s", len(indices), e)
+                    continue
+                for i, texts in zip(indices, batch_results):
+                    results[i] = ' '.join(texts)
+        
+        for i, image in enumerate(images):
+            if results[i] is None:
+                try:
+                    results[i] = self._extract_text_from_image(image)
+                except Exception as e:
+                    results[i] = e
+        
+        return results
+    
+    def _extract_images_from_pptx(self, prs: Presentation, slide_texts: Optional[dict] = None) -> List[dict]:
         """
         Extract all images from the PowerPoint presentation.
         
         Args:
             prs (Presentation): The PowerPoint presentation object
+            slide_texts (dict, optional): If given, filled with the text of each slide's
+                                          text frames, tables (including those inside
+                                          groups) and notes, keyed by slide number
             
         Returns:
             List[dict]: List of dictionaries containing image data and metadata
         """
-        images_data = []
-        
+        blobs = []
         for slide_idx, slide in enumerate(prs.slides, 1):
-            image_idx = 0
-            for shape in slide.shapes:
+            texts = []
+            for shape in _iter_shapes(slide.shapes):
+                if slide_texts is not None:
+                    text = _shape_text(shape)
+                    if text:
+                        texts.append(text)
                 if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
                     try:
-                        image = shape.image
-                        image_bytes = image.blob
-                        
-                        nparr = np.frombuffer(image_bytes, np.uint8)
-                        cv_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                        
-                        rgb_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
-                        
-                        pil_image = Image.fromarray(rgb_image)
-                        
-                        images_data.append({
-                            'image': pil_image,
-                            'slide_number': slide_idx,
-                            'image_index': image_idx,
-                            'shape': shape
-                        })
-                        
-                        image_idx += 1
-                        
+                        blobs.append((slide_idx, shape, shape.image.blob))
                     except Exception as e:
-                        print(f"Failed to extract image from slide {slide_idx}: {str(e)}")
-                        continue
+                        logger.warning("Failed to extract image from slide %d: %s", slide_idx, e)
+            if slide_texts is not None and slide.has_notes_slide:
+                notes = slide.notes_slide.notes_text_frame
+                if notes is not None and notes.text.strip():
+                    texts.append(notes.text.strip())
+            if texts:
+                slide_texts[slide_idx] = '\n'.join(texts)
+        
+        if not blobs:
+            return []
+        
+        # Decoding releases the GIL, so images are decoded concurrently; results keep slide order
+        with ThreadPoolExecutor(max_workers=min(len(blobs), os.cpu_count() or 1)) as executor:
+            futures = [executor.submit(_decode_image, blob) for _, _, blob in blobs]
+        
+        images_data = []
+        image_counts = {}
+        for (slide_idx, shape, _), future in zip(blobs, futures):
+            try:
+                pil_image = future.result()
+            except Exception as e:
+                logger.warning("Failed to extract image from slide %d: %s", slide_idx, e)
+                continue
+            
+            image_idx = image_counts.get(slide_idx, 0)
+            image_counts[slide_idx] = image_idx + 1
+            images_data.append({
+                'image': pil_image,
+                'slide_number': slide_idx,
+                'image_index': image_idx,
+                'shape': shape
+            })
         
         return images_data
 
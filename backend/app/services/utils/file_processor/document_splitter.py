@@ -1,11 +1,13 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter, MarkdownTextSplitter
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional, Set
+import hashlib
 
 class DocumentSplitter:
     """Handles document splitting into chunks"""
 
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, type: str = "markdown"):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, type: str = "markdown", dedup: bool = True):
         self.type = type
+        self.dedup = dedup
         if type == "markdown":
             self.text_splitter = MarkdownTextSplitter(
                 chunk_size=chunk_size,
@@ -18,13 +20,46 @@ class DocumentSplitter:
                 separators=["\n\n", "\n", ". ", " ", ""]
             )
     
-    def split_documents(self, documents: List, preserve_metadata: Dict = None) -> List:
-        """Split documents into chunks and preserve metadata"""
+    @staticmethod
+    def _chunk_hash(content: str) -> int:
+        """Hash of the chunk text, ignoring case and whitespace differences"""
+        normalized = ' '.join(content.lower().split())
+        return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "big")
+    
+    def _drop_duplicates(self, chunks: List, seen: Set[int]) -> List:
+        """Keep the first occurrence of each chunk text"""
+        unique_chunks = []
+        for chunk in chunks:
+            chunk_hash = self._chunk_hash(chunk.page_content)
+            if chunk_hash in seen:
+                continue
+            seen.add(chunk_hash)
+            unique_chunks.append(chunk)
+        return unique_chunks
+    
+    def split_documents(self, documents: List, preserve_metadata: Dict = None, seen: Optional[Set[int]] = None) -> List:
+        """Split documents into chunks and preserve metadata
+        
+        With dedup enabled, chunks whose text repeats an earlier chunk (e.g. the
+        same slide text from OCR and standard extraction) are dropped; pass the
+        same seen set across calls to de-duplicate across them.
+        """
         
         chunks = self.text_splitter.split_documents(documents)
         
+        if self.dedup:
+            chunks = self._drop_duplicates(chunks, set() if seen is None else seen)
+        
         if preserve_metadata:
             for chunk in chunks:
                 chunk.metadata.update(preserve_metadata)
         
         return chunks
+    
+    def split_documents_iter(self, documents: Iterable, preserve_metadata: Dict = None) -> Iterator[List]:
+        """Split documents one at a time, yielding each document's chunks as soon as they are ready"""
+        seen: Set[int] = set()
+        for document in documents:
+            chunks = self.split_documents([document], preserve_metadata, seen)
+            if chunks:
+                yield chunks
@@ -0,0 +1,48 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pytesseract
+from PIL import Image
+
+_CACHE_SIZE = 1024
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def binarize(image: Image.Image) -> Image.Image:
+    """Convert an image to black and white using Otsu's threshold"""
+    gray = np.asarray(image.convert("L"))
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+
+    # Otsu: pick the threshold that maximizes the between-class variance
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    cum_mean = np.cumsum(hist * np.arange(256))
+    mean_bg = cum_mean / np.maximum(weight_bg, 1)
+    mean_fg = (cum_mean[-1] - cum_mean) / np.maximum(weight_fg, 1)
+    threshold = int(np.argmax(weight_bg * weight_fg * (mean_bg - mean_fg) ** 2))
+
+    return Image.fromarray(((gray > threshold) * 255).astype(np.uint8))
+
+
+def image_to_text(image: Image.Image, config: str = "") -> str:
+    """Run Tesseract on a binarized copy of the image, caching results by image content"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.mode}:{image.size}:{config}".encode())
+    digest.update(image.tobytes())
+    key = digest.hexdigest()
+
+    with _cache_lock:
+        text = _cache.get(key)
+        if text is not None:
+            _cache.move_to_end(key)
+            return text
+
+    text = pytesseract.image_to_string(binarize(image), config=config)
+
+    with _cache_lock:
+        _cache[key] = text
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return text
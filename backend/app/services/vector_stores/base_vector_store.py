@@ -1,10 +1,29 @@
+import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional, Any
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple
 from langchain.schema import Document
 
+# Query embeddings shared by every store, keyed by (embedding model, stripped query)
+_QUERY_CACHE_SIZE = 1024
+_query_cache: "OrderedDict[tuple, List[float]]" = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+def _unique_texts(texts: List[str]) -> Tuple[List[str], List[int]]:
+    """Distinct texts in first-seen order, and each input's position among them"""
+    index: Dict[str, int] = {}
+    positions = [index.setdefault(text, len(index)) for text in texts]
+    return list(index), positions
+
 class BaseVectorStore(ABC):
     """Abstract base class for vector store implementations"""
     
+    # Embedding requests allowed in flight at once by aembed_documents_concurrent,
+    # and texts per request (None: the embeddings' own chunk_size)
+    embed_concurrency: int = 8
+    embed_batch_size: Optional[int] = None
+    
     @abstractmethod
     def add_documents(
         self, 
@@ -26,6 +45,123 @@ class BaseVectorStore(ABC):
         """Search with relevance scores"""
         pass
     
+    def _query_cache_key(self, query: str) -> tuple:
+        return (getattr(self, 'embedding_model', None), query.strip())
+    
+    def _cached_query_vector(self, key: tuple) -> Optional[List[float]]:
+        with _query_cache_lock:
+            vector = _query_cache.get(key)
+            if vector is not None:
+                _query_cache.move_to_end(key)
+            return vector
+    
+    def _cache_query_vector(self, key: tuple, vector: List[float]):
+        with _query_cache_lock:
+            _query_cache[key] = vector
+            _query_cache.move_to_end(key)
+            while len(_query_cache) > _QUERY_CACHE_SIZE:
+                _query_cache.popitem(last=False)
+    
+    def embed_query_cached(self, query: str) -> List[float]:
+        """Embed a search query with self.embeddings, reusing the vector of an identical earlier query"""
+        key = self._query_cache_key(query)
+        vector = self._cached_query_vector(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(key[1])
+            self._cache_query_vector(key, vector)
+        return vector
+    
+    async def aembed_query_cached(self, query: str) -> List[float]:
+        """Async embed_query_cached"""
+        key = self._query_cache_key(query)
+        vector = self._cached_query_vector(key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(key[1])
+            self._cache_query_vector(key, vector)
+        return vector
+    
+    async def asimilarity_search_with_score(
+        self, 
+        query: str, 
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[tuple]:
+        """Search with relevance scores without blocking the event loop
+        
+        Stores without a native async client inherit this. If the store can
+        search by precomputed vectors, the query is embedded with the async
+        embedding client and only the search itself leaves the event loop;
+        otherwise the whole sync search runs in a worker thread, so
+        concurrent searches still overlap.
+        """
+        if getattr(self, 'embeddings', None) is not None and hasattr(self, 'asimilarity_search_by_vectors'):
+            vector = await self.aembed_query_cached(query)
+            results = await self.asimilarity_search_by_vectors([vector], k=k, filter=filter, namespace=namespace)
+            return results[0]
+        
+        return await asyncio.to_thread(
+            self.similarity_search_with_score,
+            query=query,
+            k=k,
+            filter=filter,
+            namespace=namespace
+        )
+    
+    async def asimilarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[List[tuple]]:
+        """Search with relevance scores for several queries, one result list per query
+        
+        The default runs the searches concurrently; stores with a batch search
+        endpoint can override it with a single round-trip.
+        """
+        return await asyncio.gather(*[
+            self.asimilarity_search_with_score(query=query, k=k, filter=filter, namespace=namespace)
+            for query in queries
+        ])
+    
+    def embed_documents_unique(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with self.embeddings, sending each distinct text only once
+        
+        Repeated chunks (headers, footers, boilerplate) share one embedding;
+        the returned list still has one vector per input text, in order.
+        """
+        unique, positions = _unique_texts(texts)
+        vectors = self.embeddings.embed_documents(unique)
+        return [vectors[position] for position in positions]
+    
+    async def aembed_documents_concurrent(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with self.embeddings, sending embed_batch_size slices concurrently
+        
+        LangChain's aembed_documents awaits each chunk_size request before
+        sending the next; here the slices go out together, at most
+        embed_concurrency at a time to stay within the provider's rate limits.
+        As in embed_documents_unique, each distinct text is embedded once.
+        Vectors are returned in the same order as texts.
+        """
+        unique, positions = _unique_texts(texts)
+        chunk_size = self.embed_batch_size or getattr(self.embeddings, "chunk_size", None) or 1000
+        if len(unique) <= chunk_size:
+            vectors = await self.embeddings.aembed_documents(unique)
+            return [vectors[position] for position in positions]
+        
+        semaphore = asyncio.Semaphore(self.embed_concurrency)
+        
+        async def embed(chunk: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self.embeddings.aembed_documents(chunk)
+        
+        chunks = await asyncio.gather(*[
+            embed(unique[start:start + chunk_size]) for start in range(0, len(unique), chunk_size)
+        ])
+        vectors = [vector for chunk in chunks for vector in chunk]
+        return [vectors[position] for position in positions]
+    
     @abstractmethod
     def as_retriever(self, **kwargs) -> Any:
         """Get retriever for RAG chains"""
@@ -67,6 +203,10 @@ class BaseVectorStore(ABC):
         """Check if cache exists for document URL"""
         return False
     
+    def alias_cache(self, document_url: str, target_url: str) -> bool:
+        """Reuse the cache saved for target_url for document_url. Returns True if successful."""
+        return False
+    
     def clear_cache(self, document_url: Optional[str] = None) -> bool:
         """Clear cache for specific URL or all cache"""
         return False
@@ -0,0 +1,465 @@
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_openai import OpenAIEmbeddings
+from app.services.vector_stores.base_vector_store import BaseVectorStore
+from app.services.vector_stores.vector_store_cache import VectorStoreCache
+from typing import List, Dict, Optional, Any
+from langchain.schema import Document
+from app.config.settings import settings
+from pathlib import Path
+import numpy as np
+import asyncio
+import threading
+import pickle
+import math
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FaissRetriever(BaseRetriever):
+    """Minimal LangChain retriever over a FaissIVFPQVectorStoreService"""
+    
+    store: Any
+    k: int = 4
+    
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [doc for doc, _ in self.store.similarity_search_with_score(query, k=self.k)]
+
+class FaissIVFPQVectorStoreService(BaseVectorStore):
+    """
+    In-process vector store that switches from exact search to FAISS IVF-PQ as it grows
+    
+    Up to train_threshold vectors are kept in an exact flat inner-product
+    index. Once the store reaches that size, an IVF-PQ index is trained on
+    (a sample of) its vectors and takes over: int(4 * sqrt(N)) inverted lists
+    of which nprobe are scanned per query, with each vector compressed to
+    pq_m one-byte codes (64 bytes instead of 6 KB for 1536 dimensions). Scores
+    from the compressed index are approximate. The number of lists is fixed
+    when the index is trained.
+    """
+    
+    def __init__(
+        self,
+        embedding_model: str = "text-embedding-3-small",
+        train_threshold: int = 10000,
+        train_sample: int = 50000,
+        pq_m: int = 64,
+        nprobe: int = 16
+    ):
+        """
+        Initialize FAISS IVF-PQ vector store service
+        
+        Args:
+            embedding_model: OpenAI embedding model to use
+            train_threshold: Number of vectors at which the IVF-PQ index is trained
+            train_sample: Maximum number of vectors used for training
+            pq_m: Product-quantizer sub-vectors (bytes per stored vector)
+            nprobe: Inverted lists scanned per query
+        """
+        try:
+            import faiss
+        except ImportError:
+            raise ImportError(
+                "faiss is required for the IVF-PQ vector store. "
+                "Install it with: pip install faiss-cpu"
+            )
+        
+        self.embedding_model = embedding_model
+        
+        if not settings.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY environment variable is required for OpenAI embeddings")
+        
+        self.embeddings = OpenAIEmbeddings(
+            model=embedding_model,
+            openai_api_key=settings.OPENAI_API_KEY,
+        )
+        
+        self.train_threshold = train_threshold
+        self.train_sample = train_sample
+        self.pq_m = pq_m
+        self.nprobe = nprobe
+        
+        # FAISS indexes must not be searched while they are being modified
+        self._lock = threading.Lock()
+        self._training = False
+        self._reset()
+        
+        self.store_type = "ivfpq"
+        
+        self.cache_manager = VectorStoreCache()
+        
+        logger.info("Initialized FAISS IVF-PQ vector store with caching support")
+    
+    def _reset(self):
+        """Drop all vectors; the index is created on the first add, once the dimension is known"""
+        self._index = None
+        self._trained = False
+        self._docs: Dict[int, Document] = {}
+        self._labels: Dict[str, int] = {}
+        self._next_label = 0
+    
+    def _pq_subvectors(self, dim: int) -> int:
+        """Largest sub-vector count up to pq_m that divides dim, as FAISS requires"""
+        return next(m for m in range(min(self.pq_m, dim), 0, -1) if dim % m == 0)
+    
+    def _train(self, flat_index):
+        """Train an IVF-PQ index on a snapshot of flat_index and swap it in
+        
+        Only the snapshot and the swap hold the lock; the (slow) training runs
+        while searches and writes continue against the flat index. Vectors
+        added or removed in the meantime are carried over before the swap.
+        """
+        import faiss
+        
+        with self._lock:
+            flat = faiss.downcast_index(flat_index.index)
+            labels = faiss.vector_to_array(flat_index.id_map)
+            vectors = flat.reconstruct_n(0, flat.ntotal)
+        dim = vectors.shape[1]
+        
+        nlist = max(1, int(4 * math.sqrt(len(vectors))))
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, self._pq_subvectors(dim), 8, faiss.METRIC_INNER_PRODUCT)
+        
+        sample = vectors
+        if len(vectors) > self.train_sample:
+            sample = vectors[np.random.default_rng(0).choice(len(vectors), self.train_sample, replace=False)]
+        index.train(sample)
+        index.add_with_ids(vectors, labels)
+        index.nprobe = self.nprobe
+        
+        with self._lock:
+            # The store was reset or reloaded while training; drop the result
+            if self._index is not flat_index:
+                return
+            
+            current = faiss.vector_to_array(flat_index.id_map)
+            removed = labels[~np.isin(labels, current)]
+            if len(removed):
+                index.remove_ids(removed)
+            added = ~np.isin(current, labels)
+            if added.any():
+                index.add_with_ids(flat.reconstruct_n(0, flat.ntotal)[added], current[added])
+            
+            self._index = index
+            self._trained = True
+        logger.info("Trained IVF-PQ index over %d vectors (%d lists)", len(vectors), nlist)
+    
+    def _add_vectors(self, documents: List[Document], vectors: List[List[float]]) -> List[str]:
+        """Insert normalized vectors, training the IVF-PQ index once the store is large enough"""
+        import faiss
+        
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        
+        flat_index = None
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap(faiss.IndexFlatIP(vectors.shape[1]))
+            
+            replaced = [self._labels[doc.id] for doc in documents if doc.id in self._labels]
+            if replaced:
+                self._remove_labels(replaced)
+            
+            labels = np.arange(self._next_label, self._next_label + len(vectors), dtype=np.int64)
+            self._next_label += len(vectors)
+            self._index.add_with_ids(vectors, labels)
+            
+            for label, doc in zip(labels, documents):
+                self._docs[int(label)] = doc
+                self._labels[doc.id] = int(label)
+            
+            if not self._trained and not self._training and self._index.ntotal >= self.train_threshold:
+                self._training = True
+                flat_index = self._index
+        
+        if flat_index is not None:
+            try:
+                self._train(flat_index)
+            finally:
+                with self._lock:
+                    self._training = False
+        
+        return [doc.id for doc in documents]
+    
+    def _remove_labels(self, labels: List[int]):
+        """Remove labels from the index and the document table; caller holds the lock"""
+        self._index.remove_ids(np.asarray(labels, dtype=np.int64))
+        for label in labels:
+            doc = self._docs.pop(label, None)
+            if doc is not None:
+                self._labels.pop(doc.id, None)
+    
+    def _search(self, query_vector: List[float], k: int) -> List[tuple]:
+        """Top-k documents by inner product with the normalized query"""
+        return self._search_many([query_vector], k)[0]
+    
+    def _search_many(self, query_vectors: List[List[float]], k: int) -> List[List[tuple]]:
+        """Run _search for several queries with one index call"""
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        
+        with self._lock:
+            if self._index is None or not self._labels:
+                return [[] for _ in query_vectors]
+            scores, labels = self._index.search(queries, min(k, len(self._labels)))
+            docs = self._docs
+            # Slots the probed lists could not fill come back as label -1
+            return [
+                [(docs[int(label)], float(score)) for label, score in zip(query_labels, query_scores) if label >= 0]
+                for query_labels, query_scores in zip(labels, scores)
+            ]
+    
+    def _documents(self, texts: List[str], metadatas: List[Dict], ids: List[str]) -> List[Document]:
+        """Build LangChain documents from parallel text, metadata and id lists"""
+        return [
+            Document(id=doc_id, page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        ]
+    
+    def add_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents to FAISS vector store (sync)"""
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        
+        logger.debug("Adding %d documents to FAISS vector store", len(texts))
+        
+        try:
+            vectors = self.embed_documents_unique(texts)
+            added_ids = self._add_vectors(self._documents(texts, metadatas, ids), vectors)
+            
+            logger.debug("Successfully added %d documents to FAISS vector store", len(added_ids))
+            return added_ids
+        
+        except Exception as e:
+            logger.error("Error adding documents to FAISS vector store: %s", e)
+            raise
+    
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[tuple]:
+        """Search with relevance scores (sync)"""
+        # Like the in-memory store, the filter is ignored: the store is cleared
+        # per request, and cached stores carry the document_id of the original run
+        try:
+            return self._search(self.embed_query_cached(query), k)
+        
+        except Exception as e:
+            logger.error("Error during similarity search with score: %s", e)
+            return []
+    
+    def delete_documents(
+        self,
+        ids: List[str],
+        namespace: Optional[str] = None
+    ) -> bool:
+        """Delete documents by IDs (sync)"""
+        try:
+            with self._lock:
+                labels = [self._labels[doc_id] for doc_id in ids if doc_id in self._labels]
+                if labels:
+                    self._remove_labels(labels)
+            logger.debug("Deleted %d documents from FAISS vector store", len(ids))
+            return True
+        
+        except Exception as e:
+            logger.error("Error deleting documents: %s", e)
+            return False
+    
+    def get_document_count(self, namespace: Optional[str] = None) -> int:
+        """Get total document count (sync)"""
+        return len(self._labels)
+    
+    def delete_all_documents(self, namespace: Optional[str] = None) -> bool:
+        """Delete all documents from vector store (sync)"""
+        with self._lock:
+            self._reset()
+        
+        logger.debug("Deleted all documents from FAISS vector store")
+        return True
+    
+    # Async methods (prefixed with 'a')
+    async def aadd_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents to FAISS vector store (async)"""
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        
+        logger.debug("Adding %d documents to FAISS vector store (async)", len(texts))
+        
+        try:
+            vectors = await self.aembed_documents_concurrent(texts)
+            added_ids = await asyncio.to_thread(self._add_vectors, self._documents(texts, metadatas, ids), vectors)
+            
+            logger.debug("Successfully added %d documents to FAISS vector store (async)", len(added_ids))
+            return added_ids
+        
+        except Exception as e:
+            logger.error("Error adding documents to FAISS vector store: %s", e)
+            raise
+    
+    async def aadd_with_vectors(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        vectors: List[List[float]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents with precomputed embeddings (async)"""
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        return await asyncio.to_thread(self._add_vectors, self._documents(texts, metadatas, ids), vectors)
+    
+    async def asimilarity_search_with_score(
+        self,
+        query: str,
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[tuple]:
+        """Search with relevance scores (async)"""
+        try:
+            return self._search(await self.aembed_query_cached(query), k)
+        
+        except Exception as e:
+            logger.error("Error during similarity search with score: %s", e)
+            return []
+    
+    async def asimilarity_search_by_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[List[tuple]]:
+        """Search with relevance scores for several precomputed query vectors (async)"""
+        try:
+            return self._search_many(vectors, k)
+        
+        except Exception as e:
+            logger.error("Error during batched similarity search: %s", e)
+            return [[] for _ in vectors]
+    
+    async def aget_document_count(self, namespace: Optional[str] = None) -> int:
+        """Get total document count (async)"""
+        return self.get_document_count(namespace)
+    
+    async def adelete_all_documents(self, namespace: Optional[str] = None) -> bool:
+        """Delete all documents from vector store (async)"""
+        return self.delete_all_documents(namespace)
+    
+    def as_retriever(self, **kwargs) -> Any:
+        """Get retriever for RAG chains"""
+        search_kwargs = kwargs.get("search_kwargs", {})
+        return FaissRetriever(store=self, k=search_kwargs.get("k", 4))
+    
+    def dump_to_file(self, file_path: str) -> bool:
+        """Dump index and documents to file for caching"""
+        import faiss
+        
+        try:
+            with self._lock:
+                state = {
+                    "index": None if self._index is None else faiss.serialize_index(self._index),
+                    "trained": self._trained,
+                    "docs": self._docs,
+                    "labels": self._labels,
+                    "next_label": self._next_label,
+                }
+                with open(file_path, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            logger.debug("Dumped vector store to: %s", file_path)
+            return True
+        except Exception as e:
+            logger.error("Error dumping vector store: %s", e)
+            return False
+    
+    def load_from_file(self, file_path: str):
+        """Replace the current contents with a dumped index"""
+        import faiss
+        
+        with open(file_path, "rb") as f:
+            state = pickle.load(f)
+        
+        with self._lock:
+            self._index = None if state["index"] is None else faiss.deserialize_index(state["index"])
+            self._trained = state["trained"]
+            self._docs = state["docs"]
+            self._labels = state["labels"]
+            self._next_label = state["next_label"]
+            if self._trained:
+                faiss.extract_index_ivf(self._index).nprobe = self.nprobe
+    
+    def get_temp_dump_path(self) -> str:
+        """Get a temporary file path for dumping"""
+        cache_dir = Path("vector_store_cache")
+        cache_dir.mkdir(exist_ok=True)
+        temp_file = f"temp_vector_store_{uuid.uuid4().hex[:8]}.vs"
+        return str(cache_dir / temp_file)
+    
+    def supports_caching(self) -> bool:
+        """Check if this vector store supports caching"""
+        return True
+    
+    def load_from_cache(self, document_url: str) -> bool:
+        """Load cached vector store for document URL. Returns True if successful."""
+        try:
+            cached_path = self.cache_manager.get_cache_path(document_url)
+            if cached_path:
+                logger.debug("Loading cached vector store for: %s", document_url[:50])
+                
+                self.load_from_file(cached_path)
+                
+                logger.debug("Successfully loaded cached vector store")
+                return True
+            return False
+        except Exception as e:
+            logger.error("Failed to load cached vector store: %s", e)
+            return False
+    
+    def save_to_cache(self, document_url: str) -> bool:
+        """Save current vector store to cache for document URL. Returns True if successful."""
+        try:
+            temp_path = self.get_temp_dump_path()
+            if self.dump_to_file(temp_path):
+                success = self.cache_manager.cache_vector_store(document_url, temp_path)
+                if success:
+                    logger.debug("Successfully cached vector store for future use")
+                return success
+            return False
+        except Exception as e:
+            logger.error("Failed to cache vector store: %s", e)
+            return False
+    
+    def has_cache(self, document_url: str) -> bool:
+        """Check if cache exists for document URL"""
+        return self.cache_manager.has_cached_store(document_url)
+    
+    def alias_cache(self, document_url: str, target_url: str) -> bool:
+        """Reuse the cache saved for target_url for document_url. Returns True if successful."""
+        return self.cache_manager.alias_cache(document_url, target_url)
+    
+    def clear_cache(self, document_url: Optional[str] = None) -> bool:
+        """Clear cache for specific URL or all cache"""
+        try:
+            self.cache_manager.clear_cache(document_url)
+            return True
+        except Exception as e:
+            logger.error("Error clearing cache: %s", e)
+            return False
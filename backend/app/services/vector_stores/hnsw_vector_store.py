@@ -0,0 +1,500 @@
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_openai import OpenAIEmbeddings
+from app.services.vector_stores.base_vector_store import BaseVectorStore
+from app.services.vector_stores.vector_store_cache import VectorStoreCache
+from typing import List, Dict, Optional, Any
+from langchain.schema import Document
+from app.config.settings import settings
+from pathlib import Path
+import numpy as np
+import asyncio
+import threading
+import pickle
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HNSWRetriever(BaseRetriever):
+    """Minimal LangChain retriever over an HNSWVectorStoreService"""
+    
+    store: Any
+    k: int = 4
+    
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [doc for doc, _ in self.store.similarity_search_with_score(query, k=self.k)]
+
+class USearchIndex:
+    """
+    USearch HNSW index behind the subset of the hnswlib.Index API used by HNSWVectorStoreService
+    
+    USearch grows on its own (the capacity is only recorded, and reserved
+    ahead where the binding supports it) and removes entries outright; search
+    results a query could not fill are returned as label -1.
+    """
+    
+    def __init__(self, dim: int, m: int, ef_construction: int, ef_search: int):
+        from usearch.index import Index
+        
+        self._index = Index(
+            ndim=dim,
+            metric="ip",
+            dtype="f32",
+            connectivity=m,
+            expansion_add=ef_construction,
+            expansion_search=ef_search
+        )
+        self._capacity = 0
+    
+    def init_index(self, max_elements: int, ef_construction: int = None, M: int = None):
+        self.resize_index(max_elements)
+    
+    def get_max_elements(self) -> int:
+        return self._capacity
+    
+    def resize_index(self, max_elements: int):
+        if hasattr(self._index, "reserve"):
+            self._index.reserve(max_elements)
+        self._capacity = max_elements
+    
+    def set_ef(self, ef: int):
+        self._index.expansion_search = ef
+    
+    def add_items(self, vectors: np.ndarray, labels: np.ndarray):
+        self._index.add(np.asarray(labels, dtype=np.uint64), vectors)
+    
+    def knn_query(self, queries: np.ndarray, k: int):
+        matches = self._index.search(queries, k)
+        # A single query comes back as Matches (1-D, already trimmed to its
+        # count) rather than BatchMatches
+        keys = np.atleast_2d(matches.keys)
+        found = np.atleast_2d(matches.distances)
+        counts = np.atleast_1d(getattr(matches, "counts", [keys.shape[1]]))
+        
+        labels = np.full((len(queries), k), -1, dtype=np.int64)
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        for row, count in enumerate(counts):
+            labels[row, :count] = keys[row, :count]
+            distances[row, :count] = found[row, :count]
+        return labels, distances
+    
+    def mark_deleted(self, label: int):
+        self._index.remove(label)
+    
+    def __getstate__(self):
+        return {"index": bytes(self._index.save()), "capacity": self._capacity}
+    
+    def __setstate__(self, state):
+        from usearch.index import Index
+        
+        self._index = Index.restore(state["index"])
+        self._capacity = state["capacity"]
+
+class HNSWVectorStoreService(BaseVectorStore):
+    """
+    In-process vector store backed by an HNSW graph (hnswlib, or USearch)
+    
+    Queries traverse the graph for rerank_factor * k candidates, which are then
+    re-scored exactly against the float32 vectors kept alongside the index, so
+    recall does not hinge on the graph's ef setting.
+    """
+    
+    def __init__(
+        self,
+        embedding_model: str = "text-embedding-3-small",
+        m: int = 32,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        rerank_factor: int = 4,
+        initial_capacity: int = 1024,
+        backend: str = "hnswlib"
+    ):
+        """
+        Initialize HNSW vector store service
+        
+        Args:
+            embedding_model: OpenAI embedding model to use
+            m: Number of graph neighbours per node
+            ef_construction: Candidate list size while building the graph
+            ef_search: Minimum candidate list size while querying
+            rerank_factor: Multiple of k fetched from the graph before the exact rerank
+            initial_capacity: Number of vectors to allocate for before the index is resized
+            backend: HNSW implementation, "hnswlib" or "usearch" (SIMD distance kernels)
+        """
+        if backend not in ("hnswlib", "usearch"):
+            raise ValueError(f"Unsupported HNSW backend: {backend}. Supported backends: 'hnswlib', 'usearch'")
+        try:
+            if backend == "usearch":
+                import usearch.index
+            else:
+                import hnswlib
+        except ImportError:
+            raise ImportError(
+                f"{backend} is required for the HNSW vector store. "
+                f"Install it with: pip install {backend}"
+            )
+        
+        self.embedding_model = embedding_model
+        
+        if not settings.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY environment variable is required for OpenAI embeddings")
+        
+        self.embeddings = OpenAIEmbeddings(
+            model=embedding_model,
+            openai_api_key=settings.OPENAI_API_KEY,
+        )
+        
+        self.backend = backend
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.rerank_factor = rerank_factor
+        self.initial_capacity = initial_capacity
+        
+        # hnswlib does not allow adds and queries to run concurrently
+        self._lock = threading.Lock()
+        self._reset()
+        
+        self.store_type = "hnsw"
+        
+        self.cache_manager = VectorStoreCache()
+        
+        logger.info("Initialized HNSW vector store with caching support")
+    
+    def _reset(self):
+        """Drop all vectors; the index is created on the first add, once the dimension is known"""
+        self._index = None
+        self._vectors: Optional[np.ndarray] = None
+        self._docs: List[Optional[Document]] = []
+        self._labels: Dict[str, int] = {}
+    
+    def _new_index(self, dim: int):
+        """Create an empty index of the configured backend"""
+        if self.backend == "usearch":
+            return USearchIndex(dim, self.m, self.ef_construction, self.ef_search)
+        
+        import hnswlib
+        return hnswlib.Index(space='ip', dim=dim)
+    
+    def _add_vectors(self, documents: List[Document], vectors: List[List[float]]) -> List[str]:
+        """Insert normalized vectors into the graph and the rerank matrix"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        
+        with self._lock:
+            if self._index is None:
+                self._index = self._new_index(vectors.shape[1])
+                self._index.init_index(
+                    max_elements=max(self.initial_capacity, len(vectors)),
+                    ef_construction=self.ef_construction,
+                    M=self.m
+                )
+                self._vectors = np.empty((self._index.get_max_elements(), vectors.shape[1]), dtype=np.float32)
+            
+            # Re-adding an id replaces it; retire the old label so it stops matching
+            for doc in documents:
+                label = self._labels.pop(doc.id, None)
+                if label is not None:
+                    self._index.mark_deleted(label)
+                    self._docs[label] = None
+            
+            start = len(self._docs)
+            end = start + len(vectors)
+            if end > self._index.get_max_elements():
+                capacity = max(end, 2 * self._index.get_max_elements())
+                self._index.resize_index(capacity)
+                grown = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+                grown[:start] = self._vectors[:start]
+                self._vectors = grown
+            
+            labels = np.arange(start, end)
+            self._index.add_items(vectors, labels)
+            self._vectors[start:end] = vectors
+            
+            for label, doc in zip(labels, documents):
+                self._docs.append(doc)
+                self._labels[doc.id] = int(label)
+        
+        return [doc.id for doc in documents]
+    
+    def _search(self, query_vector: List[float], k: int) -> List[tuple]:
+        """Fetch candidates from the graph and rerank them exactly by cosine similarity"""
+        return self._search_many([query_vector], k)[0]
+    
+    def _search_many(self, query_vectors: List[List[float]], k: int) -> List[List[tuple]]:
+        """Run _search for several queries with one batched graph traversal"""
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        
+        with self._lock:
+            live = len(self._labels)
+            if self._index is None or live == 0:
+                return [[] for _ in query_vectors]
+            
+            candidates = min(live, self.rerank_factor * k)
+            self._index.set_ef(max(self.ef_search, candidates))
+            labels, _ = self._index.knn_query(queries, k=candidates)
+            # (queries, candidates) exact cosine scores for each query's candidates;
+            # slots a query could not fill (label -1) never rank
+            found = labels >= 0
+            scores = np.einsum('qcd,qd->qc', self._vectors[np.where(found, labels, 0)], queries)
+            scores[~found] = -np.inf
+            docs = self._docs
+        
+        results = []
+        for query_labels, query_scores in zip(labels, scores):
+            order = np.argsort(-query_scores)[:k]
+            results.append([(docs[query_labels[i]], float(query_scores[i])) for i in order if query_labels[i] >= 0])
+        return results
+    
+    def _documents(self, texts: List[str], metadatas: List[Dict], ids: List[str]) -> List[Document]:
+        """Build LangChain documents from parallel text, metadata and id lists"""
+        return [
+            Document(id=doc_id, page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        ]
+    
+    def add_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents to HNSW vector store (sync)"""
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        
+        logger.debug("Adding %d documents to HNSW vector store", len(texts))
+        
+        try:
+            vectors = self.embed_documents_unique(texts)
+            added_ids = self._add_vectors(self._documents(texts, metadatas, ids), vectors)
+            
+            logger.debug("Successfully added %d documents to HNSW vector store", len(added_ids))
+            return added_ids
+        
+        except Exception as e:
+            logger.error("Error adding documents to HNSW vector store: %s", e)
+            raise
+    
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[tuple]:
+        """Search with relevance scores (sync)"""
+        # Like the in-memory store, the filter is ignored: the store is cleared
+        # per request, and cached stores carry the document_id of the original run
+        try:
+            return self._search(self.embed_query_cached(query), k)
+        
+        except Exception as e:
+            logger.error("Error during similarity search with score: %s", e)
+            return []
+    
+    def delete_documents(
+        self,
+        ids: List[str],
+        namespace: Optional[str] = None
+    ) -> bool:
+        """Delete documents by IDs (sync)"""
+        try:
+            with self._lock:
+                for doc_id in ids:
+                    label = self._labels.pop(doc_id, None)
+                    if label is not None:
+                        self._index.mark_deleted(label)
+                        self._docs[label] = None
+            logger.debug("Deleted %d documents from HNSW vector store", len(ids))
+            return True
+        
+        except Exception as e:
+            logger.error("Error deleting documents: %s", e)
+            return False
+    
+    def get_document_count(self, namespace: Optional[str] = None) -> int:
+        """Get total document count (sync)"""
+        return len(self._labels)
+    
+    def delete_all_documents(self, namespace: Optional[str] = None) -> bool:
+        """Delete all documents from vector store (sync)"""
+        with self._lock:
+            self._reset()
+        
+        logger.debug("Deleted all documents from HNSW vector store")
+        return True
+    
+    # Async methods (prefixed with 'a')
+    async def aadd_documents(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents to HNSW vector store (async)"""
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        
+        logger.debug("Adding %d documents to HNSW vector store (async)", len(texts))
+        
+        try:
+            vectors = await self.aembed_documents_concurrent(texts)
+            added_ids = await asyncio.to_thread(self._add_vectors, self._documents(texts, metadatas, ids), vectors)
+            
+            logger.debug("Successfully added %d documents to HNSW vector store (async)", len(added_ids))
+            return added_ids
+        
+        except Exception as e:
+            logger.error("Error adding documents to HNSW vector store: %s", e)
+            raise
+    
+    async def aadd_with_vectors(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        vectors: List[List[float]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents with precomputed embeddings (async)"""
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        return await asyncio.to_thread(self._add_vectors, self._documents(texts, metadatas, ids), vectors)
+    
+    async def asimilarity_search_with_score(
+        self,
+        query: str,
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[tuple]:
+        """Search with relevance scores (async)"""
+        try:
+            return self._search(await self.aembed_query_cached(query), k)
+        
+        except Exception as e:
+            logger.error("Error during similarity search with score: %s", e)
+            return []
+    
+    async def asimilarity_search_by_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[List[tuple]]:
+        """Search with relevance scores for several precomputed query vectors (async)"""
+        try:
+            return self._search_many(vectors, k)
+        
+        except Exception as e:
+            logger.error("Error during batched similarity search: %s", e)
+            return [[] for _ in vectors]
+    
+    async def aget_document_count(self, namespace: Optional[str] = None) -> int:
+        """Get total document count (async)"""
+        return self.get_document_count(namespace)
+    
+    async def adelete_all_documents(self, namespace: Optional[str] = None) -> bool:
+        """Delete all documents from vector store (async)"""
+        return self.delete_all_documents(namespace)
+    
+    def as_retriever(self, **kwargs) -> Any:
+        """Get retriever for RAG chains"""
+        search_kwargs = kwargs.get("search_kwargs", {})
+        return HNSWRetriever(store=self, k=search_kwargs.get("k", 4))
+    
+    def dump_to_file(self, file_path: str) -> bool:
+        """Dump index, vectors and documents to file for caching"""
+        try:
+            with self._lock:
+                state = {
+                    "index": self._index,
+                    "vectors": None if self._vectors is None else self._vectors[:len(self._docs)],
+                    "docs": self._docs,
+                    "labels": self._labels,
+                }
+                with open(file_path, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            logger.debug("Dumped vector store to: %s", file_path)
+            return True
+        except Exception as e:
+            logger.error("Error dumping vector store: %s", e)
+            return False
+    
+    def load_from_file(self, file_path: str):
+        """Replace the current contents with a dumped index"""
+        with open(file_path, "rb") as f:
+            state = pickle.load(f)
+        
+        with self._lock:
+            self._index = state["index"]
+            self._docs = state["docs"]
+            self._labels = state["labels"]
+            self._vectors = state["vectors"]
+            if self._index is not None:
+                grown = np.empty((self._index.get_max_elements(), self._vectors.shape[1]), dtype=np.float32)
+                grown[:len(self._vectors)] = self._vectors
+                self._vectors = grown
+    
+    def get_temp_dump_path(self) -> str:
+        """Get a temporary file path for dumping"""
+        cache_dir = Path("vector_store_cache")
+        cache_dir.mkdir(exist_ok=True)
+        temp_file = f"temp_vector_store_{uuid.uuid4().hex[:8]}.vs"
+        return str(cache_dir / temp_file)
+    
+    def supports_caching(self) -> bool:
+        """Check if this vector store supports caching"""
+        return True
+    
+    def load_from_cache(self, document_url: str) -> bool:
+        """Load cached vector store for document URL. Returns True if successful."""
+        try:
+            cached_path = self.cache_manager.get_cache_path(document_url)
+            if cached_path:
+                logger.debug("Loading cached vector store for: %s", document_url[:50])
+                
+                self.load_from_file(cached_path)
+                
+                logger.debug("Successfully loaded cached vector store")
+                return True
+            return False
+        except Exception as e:
+            logger.error("Failed to load cached vector store: %s", e)
+            return False
+    
+    def save_to_cache(self, document_url: str) -> bool:
+        """Save current vector store to cache for document URL. Returns True if successful."""
+        try:
+            temp_path = self.get_temp_dump_path()
+            if self.dump_to_file(temp_path):
+                success = self.cache_manager.cache_vector_store(document_url, temp_path)
+                if success:
+                    logger.debug("Successfully cached vector store for future use")
+                return success
+            return False
+        except Exception as e:
+            logger.error("Failed to cache vector store: %s", e)
+            return False
+    
+    def has_cache(self, document_url: str) -> bool:
+        """Check if cache exists for document URL"""
+        return self.cache_manager.has_cached_store(document_url)
+    
+    def alias_cache(self, document_url: str, target_url: str) -> bool:
+        """Reuse the cache saved for target_url for document_url. Returns True if successful."""
+        return self.cache_manager.alias_cache(document_url, target_url)
+    
+    def clear_cache(self, document_url: Optional[str] = None) -> bool:
+        """Clear cache for specific URL or all cache"""
+        try:
+            self.cache_manager.clear_cache(document_url)
+            return True
+        except Exception as e:
+            logger.error("Error clearing cache: %s", e)
+            return False
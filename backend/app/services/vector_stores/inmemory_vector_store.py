@@ -1,4 +1,6 @@
 from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_openai import OpenAIEmbeddings
 from app.services.vector_stores.base_vector_store import BaseVectorStore
 from app.services.vector_stores.vector_store_cache import VectorStoreCache
@@ -6,22 +8,240 @@ from typing import List, Dict, Optional, Any
 from langchain.schema import Document
 from app.config.settings import settings
 from pathlib import Path
+import numpy as np
+import threading
+import pickle
+import struct
 import uuid
 import tempfile
 import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Dump layout (version 3): magic, version byte, 8-byte length of the pickled
+# ids/texts/metadatas/scales/shape/embedding model, that pickle, zero padding to _DUMP_ALIGN, then
+# the raw int8 vector matrix, which is memory-mapped on load
+_DUMP_MAGIC = b"OAVS"
+_DUMP_VERSION = 3
+_DUMP_ALIGN = 64
+
+class _VecPool:
+    """
+    Columnar document storage: row i holds ids[i], texts[i], metadatas[i] and
+    the unit-normalized embedding, stored as int8 vectors[i] * scales[i]
+    
+    Embeddings are quantized per row to int8 with a float32 scale, a quarter
+    of the float32 footprint. Queries stay float32 and rows are dequantized a
+    block at a time during the scan, so only the stored side carries
+    quantization error. Vectors live in one contiguous matrix grown in
+    GROW_ROWS steps; deleted rows are tombstoned and compacted away once they
+    outnumber the live ones.
+    """
+    
+    GROW_ROWS = 4096
+    SCAN_ROWS = 1024
+    RERANK_ROWS = 4096
+    
+    def __init__(self):
+        self.vectors: Optional[np.ndarray] = None
+        self.scales = np.zeros(0, dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.ids: List[Optional[str]] = []
+        self.texts: List[Optional[str]] = []
+        self.metadatas: List[Optional[Dict]] = []
+        self._rows: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def keys(self) -> List[str]:
+        return list(self._rows)
+    
+    @staticmethod
+    def quantize(vectors) -> tuple:
+        """Unit-normalize float vectors and quantize each row to int8 with its own scale"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    
+    def _reserve(self, rows: int, dim: int):
+        """Make room for at least rows rows"""
+        capacity = 0 if self.vectors is None else len(self.vectors)
+        if rows <= capacity:
+            return
+        
+        capacity = -(-max(rows, 2 * capacity) // self.GROW_ROWS) * self.GROW_ROWS
+        vectors = np.empty((capacity, dim), dtype=np.int8)
+        scales = np.zeros(capacity, dtype=np.float32)
+        alive = np.zeros(capacity, dtype=bool)
+        used = len(self.ids)
+        if self.vectors is not None:
+            vectors[:used] = self.vectors[:used]
+            scales[:used] = self.scales[:used]
+            alive[:used] = self.alive[:used]
+        self.vectors, self.scales, self.alive = vectors, scales, alive
+    
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict], vectors) -> List[str]:
+        """Append documents; an existing id is replaced"""
+        if len(vectors) == 0:
+            return []
+        return self.add_quantized(ids, texts, metadatas, *self.quantize(vectors))
+    
+    def add_quantized(self, ids: List[str], texts: List[str], metadatas: List[Dict], vectors: np.ndarray, scales: np.ndarray) -> List[str]:
+        """Append documents whose embeddings are already quantized"""
+        self.delete([doc_id for doc_id in ids if doc_id in self._rows])
+        
+        start = len(self.ids)
+        end = start + len(vectors)
+        self._reserve(end, vectors.shape[1])
+        self.vectors[start:end] = vectors
+        self.scales[start:end] = scales
+        self.alive[start:end] = True
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+        self.metadatas.extend(metadatas)
+        for row, doc_id in enumerate(ids, start):
+            self._rows[doc_id] = row
+        return list(ids)
+    
+    def delete(self, ids: List[str]):
+        """Tombstone rows, compacting once most rows are dead"""
+        for doc_id in ids:
+            row = self._rows.pop(doc_id, None)
+            if row is not None:
+                self.alive[row] = False
+                self.ids[row] = self.texts[row] = self.metadatas[row] = None
+        
+        dead = len(self.ids) - len(self._rows)
+        if dead > len(self._rows):
+            self._compact()
+    
+    def _compact(self):
+        state = self.state()
+        self.__init__()
+        if state["ids"]:
+            self.add_quantized(state["ids"], state["texts"], state["metadatas"], state["vectors"], state["scales"])
+    
+    def _block_scores(self, queries: np.ndarray, start: int, end: int) -> np.ndarray:
+        """Scores of queries against rows start:end, with dead rows at -inf"""
+        scores = (queries @ self.vectors[start:end].T.astype(np.float32)) * self.scales[start:end]
+        scores[:, ~self.alive[start:end]] = -np.inf
+        return scores
+    
+    @staticmethod
+    def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> List[tuple]:
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+    
+    def search(self, queries: np.ndarray, k: int) -> List[List[tuple]]:
+        """Cosine top-k (row, score) pairs for each unit-normalized float32 query
+        
+        Pools of up to RERANK_ROWS live rows are scored exactly. Larger pools
+        are first scanned with the queries quantized to int8 too, keeping a
+        shortlist of the best RERANK_ROWS rows per query, and only the
+        shortlist is rescored with the float32 queries. Rows are dequantized
+        SCAN_ROWS at a time, so temporaries stay at a few MB.
+        """
+        k = min(k, len(self._rows))
+        if k <= 0:
+            return [[] for _ in queries]
+        
+        used = len(self.ids)
+        blocks = [(start, min(start + self.SCAN_ROWS, used)) for start in range(0, used, self.SCAN_ROWS)]
+        shortlist = max(k, self.RERANK_ROWS)
+        if len(self._rows) <= shortlist:
+            scores = np.concatenate([self._block_scores(queries, start, end) for start, end in blocks], axis=1)
+            rows = np.arange(used)
+            return [self._top_k(rows, query_scores, k) for query_scores in scores]
+        
+        # The int8 query's own scale is the same for every row, so it is left out
+        coarse = self.quantize(queries)[0].astype(np.float32)
+        cand_rows = np.empty((len(queries), 0), dtype=np.int64)
+        cand_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start, end in blocks:
+            cand_scores = np.concatenate([cand_scores, self._block_scores(coarse, start, end)], axis=1)
+            cand_rows = np.concatenate([cand_rows, np.broadcast_to(np.arange(start, end), (len(queries), end - start))], axis=1)
+            if cand_scores.shape[1] >= 2 * shortlist or (end == used and cand_scores.shape[1] > shortlist):
+                keep = np.argpartition(-cand_scores, shortlist - 1, axis=1)[:, :shortlist]
+                cand_scores = np.take_along_axis(cand_scores, keep, axis=1)
+                cand_rows = np.take_along_axis(cand_rows, keep, axis=1)
+        
+        results = []
+        for query, rows in zip(queries, cand_rows):
+            exact = np.concatenate([
+                (self.vectors[chunk].astype(np.float32) @ query) * self.scales[chunk]
+                for chunk in (rows[i:i + self.SCAN_ROWS] for i in range(0, len(rows), self.SCAN_ROWS))
+            ])
+            exact[~self.alive[rows]] = -np.inf
+            results.append(self._top_k(rows, exact, k))
+        return results
+    
+    def document(self, row: int) -> Document:
+        return Document(id=self.ids[row], page_content=self.texts[row], metadata=self.metadatas[row])
+    
+    def state(self) -> Dict:
+        """Live rows only, for pickling"""
+        rows = np.flatnonzero(self.alive[:len(self.ids)])
+        return {
+            "ids": [self.ids[row] for row in rows],
+            "texts": [self.texts[row] for row in rows],
+            "metadatas": [self.metadatas[row] for row in rows],
+            "vectors": None if self.vectors is None else self.vectors[rows],
+            "scales": self.scales[rows],
+        }
+    
+    @classmethod
+    def from_state(cls, state: Dict) -> "_VecPool":
+        """Rebuild a pool from state(); quantized vectors are adopted as-is, so a memory map stays one
+        
+        The adopted matrix is only read: tombstones live in alive, and the
+        first append past its length copies it into a new, growable array.
+        """
+        pool = cls()
+        if not state["ids"]:
+            return pool
+        if "scales" not in state:
+            pool.add(state["ids"], state["texts"], state["metadatas"], state["vectors"])
+            return pool
+        
+        pool.vectors = state["vectors"]
+        pool.scales = np.asarray(state["scales"], dtype=np.float32)
+        pool.alive = np.ones(len(state["ids"]), dtype=bool)
+        pool.ids = list(state["ids"])
+        pool.texts = list(state["texts"])
+        pool.metadatas = list(state["metadatas"])
+        pool._rows = {doc_id: row for row, doc_id in enumerate(pool.ids)}
+        return pool
+
+class InMemoryRetriever(BaseRetriever):
+    """Minimal LangChain retriever over an InMemoryVectorStoreService"""
+    
+    store: Any
+    k: int = 4
+    
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [doc for doc, _ in self.store.similarity_search_with_score(query, k=self.k)]
 
 class InMemoryVectorStoreService(BaseVectorStore):
     def __init__(
-        self, 
-        embedding_model: str = "text-embedding-3-small"
+        self,
+        embedding_model: str = "text-embedding-3-small",
+        max_concurrency: int = 8
     ):
         """
         Initialize InMemory vector store service
         
         Args:
             embedding_model: OpenAI embedding model to use
+            max_concurrency: Embedding requests sent at once when adding documents
         """
         self.embedding_model = embedding_model
+        self.embed_concurrency = max_concurrency
         
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY environment variable is required for OpenAI embeddings")
@@ -31,17 +251,34 @@ class InMemoryVectorStoreService(BaseVectorStore):
             openai_api_key=settings.OPENAI_API_KEY,
         )
         
-        self.vector_store = InMemoryVectorStore(embedding=self.embeddings)
+        self._pool = _VecPool()
+        self._lock = threading.Lock()
         
         self.store_type = "inmemory"
         
         self.cache_manager = VectorStoreCache()
         
-        print("Initialized InMemory vector store with caching support")
+        logger.info("Initialized InMemory vector store with caching support")
+    
+    def _add(self, ids: List[str], texts: List[str], metadatas: List[Dict], vectors) -> List[str]:
+        with self._lock:
+            return self._pool.add(ids, texts, metadatas, vectors)
+    
+    def _search_many(self, query_vectors: List[List[float]], k: int) -> List[List[tuple]]:
+        """Exact cosine top-k for several query vectors with one matrix product"""
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        
+        with self._lock:
+            pool = self._pool
+            return [
+                [(pool.document(row), score) for row, score in hits]
+                for hits in pool.search(queries, k)
+            ]
     
     def add_documents(
-        self, 
-        texts: List[str], 
+        self,
+        texts: List[str],
         metadatas: List[Dict],
         ids: Optional[List[str]] = None
     ) -> List[str]:
@@ -49,85 +286,70 @@ class InMemoryVectorStoreService(BaseVectorStore):
         if not ids:
             ids = [str(uuid.uuid4()) for _ in texts]
         
-        print(f"Adding {len(texts)} documents to InMemory vector store...")
+        logger.debug("Adding %d documents to InMemory vector store", len(texts))
         
         try:
-            documents = [
-                Document(id=doc_id, page_content=text, metadata=metadata)
-                for doc_id, text, metadata in zip(ids, texts, metadatas)
-            ]
-            
-            added_ids = self.vector_store.add_documents(documents)
+            added_ids = self._add(ids, texts, metadatas, self.embed_documents_unique(texts))
             
-            print(f"Successfully added {len(added_ids)} documents to InMemory vector store")
+            logger.debug("Successfully added %d documents to InMemory vector store", len(added_ids))
             return added_ids
-            
+        
         except Exception as e:
-            print(f"Error adding documents to InMemory vector store: {e}")
+            logger.error("Error adding documents to InMemory vector store: %s", e)
             raise
     
     def similarity_search_with_score(
-        self, 
-        query: str, 
+        self,
+        query: str,
         k: int = 10,
         filter: Optional[Dict] = None,
         namespace: Optional[str] = None
     ) -> List[tuple]:
         """Search with relevance scores (sync)"""
         try:
-            results = self.vector_store.similarity_search_with_score(
-                query=query, 
-                k=k
-            )
-            return results
-            
+            return self._search_many([self.embed_query_cached(query)], k)[0]
+        
         except Exception as e:
-            print(f"Error during similarity search with score: {e}")
+            logger.error("Error during similarity search with score: %s", e)
             return []
     
     def delete_documents(
-        self, 
+        self,
         ids: List[str],
         namespace: Optional[str] = None
     ) -> bool:
         """Delete documents by IDs (sync)"""
         try:
-            self.vector_store.delete(ids=ids)
-            print(f"Deleted {len(ids)} documents from InMemory vector store")
+            with self._lock:
+                self._pool.delete(ids)
+            logger.debug("Deleted %d documents from InMemory vector store", len(ids))
             return True
-            
+        
         except Exception as e:
-            print(f"Error deleting documents: {e}")
+            logger.error("Error deleting documents: %s", e)
             return False
     
     def get_document_count(self, namespace: Optional[str] = None) -> int:
         """Get total document count (sync)"""
-        try:
-            count = len(self.vector_store.store)
-            return count
-            
-        except Exception as e:
-            print(f"Error getting document count: {e}")
-            return 0
+        return len(self._pool)
     
     def delete_all_documents(self, namespace: Optional[str] = None) -> bool:
-        """Delete all documents from vector store (sync)"""
-        try:
-            all_ids = list(self.vector_store.store.keys())
-            if all_ids:
-                self.vector_store.delete(ids=all_ids)
-            
-            print(f"Deleted all documents from InMemory vector store")
-            return True
-            
-        except Exception as e:
-            print(f"Error deleting all documents: {e}")
-            return False
+        """Delete all documents from vector store (sync)
+        
+        Swaps in an empty pool rather than deleting ids one by one. The store
+        has no namespaces, so namespace is ignored.
+        """
+        with self._lock:
+            count = len(self._pool)
+            self._pool = _VecPool()
+        
+        logger.debug("Deleted all %d documents from InMemory vector store", count)
+        return True
     
     # Async methods (prefixed with 'a')
     async def aadd_documents(
-        self, 
-        texts: List[str], 
+        self,
+        texts: List[str],
         metadatas: List[Dict],
         ids: Optional[List[str]] = None
     ) -> List[str]:
@@ -135,115 +357,155 @@ class InMemoryVectorStoreService(BaseVectorStore):
         if not ids:
             ids = [str(uuid.uuid4()) for _ in texts]
         
-        print(f"Adding {len(texts)} documents to InMemory vector store (async)...")
+        logger.debug("Adding %d documents to InMemory vector store (async)", len(texts))
         
         try:
-            documents = [
-                Document(id=doc_id, page_content=text, metadata=metadata)
-                for doc_id, text, metadata in zip(ids, texts, metadatas)
-            ]
+            added_ids = self._add(ids, texts, metadatas, await self.aembed_documents_concurrent(texts))
             
-            added_ids = await self.vector_store.aadd_documents(documents)
-            
-            print(f"Successfully added {len(added_ids)} documents to InMemory vector store (async)")
+            logger.debug("Successfully added %d documents to InMemory vector store (async)", len(added_ids))
             return added_ids
-            
+        
         except Exception as e:
-            print(f"Error adding documents to InMemory vector store: {e}")
+            logger.error("Error adding documents to InMemory vector store: %s", e)
             raise
     
+    async def aadd_with_vectors(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        vectors: List[List[float]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents with precomputed embeddings (async)"""
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        return self._add(ids, texts, metadatas, vectors)
     
     async def asimilarity_search(
-        self, 
-        query: str, 
+        self,
+        query: str,
         k: int = 10,
         filter: Optional[Dict] = None,
         namespace: Optional[str] = None
     ) -> List[Document]:
         """Perform similarity search in InMemory vector store (async)"""
-        try:
-            results = await self.vector_store.asimilarity_search(
-                query=query, 
-                k=k
-            )
-            return results
-            
-        except Exception as e:
-            print(f"Error during similarity search: {e}")
-            return []
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k, filter, namespace)]
     
     async def asimilarity_search_with_score(
-        self, 
-        query: str, 
+        self,
+        query: str,
         k: int = 10,
         filter: Optional[Dict] = None,
         namespace: Optional[str] = None
     ) -> List[tuple]:
         """Search with relevance scores (async)"""
         try:
-            results = await self.vector_store.asimilarity_search_with_score(
-                query=query, 
-                k=k
-            )
-            return results
-            
+            return self._search_many([await self.aembed_query_cached(query)], k)[0]
+        
         except Exception as e:
-            print(f"Error during similarity search with score: {e}")
+            logger.error("Error during similarity search with score: %s", e)
             return []
     
+    async def asimilarity_search_by_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[List[tuple]]:
+        """Search with relevance scores for several precomputed query vectors (async)"""
+        try:
+            return self._search_many(vectors, k)
+        
+        except Exception as e:
+            logger.error("Error during batched similarity search: %s", e)
+            return [[] for _ in vectors]
+    
     async def adelete_documents(
-        self, 
+        self,
         ids: List[str],
         namespace: Optional[str] = None
     ) -> bool:
         """Delete documents by IDs (async)"""
-        try:
-            await self.vector_store.adelete(ids=ids)
-            print(f"Deleted {len(ids)} documents from InMemory vector store (async)")
-            return True
-            
-        except Exception as e:
-            print(f"Error deleting documents: {e}")
-            return False
+        return self.delete_documents(ids, namespace)
     
     async def aget_document_count(self, namespace: Optional[str] = None) -> int:
         """Get total document count (async)"""
-        try:
-            count = len(self.vector_store.store)
-            return count
-            
-        except Exception as e:
-            print(f"Error getting document count: {e}")
-            return 0
+        return self.get_document_count(namespace)
     
     async def adelete_all_documents(self, namespace: Optional[str] = None) -> bool:
         """Delete all documents from vector store (async)"""
-        try:
-            all_ids = list(self.vector_store.store.keys())
-            if all_ids:
-                await self.vector_store.adelete(ids=all_ids)
-            
-            print(f"Deleted all documents from InMemory vector store (async)")
-            return True
-            
-        except Exception as e:
-            print(f"Error deleting all documents: {e}")
-            return False
+        return self.delete_all_documents(namespace)
     
     def as_retriever(self, **kwargs) -> Any:
         """Get retriever for RAG chains"""
-        return self.vector_store.as_retriever(**kwargs)
+        search_kwargs = kwargs.get("search_kwargs", {})
+        return InMemoryRetriever(store=self, k=search_kwargs.get("k", 4))
     
     def dump_to_file(self, file_path: str) -> bool:
         """Dump vector store to file for caching"""
         try:
-            self.vector_store.dump(file_path)
-            print(f"Dumped vector store to: {file_path}")
+            with self._lock:
+                state = self._pool.state()
+            vectors = state.pop("vectors")
+            state["shape"] = (0, 0) if vectors is None else vectors.shape
+            state["embedding_model"] = self.embedding_model
+            meta = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            
+            with open(file_path, "wb") as f:
+                f.write(_DUMP_MAGIC + bytes([_DUMP_VERSION]))
+                f.write(struct.pack("<Q", len(meta)))
+                f.write(meta)
+                f.write(b"\0" * (-f.tell() % _DUMP_ALIGN))
+                if vectors is not None:
+                    f.write(np.ascontiguousarray(vectors).tobytes())
+            logger.debug("Dumped vector store to: %s", file_path)
             return True
         except Exception as e:
-            print(f"Error dumping vector store: {e}")
+            logger.error("Error dumping vector store: %s", e)
             return False
     
+    def _read_dump(self, file_path: str) -> _VecPool:
+        """Read a dumped store; older pickled dumps and InMemoryVectorStore.dump (JSON) caches are still accepted
+        
+        Current dumps map the vector matrix straight from the file, so loading
+        costs only the metadata unpickle and pages are read on first search.
+        """
+        try:
+            with open(file_path, "rb") as f:
+                header = f.read(len(_DUMP_MAGIC) + 1)
+                if header[:len(_DUMP_MAGIC)] != _DUMP_MAGIC:
+                    f.seek(0)
+                    return _VecPool.from_state(pickle.load(f))
+                
+                version = header[-1]
+                if version > _DUMP_VERSION:
+                    raise ValueError(f"Unsupported vector store dump version {version}")
+                if version < 3:
+                    return _VecPool.from_state(pickle.load(f))
+                
+                (meta_length,) = struct.unpack("<Q", f.read(8))
+                state = pickle.loads(f.read(meta_length))
+                offset = f.tell() + (-f.tell() % _DUMP_ALIGN)
+            
+            model = state.pop("embedding_model", None)
+            if model is not None and model != self.embedding_model:
+                raise ValueError(f"Vector store dump was embedded with {model}, not {self.embedding_model}")
+            rows, dim = state.pop("shape")
+            state["vectors"] = np.memmap(file_path, dtype=np.int8, mode="r", offset=offset, shape=(rows, dim)) if rows else None
+            return _VecPool.from_state(state)
+        except pickle.UnpicklingError:
+            records = list(InMemoryVectorStore.load(file_path, embedding=self.embeddings).store.values())
+            pool = _VecPool()
+            if records:
+                pool.add(
+                    [record["id"] for record in records],
+                    [record["text"] for record in records],
+                    [record["metadata"] for record in records],
+                    [record["vector"] for record in records]
+                )
+            return pool
+    
     @classmethod
     def load_from_file(cls, file_path: str, embedding_model: str = "text-embedding-3-small") -> 'InMemoryVectorStoreService':
         """Load vector store from file"""
@@ -256,19 +518,19 @@ class InMemoryVectorStoreService(BaseVectorStore):
                 openai_api_key=settings.OPENAI_API_KEY
             )
             
-            vector_store = InMemoryVectorStore.load(file_path, embedding=embeddings)
-            
             service = cls.__new__(cls)
             service.embedding_model = embedding_model
             service.embeddings = embeddings
-            service.vector_store = vector_store
+            service._lock = threading.Lock()
+            service._pool = service._read_dump(file_path)
             service.store_type = "inmemory"
+            service.cache_manager = VectorStoreCache()
             
-            print(f"Loaded vector store from: {file_path}")
+            logger.debug("Loaded vector store from: %s", file_path)
             return service
-            
+        
         except Exception as e:
-            print(f"Error loading vector store: {e}")
+            logger.error("Error loading vector store: %s", e)
             raise
     
     def get_temp_dump_path(self) -> str:
@@ -288,15 +550,17 @@ class InMemoryVectorStoreService(BaseVectorStore):
         try:
             cached_path = self.cache_manager.get_cache_path(document_url)
             if cached_path:
-                print(f"Loading cached vector store for: {document_url[:50]}...")
+                logger.debug("Loading cached vector store for: %s", document_url[:50])
                 
-                self.vector_store = InMemoryVectorStore.load(cached_path, embedding=self.embeddings)
+                pool = self._read_dump(cached_path)
+                with self._lock:
+                    self._pool = pool
                 
-                print("Successfully loaded cached vector store")
+                logger.debug("Successfully loaded cached vector store")
                 return True
             return False
         except Exception as e:
-            print(f"Failed to load cached vector store: {e}")
+            logger.error("Failed to load cached vector store: %s", e)
             return False
     
     def save_to_cache(self, document_url: str) -> bool:
@@ -306,24 +570,28 @@ class InMemoryVectorStoreService(BaseVectorStore):
             if self.dump_to_file(temp_path):
                 success = self.cache_manager.cache_vector_store(document_url, temp_path)
                 if success:
-                    print("Successfully cached vector store for future use")
+                    logger.debug("Successfully cached vector store for future use")
                 return success
             return False
         except Exception as e:
-            print(f"Failed to cache vector store: {e}")
+            logger.error("Failed to cache vector store: %s", e)
             return False
     
     def has_cache(self, document_url: str) -> bool:
         """Check if cache exists for document URL"""
         return self.cache_manager.has_cached_store(document_url)
     
+    def alias_cache(self, document_url: str, target_url: str) -> bool:
+        """Reuse the cache saved for target_url for document_url. Returns True if successful."""
+        return self.cache_manager.alias_cache(document_url, target_url)
+    
     def clear_cache(self, document_url: Optional[str] = None) -> bool:
         """Clear cache for specific URL or all cache"""
         try:
             self.cache_manager.clear_cache(document_url)
             return True
         except Exception as e:
-            print(f"Error clearing cache: {e}")
+            logger.error("Error clearing cache: %s", e)
             return False
     
     def get_cache_stats(self) -> Dict[str, Any]:
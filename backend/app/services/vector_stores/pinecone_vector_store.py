@@ -5,11 +5,20 @@ from app.services.vector_stores.base_vector_store import BaseVectorStore
 from typing import List, Dict, Optional, Any
 from langchain.schema import Document
 from app.config.settings import settings
+import asyncio
 import uuid
 import time
+import threading
 import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 class PineconeVectorStoreService(BaseVectorStore):
+    UPSERT_BATCH_SIZE = 100
+    READY_TIMEOUT = 5.0  # seconds to wait for upserted vectors to become readable
+    READY_POLL_INTERVAL = 0.25
+    
     def __init__(
         self, 
         api_key: str, 
@@ -24,7 +33,11 @@ class PineconeVectorStoreService(BaseVectorStore):
         self.index_name = index_name
         self.embedding_model = embedding_model
         
-
+        # Total vectors in the index as tracked by this process; None until
+        # seeded from describe_index_stats, or once it may have drifted
+        self._doc_count: Optional[int] = None
+        self._count_lock = threading.Lock()
+        
         
         # Use OpenAI embeddings for OpenAI models, otherwise use Pinecone embeddings
         if embedding_model.startswith("text-embedding"):
@@ -61,7 +74,7 @@ class PineconeVectorStoreService(BaseVectorStore):
             existing_indexes = [index.name for index in self.pc.list_indexes()]
             
             if self.index_name not in existing_indexes:
-                print(f"Creating Pinecone index: {self.index_name}")
+                logger.info("Creating Pinecone index: %s", self.index_name)
                 
                 # Get dimension from embedding model
                 dimension = self._get_embedding_dimension()
@@ -77,15 +90,15 @@ class PineconeVectorStoreService(BaseVectorStore):
                 )
                 
                 # Wait for index to be ready
-                print("Waiting for index to be ready...")
+                logger.info("Waiting for index to be ready")
                 time.sleep(10)
             
-            return self.pc.Index(self.index_name)
+            return self.pc.Index(self.index_name, pool_threads=4)
             
         except Exception as e:
-            print(f"Error setting up Pinecone index: {e}")
+            logger.error("Error setting up Pinecone index: %s", e)
             # Try to get existing index anyway
-            return self.pc.Index(self.index_name)
+            return self.pc.Index(self.index_name, pool_threads=4)
     
     def _get_embedding_dimension(self):
         """Get dimension based on embedding model"""
@@ -103,88 +116,106 @@ class PineconeVectorStoreService(BaseVectorStore):
         metadatas: List[Dict],
         ids: Optional[List[str]] = None
     ) -> List[str]:
-        """Add documents to Pinecone vector store and wait for indexing to complete"""
-        if not ids:
-            ids = [str(uuid.uuid4()) for _ in texts]
+        """Add documents to Pinecone vector store"""
+        logger.debug("Adding %d documents to Pinecone", len(texts))
         
-        # Pinecone requires string values for metadata
-        enhanced_metadatas = []
-        for metadata in metadatas:
-            enhanced_metadata = metadata.copy()
-            # Convert all values to strings for Pinecone compatibility
-            enhanced_metadata = {k: str(v) for k, v in enhanced_metadata.items()}
-            enhanced_metadatas.append(enhanced_metadata)
+        return self._upsert(texts, metadatas, ids, self.embed_documents_unique(texts))
+    
+    async def aadd_documents(
+        self, 
+        texts: List[str], 
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents to Pinecone vector store (async)
         
-        print(f"📝 Adding {len(texts)} documents to Pinecone...")
+        Embedding batches are awaited concurrently and the blocking upsert runs
+        in a worker thread, so the event loop stays free during ingestion.
+        """
+        logger.debug("Adding %d documents to Pinecone (async)", len(texts))
         
-        # Add documents synchronously (blocking)
-        self.vector_store.add_texts(
-            texts=texts,
-            metadatas=enhanced_metadatas,
-            ids=ids,
-        )
-
-        print(f"⏳ Waiting for Pinecone indexing to complete...")
+        vectors = await self.aembed_documents_concurrent(texts)
+        return await asyncio.to_thread(self._upsert, texts, metadatas, ids, vectors)
+    
+    async def aadd_with_vectors(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        vectors: List[List[float]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents with precomputed embeddings (async)
         
-        # More robust indexing verification with exponential backoff
-        max_attempts = 15
-        base_delay = 1
-        document_id = enhanced_metadatas[0]["document_id"]
+        Lets DocumentProcessor overlap embedding of later batches with the
+        upsert of earlier ones.
+        """
+        return await asyncio.to_thread(self._upsert, texts, metadatas, ids, vectors)
+    
+    def _upsert(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: Optional[List[str]],
+        vectors: List[List[float]]
+    ) -> List[str]:
+        """Upsert embedded documents in parallel batches
         
-        for attempt in range(max_attempts):
-            try:
-                # Use a more reliable verification strategy
-                # 1. Try to search with document_id filter
-                test_filter = {"document_id": document_id}
-                test_results = self.vector_store.similarity_search(
-                    query="document content test search",
-                    k=3,
-                    filter=test_filter
-                )
-                
-                # 2. Also try searching for actual content from the first text
-                if not test_results and texts:
-                    # Use a snippet from the actual content for more reliable search
-                    search_snippet = texts[0][:50] if len(texts[0]) > 50 else texts[0]
-                    test_results = self.vector_store.similarity_search(
-                        query=search_snippet,
-                        k=2,
-                        filter=test_filter
-                    )
-                
-                if test_results and len(test_results) > 0:
-                    print(f"✅ Documents indexed and searchable after {attempt + 1} attempts")
-                    print(f"🔍 Found {len(test_results)} searchable documents")
-                    return ids
-                else:
-                    # Exponential backoff with jitter
-                    delay = min(base_delay * (2 ** min(attempt, 4)), 8)  # Cap at 8 seconds
-                    print(f"⏳ Waiting for indexing... (attempt {attempt + 1}/{max_attempts}, next check in {delay}s)")
-                    time.sleep(delay)
-                    
-            except Exception as e:
-                delay = min(base_delay * (2 ** min(attempt, 3)), 6)
-                print(f"⚠️ Error verifying indexing (attempt {attempt + 1}): {e}")
-                print(f"⏳ Retrying in {delay} seconds...")
-                time.sleep(delay)
+        Goes through the index client rather than add_texts. Pinecone is
+        eventually consistent, so an accepted batch may not be searchable yet;
+        _wait_until_readable fetches the last id of each batch until they are
+        visible or READY_TIMEOUT passes. That bounds the wait at a few cheap
+        fetches instead of the old search-based polling, at the cost that a
+        query issued right after a timed-out wait can miss the newest chunks.
+        The text goes under the metadata key PineconeVectorStore reads back.
         
-        # Final verification attempt
-        try:
-            final_test = self.vector_store.similarity_search(
-                query="final verification test",
-                k=1,
-                filter={"document_id": document_id}
-            )
-            if final_test:
-                print("✅ Final verification successful!")
-                return ids
-        except:
-            pass
-            
-        print("⚠️ Warning: Could not fully verify document indexing, but proceeding...")
-        print(f"📊 Added {len(ids)} document IDs to index")
+        Fresh ids always add vectors, so they move the tracked count;
+        caller-supplied ids may overwrite existing ones, so they invalidate it.
+        """
+        fresh_ids = not ids
+        if fresh_ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        
+        # Pinecone requires string values for metadata; build the converted
+        # dicts in one pass rather than copying each dict first
+        records = [
+            {
+                "id": doc_id,
+                "values": vector,
+                "metadata": {**{k: v if type(v) is str else str(v) for k, v in metadata.items()}, "text": text}
+            }
+            for doc_id, vector, metadata, text in zip(ids, vectors, metadatas, texts)
+        ]
+        upserts = [
+            self.index.upsert(vectors=records[start:start + self.UPSERT_BATCH_SIZE], async_req=True)
+            for start in range(0, len(records), self.UPSERT_BATCH_SIZE)
+        ]
+        for upsert in upserts:
+            upsert.get()
+        if fresh_ids:
+            self._adjust_count(len(ids))
+        else:
+            self._invalidate_count()
+        self._wait_until_readable(ids[self.UPSERT_BATCH_SIZE - 1::self.UPSERT_BATCH_SIZE] + ids[-1:])
+        
+        logger.debug("Upserted %d documents in %d batches", len(ids), len(upserts))
         return ids
     
+    def _wait_until_readable(self, ids: List[str]):
+        """Poll fetch until every id is readable, giving up after READY_TIMEOUT"""
+        pending = set(ids)
+        deadline = time.monotonic() + self.READY_TIMEOUT
+        while pending:
+            try:
+                pending -= set(self.index.fetch(ids=list(pending)).vectors)
+            except Exception as e:
+                logger.debug("Readiness fetch failed: %s", e)
+            if not pending:
+                return
+            if time.monotonic() >= deadline:
+                logger.warning("%d upserted vectors not yet readable after %.1fs", len(pending), self.READY_TIMEOUT)
+                return
+            time.sleep(self.READY_POLL_INTERVAL)
+    
     def similarity_search(
         self, 
         query: str, 
@@ -220,6 +251,29 @@ class PineconeVectorStoreService(BaseVectorStore):
         # Direct synchronous call
         return self.vector_store.similarity_search_with_score(query, **search_kwargs)
     
+    async def asimilarity_search_by_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[List[tuple]]:
+        """Search with relevance scores for several precomputed query vectors (async)
+        
+        Pinecone has no batch query endpoint, so the queries run concurrently
+        in worker threads.
+        """
+        search_kwargs = {"k": k}
+        if filter:
+            search_kwargs["filter"] = {k: str(v) for k, v in filter.items()}
+        if namespace:
+            search_kwargs["namespace"] = namespace
+        
+        return await asyncio.gather(*[
+            asyncio.to_thread(self.vector_store.similarity_search_by_vector_with_score, vector, **search_kwargs)
+            for vector in vectors
+        ])
+    
     def as_retriever(self, **kwargs) -> Any:
         """Get Pinecone retriever for RAG chains"""
         return self.vector_store.as_retriever(**kwargs)
@@ -235,60 +289,62 @@ class PineconeVectorStoreService(BaseVectorStore):
                 self.index.delete(ids=ids, namespace=namespace)
             else:
                 self.index.delete(ids=ids)
+            # Pinecone doesn't report how many of the ids existed, and a
+            # namespaced delete also changes the total
+            self._invalidate_count()
             return True
         except Exception:
             return False
     
+    def _adjust_count(self, delta: int):
+        """Apply an upsert of new vectors to the tracked count, if it has been seeded"""
+        with self._count_lock:
+            if self._doc_count is not None:
+                self._doc_count = max(self._doc_count + delta, 0)
+    
+    def _invalidate_count(self):
+        """Forget the tracked count so the next read reseeds it from describe_index_stats"""
+        with self._count_lock:
+            self._doc_count = None
+    
     def get_document_count(self, namespace: Optional[str] = None) -> int:
-        """Get document count from Pinecone"""
+        """Get document count from Pinecone
+        
+        The index total is served from the count tracked across this
+        process's upserts of new ids; the first call, calls after a delete or
+        an upsert of caller-supplied ids, and calls for a single namespace go
+        to describe_index_stats.
+        """
+        if not namespace and self._doc_count is not None:
+            return self._doc_count
+        
         try:
             stats = self.index.describe_index_stats()
-            if namespace and namespace in stats.namespaces:
-                return stats.namespaces[namespace].vector_count
-            return stats.total_vector_count
+            if namespace:
+                return stats.namespaces[namespace].vector_count if namespace in stats.namespaces else 0
+            with self._count_lock:
+                self._doc_count = stats.total_vector_count
+            return self._doc_count
         except Exception:
             return 0
     
     def delete_all_documents(self, namespace: Optional[str] = None) -> bool:
-        """Delete all documents from Pinecone index and wait for deletion to propagate"""
+        """Delete all documents from Pinecone index"""
         try:
-            print(f"🗑️ Deleting all documents from Pinecone index: {self.index_name}")
+            logger.debug("Deleting all documents from Pinecone index: %s", self.index_name)
             
             if namespace:
                 self.index.delete(delete_all=True, namespace=namespace)
             else:
                 self.index.delete(delete_all=True)
             
-            # Wait for deletion to propagate to avoid conflicts with subsequent requests
-            print("⏳ Waiting for deletion to propagate...")
-            time.sleep(3)
-            
-            # Verify deletion by checking document count
-            max_attempts = 8
-            for attempt in range(max_attempts):
-                try:
-                    stats = self.index.describe_index_stats()
-                    total_count = stats.total_vector_count
-                    
-                    if namespace and namespace in stats.namespaces:
-                        namespace_count = stats.namespaces[namespace].vector_count
-                        if namespace_count == 0:
-                            print(f"✅ All documents deleted from namespace '{namespace}'")
-                            return True
-                    elif total_count == 0:
-                        print(f"✅ All documents deleted from Pinecone index")
-                        return True
-                    else:
-                        print(f"⏳ Waiting for deletion to complete... ({total_count} docs remaining, attempt {attempt + 1})")
-                        time.sleep(1)
-                        
-                except Exception as e:
-                    print(f"⚠️ Error checking deletion status (attempt {attempt + 1}): {e}")
-                    time.sleep(1)
+            with self._count_lock:
+                # A namespaced delete changes the total by an unknown amount
+                self._doc_count = None if namespace else 0
             
-            print(f"✅ Deletion command sent successfully (may still be propagating)")
+            logger.debug("Deletion command sent successfully")
             return True
             
         except Exception as e:
-            print(f"❌ Error deleting documents: {e}")
+            logger.error("Error deleting documents: %s", e)
             return False
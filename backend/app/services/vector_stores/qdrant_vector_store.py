@@ -1,14 +1,17 @@
 from langchain_qdrant import QdrantVectorStore
 from langchain_openai import OpenAIEmbeddings
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.http.models import Distance, VectorParams, QueryRequest, PointStruct
 from app.services.vector_stores.base_vector_store import BaseVectorStore
 from typing import List, Dict, Optional, Any
 from langchain.schema import Document
 from app.config.settings import settings
+import asyncio
 import uuid
-import time
 import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 class QdrantVectorStoreService(BaseVectorStore):
     def __init__(
@@ -18,7 +21,8 @@ class QdrantVectorStoreService(BaseVectorStore):
         url: Optional[str] = None,
         api_key: Optional[str] = None,
         path: Optional[str] = None,
-        prefer_grpc: bool = True
+        prefer_grpc: bool = True,
+        pool_size: int = 32
     ):
         """
         Initialize Qdrant vector store service
@@ -30,6 +34,8 @@ class QdrantVectorStoreService(BaseVectorStore):
             api_key: API key for Qdrant cloud
             path: Local path for on-disk storage (for local mode)
             prefer_grpc: Whether to prefer gRPC protocol
+            pool_size: Connections in the client's gRPC/HTTP pool, so concurrent
+                       upserts and searches are not serialized on a few streams
         """
         self.collection_name = collection_name
         self.embedding_model = embedding_model
@@ -37,6 +43,7 @@ class QdrantVectorStoreService(BaseVectorStore):
         self.api_key = api_key
         self.path = path
         self.prefer_grpc = prefer_grpc
+        self.pool_size = pool_size
         
         # Set OpenAI API key for embeddings
         if not settings.OPENAI_API_KEY:
@@ -50,6 +57,7 @@ class QdrantVectorStoreService(BaseVectorStore):
         
         # Initialize Qdrant client based on configuration
         self.client = self._initialize_client()
+        self.async_client = self._initialize_async_client()
         
         # Create or get collection
         self._setup_collection()
@@ -61,27 +69,49 @@ class QdrantVectorStoreService(BaseVectorStore):
             embedding=self.embeddings
         )
         
+        self.embed_batch_size = settings.EMBEDDING_BATCH_SIZE
+        self.embed_concurrency = settings.EMBEDDING_CONCURRENCY
+        
         self.store_type = "qdrant"
     
     def _initialize_client(self) -> QdrantClient:
         """Initialize Qdrant client based on configuration"""
         if self.url:
             # Cloud or server deployment
-            print(f"🔗 Connecting to Qdrant server at {self.url}")
+            logger.info("Connecting to Qdrant server at %s", self.url)
             return QdrantClient(
                 url=self.url,
                 api_key=self.api_key,
-                prefer_grpc=self.prefer_grpc
+                prefer_grpc=self.prefer_grpc,
+                pool_size=self.pool_size,
+                timeout=60
             )
         elif self.path:
             # Local on-disk storage
-            print(f"💾 Using Qdrant local storage at {self.path}")
+            logger.info("Using Qdrant local storage at %s", self.path)
             return QdrantClient(path=self.path)
         else:
             # In-memory storage
-            print("🧠 Using Qdrant in-memory storage")
+            logger.info("Using Qdrant in-memory storage")
             return QdrantClient(":memory:")
     
+    def _initialize_async_client(self) -> Optional[AsyncQdrantClient]:
+        """Async client for server deployments
+        
+        Local and in-memory modes keep their data inside the sync client, so
+        they have no async client and async calls run the sync ones in a
+        worker thread instead.
+        """
+        if not self.url:
+            return None
+        return AsyncQdrantClient(
+            url=self.url,
+            api_key=self.api_key,
+            prefer_grpc=self.prefer_grpc,
+            pool_size=self.pool_size,
+            timeout=60
+        )
+    
     def _get_embedding_dimension(self) -> int:
         """Get dimension based on embedding model"""
         model_dimensions = {
@@ -99,7 +129,7 @@ class QdrantVectorStoreService(BaseVectorStore):
             collection_names = [col.name for col in collections.collections]
             
             if self.collection_name not in collection_names:
-                print(f"📚 Creating Qdrant collection: {self.collection_name}")
+                logger.info("Creating Qdrant collection: %s", self.collection_name)
                 
                 # Get dimension from embedding model
                 dimension = self._get_embedding_dimension()
@@ -111,12 +141,12 @@ class QdrantVectorStoreService(BaseVectorStore):
                         distance=Distance.COSINE
                     )
                 )
-                print(f"✅ Created collection '{self.collection_name}' with dimension {dimension}")
+                logger.info("Created collection '%s' with dimension %s", self.collection_name, dimension)
             else:
-                print(f"✅ Collection '{self.collection_name}' already exists")
+                logger.info("Collection '%s' already exists", self.collection_name)
                 
         except Exception as e:
-            print(f"⚠️ Error setting up collection: {e}")
+            logger.error("Error setting up collection: %s", e)
             raise
     
     def add_documents(
@@ -129,44 +159,111 @@ class QdrantVectorStoreService(BaseVectorStore):
         if not ids:
             ids = [str(uuid.uuid4()) for _ in texts]
         
-        print(f"📝 Adding {len(texts)} documents to Qdrant...")
+        logger.debug("Adding %d documents to Qdrant", len(texts))
         
         try:
-            # Create Document objects
-            documents = [
-                Document(page_content=text, metadata=metadata)
-                for text, metadata in zip(texts, metadatas)
-            ]
-            
-            # Add documents to Qdrant
-            added_ids = self.vector_store.add_documents(documents, ids=ids)
-            
-            print(f"✅ Successfully added {len(added_ids)} documents to Qdrant")
-            
-            # Wait a moment for indexing
-            time.sleep(1)
-            
-            # Verify documents were added
-            if self._verify_documents_added(metadatas[0].get("document_id") if metadatas else None):
-                print("🔍 Documents verified and searchable")
-            
-            return added_ids
+            return self._upsert(texts, metadatas, ids, self.embed_documents_unique(texts))
             
         except Exception as e:
-            print(f"❌ Error adding documents to Qdrant: {e}")
+            logger.error("Error adding documents to Qdrant: %s", e)
             raise
     
-    def _verify_documents_added(self, document_id: Optional[str] = None) -> bool:
-        """Verify that documents were successfully added and are searchable"""
+    async def aadd_documents(
+        self, 
+        texts: List[str], 
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents to Qdrant vector store (async)
+        
+        Embedding requests of embed_batch_size texts are sent concurrently and
+        the vectors are upserted directly, so nothing is embedded twice.
+        """
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        
+        logger.debug("Adding %d documents to Qdrant (async)", len(texts))
+        
         try:
-            # Simple search without filter - just verify documents exist
-            test_results = self.vector_store.similarity_search(
-                query="test verification search",
-                k=1
+            vectors = await self.aembed_documents_concurrent(texts)
+            return await self._aupsert(texts, metadatas, ids, vectors)
+            
+        except Exception as e:
+            logger.error("Error adding documents to Qdrant: %s", e)
+            raise
+    
+    async def aadd_with_vectors(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        vectors: List[List[float]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents with precomputed embeddings (async)"""
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        return await self._aupsert(texts, metadatas, ids, vectors)
+    
+    def _points(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        vectors: List[List[float]]
+    ) -> List[PointStruct]:
+        """Build points with the payload layout QdrantVectorStore reads back"""
+        vector_name = self.vector_store.vector_name
+        content_key = self.vector_store.content_payload_key
+        metadata_key = self.vector_store.metadata_payload_key
+        return [
+            PointStruct(
+                id=doc_id,
+                vector={vector_name: vector} if vector_name else vector,
+                payload={content_key: text, metadata_key: metadata}
             )
-            return len(test_results) > 0
-        except Exception:
-            return False
+            for doc_id, text, metadata, vector in zip(ids, texts, metadatas, vectors)
+        ]
+    
+    def _upsert(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        vectors: List[List[float]]
+    ) -> List[str]:
+        """Upsert embedded documents
+        
+        wait=True returns once the points are applied, so they are searchable
+        without a separate verification search.
+        """
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=self._points(texts, metadatas, ids, vectors),
+            wait=True
+        )
+        
+        logger.debug("Successfully added %d documents to Qdrant", len(ids))
+        return ids
+    
+    async def _aupsert(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        vectors: List[List[float]]
+    ) -> List[str]:
+        """Upsert embedded documents with the async client, if there is one"""
+        if self.async_client is None:
+            return await asyncio.to_thread(self._upsert, texts, metadatas, ids, vectors)
+        
+        await self.async_client.upsert(
+            collection_name=self.collection_name,
+            points=self._points(texts, metadatas, ids, vectors),
+            wait=True
+        )
+        
+        logger.debug("Successfully added %d documents to Qdrant (async)", len(ids))
+        return ids
     
     def similarity_search_with_score(
         self, 
@@ -182,9 +279,74 @@ class QdrantVectorStoreService(BaseVectorStore):
             return results
             
         except Exception as e:
-            print(f"❌ Error during similarity search with score: {e}")
+            logger.error("Error during similarity search with score: %s", e)
             return []
     
+    def similarity_search_by_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[List[tuple]]:
+        """Search with relevance scores for several precomputed query vectors in one request"""
+        try:
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=self._query_requests(vectors, k)
+            )
+            return self._results(responses)
+            
+        except Exception as e:
+            logger.error("Error during batched similarity search: %s", e)
+            return [[] for _ in vectors]
+    
+    async def asimilarity_search_by_vectors(
+        self,
+        vectors: List[List[float]],
+        k: int = 10,
+        filter: Optional[Dict] = None,
+        namespace: Optional[str] = None
+    ) -> List[List[tuple]]:
+        """Search with relevance scores for several precomputed query vectors (async)"""
+        if self.async_client is None:
+            return await asyncio.to_thread(self.similarity_search_by_vectors, vectors, k, filter, namespace)
+        
+        try:
+            responses = await self.async_client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=self._query_requests(vectors, k)
+            )
+            return self._results(responses)
+            
+        except Exception as e:
+            logger.error("Error during batched similarity search: %s", e)
+            return [[] for _ in vectors]
+    
+    def _query_requests(self, vectors: List[List[float]], k: int) -> List[QueryRequest]:
+        return [
+            QueryRequest(query=list(vector), limit=k, with_payload=True)
+            for vector in vectors
+        ]
+    
+    def _results(self, responses) -> List[List[tuple]]:
+        """Convert batched query responses into (Document, score) lists"""
+        content_key = self.vector_store.content_payload_key
+        metadata_key = self.vector_store.metadata_payload_key
+        return [
+            [
+                (
+                    Document(
+                        page_content=(point.payload or {}).get(content_key, ""),
+                        metadata=(point.payload or {}).get(metadata_key) or {}
+                    ),
+                    point.score
+                )
+                for point in response.points
+            ]
+            for response in responses
+        ]
+    
     def as_retriever(self, **kwargs) -> Any:
         """Get retriever for RAG chains"""
         return self.vector_store.as_retriever(**kwargs)
@@ -198,11 +360,11 @@ class QdrantVectorStoreService(BaseVectorStore):
         try:
             # Qdrant uses delete method
             self.vector_store.delete(ids)
-            print(f"🗑️ Deleted {len(ids)} documents from Qdrant")
+            logger.debug("Deleted %d documents from Qdrant", len(ids))
             return True
             
         except Exception as e:
-            print(f"❌ Error deleting documents: {e}")
+            logger.error("Error deleting documents: %s", e)
             return False
     
     def get_document_count(self, namespace: Optional[str] = None) -> int:
@@ -212,7 +374,7 @@ class QdrantVectorStoreService(BaseVectorStore):
             return collection_info.points_count or 0
             
         except Exception as e:
-            print(f"❌ Error getting document count: {e}")
+            logger.error("Error getting document count: %s", e)
             return 0
     
     def delete_all_documents(self, namespace: Optional[str] = None) -> bool:
@@ -229,9 +391,9 @@ class QdrantVectorStoreService(BaseVectorStore):
                 embedding=self.embeddings
             )
             
-            print(f"🗑️ Deleted all documents from collection '{self.collection_name}'")
+            logger.debug("Deleted all documents from collection '%s'", self.collection_name)
             return True
             
         except Exception as e:
-            print(f"❌ Error deleting all documents: {e}")
+            logger.error("Error deleting all documents: %s", e)
             return False
@@ -9,6 +9,9 @@ import uuid
 import time
 import os
 import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
 
 class SupabaseVectorStoreService(BaseVectorStore):
     def __init__(
@@ -46,6 +49,9 @@ class SupabaseVectorStoreService(BaseVectorStore):
             chunk_size=settings.CHUNK_SIZE,
         )
         
+        self.embed_batch_size = settings.EMBEDDING_BATCH_SIZE
+        self.embed_concurrency = settings.EMBEDDING_CONCURRENCY
+        
         self.store_type = "supabase"
         
         self._verify_database_setup()
@@ -54,10 +60,10 @@ class SupabaseVectorStoreService(BaseVectorStore):
         """Verify that the database has the required table and function"""
         try:
             result = self.supabase_client.table(self.table_name).select("id").limit(1).execute()
-            print(f"✅ Supabase table '{self.table_name}' is accessible")
+            logger.info("Supabase table '%s' is accessible", self.table_name)
         except Exception as e:
-            print(f"⚠️ Warning: Could not verify Supabase table '{self.table_name}': {e}")
-            print("💡 Make sure you have created the documents table with the pgvector extension")
+            logger.warning("Could not verify Supabase table '%s': %s", self.table_name, e)
+            logger.warning("Make sure you have created the documents table with the pgvector extension")
     
     def _get_embedding_dimension(self):
         """Get dimension based on embedding model"""
@@ -78,23 +84,68 @@ class SupabaseVectorStoreService(BaseVectorStore):
         if not ids:
             ids = [str(uuid.uuid4()) for _ in texts]
         
-        print(f"📝 Adding {len(texts)} documents to Supabase...")
+        logger.debug("Adding %d documents to Supabase", len(texts))
         
         try:
-            documents = [
-                Document(page_content=text, metadata=metadata)
-                for text, metadata in zip(texts, metadatas)
-            ]
+            return self._add_vectors(texts, metadatas, ids, self.embed_documents_unique(texts))
             
-            added_ids = self.vector_store.add_documents(documents, ids=ids)
-            
-            print(f"✅ Successfully added {len(added_ids)} documents to Supabase")
-            return added_ids
+        except Exception as e:
+            logger.error("Error adding documents to Supabase: %s", e)
+            raise e
+    
+    async def aadd_documents(
+        self, 
+        texts: List[str], 
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents to Supabase vector store (async)
+        
+        Embedding requests of embed_batch_size texts are sent concurrently and
+        the vectors are inserted directly, so nothing is embedded twice.
+        """
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        
+        logger.debug("Adding %d documents to Supabase (async)", len(texts))
+        
+        try:
+            vectors = await self.aembed_documents_concurrent(texts)
+            return await asyncio.to_thread(self._add_vectors, texts, metadatas, ids, vectors)
             
         except Exception as e:
-            print(f"❌ Error adding documents to Supabase: {e}")
+            logger.error("Error adding documents to Supabase: %s", e)
             raise e
     
+    async def aadd_with_vectors(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        vectors: List[List[float]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add documents with precomputed embeddings (async)"""
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        return await asyncio.to_thread(self._add_vectors, texts, metadatas, ids, vectors)
+    
+    def _add_vectors(
+        self,
+        texts: List[str],
+        metadatas: List[Dict],
+        ids: List[str],
+        vectors: List[List[float]]
+    ) -> List[str]:
+        """Insert embedded documents through SupabaseVectorStore's vector-in path"""
+        documents = [
+            Document(page_content=text, metadata=metadata)
+            for text, metadata in zip(texts, metadatas)
+        ]
+        added_ids = self.vector_store.add_vectors(vectors, documents, ids)
+        
+        logger.debug("Successfully added %d documents to Supabase", len(added_ids))
+        return added_ids
+    
     def similarity_search_with_score(
         self, 
         query: str, 
@@ -134,14 +185,14 @@ class SupabaseVectorStoreService(BaseVectorStore):
             result = self.supabase_client.table(self.table_name).delete().in_("id", ids).execute()
             
             if result.data:
-                print(f"✅ Deleted {len(result.data)} documents from Supabase")
+                logger.debug("Deleted %d documents from Supabase", len(result.data))
                 return True
             else:
-                print("⚠️ No documents were deleted (they may not exist)")
+                logger.warning("No documents were deleted (they may not exist)")
                 return False
                 
         except Exception as e:
-            print(f"❌ Error deleting documents from Supabase: {e}")
+            logger.error("Error deleting documents from Supabase: %s", e)
             return False
     
     def get_document_count(self, namespace: Optional[str] = None) -> int:
@@ -156,25 +207,25 @@ class SupabaseVectorStoreService(BaseVectorStore):
             return result.count if result.count is not None else 0
             
         except Exception as e:
-            print(f"❌ Error getting document count from Supabase: {e}")
+            logger.error("Error getting document count from Supabase: %s", e)
             return 0
     
     def delete_all_documents(self, namespace: Optional[str] = None) -> bool:
         """Delete all documents from Supabase"""
         try:
-            print(f"🗑️ Deleting all documents from Supabase table: {self.table_name}")
+            logger.debug("Deleting all documents from Supabase table: %s", self.table_name)
             
             if namespace:
                 result = self.supabase_client.table(self.table_name).delete().eq("metadata->namespace", namespace).execute()
                 deleted_count = len(result.data) if result.data else 0
-                print(f"✅ Deleted {deleted_count} documents from namespace '{namespace}' in Supabase")
+                logger.debug("Deleted %s documents from namespace '%s' in Supabase", deleted_count, namespace)
             else:
                 result = self.supabase_client.table(self.table_name).delete().neq("id", "00000000-0000-0000-0000-000000000000").execute()
                 deleted_count = len(result.data) if result.data else 0
-                print(f"✅ Deleted all {deleted_count} documents from Supabase")
+                logger.debug("Deleted all %s documents from Supabase", deleted_count)
             
             return True
             
         except Exception as e:
-            print(f"❌ Error deleting all documents from Supabase: {e}")
+            logger.error("Error deleting all documents from Supabase: %s", e)
             return False
@@ -1,10 +1,14 @@
 import os
 import hashlib
 import json
+import logging
 import shutil
 from pathlib import Path
 from typing import Optional, Dict, Any
 from app.config.settings import settings
+from app.services.retrievers.semantic_answer_cache import semantic_answer_cache
+
+logger = logging.getLogger(__name__)
 
 class VectorStoreCache:
     """Manages caching of vector stores based on document URLs"""
@@ -21,7 +25,7 @@ class VectorStoreCache:
         self.metadata_file = self.cache_dir / "cache_metadata.json"
         self.metadata = self._load_metadata()
         
-        print(f"Vector store cache initialized at: {self.cache_dir}")
+        logger.info("Vector store cache initialized at: %s", self.cache_dir)
     
     def _load_metadata(self) -> Dict[str, Any]:
         """Load cache metadata from file"""
@@ -30,7 +34,7 @@ class VectorStoreCache:
                 with open(self.metadata_file, 'r') as f:
                     return json.load(f)
             except Exception as e:
-                print(f"Error loading cache metadata: {e}")
+                logger.error("Error loading cache metadata: %s", e)
                 return {}
         return {}
     
@@ -40,7 +44,38 @@ class VectorStoreCache:
             with open(self.metadata_file, 'w') as f:
                 json.dump(self.metadata, f, indent=2)
         except Exception as e:
-            print(f"Error saving cache metadata: {e}")
+            logger.error("Error saving cache metadata: %s", e)
+    
+    @staticmethod
+    def build_cache_key(
+        document_url: str,
+        fingerprint: str = "",
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        embedding_model: Optional[str] = None,
+        variant: Optional[str] = None
+    ) -> str:
+        """Build a content-aware cache key for a processed document
+        
+        Combines the URL with the remote validator (ETag/Last-Modified) and the
+        settings that shape the index, so a changed document or a different
+        chunking/embedding configuration never reuses a stale store.
+        
+        Args:
+            document_url: The document URL
+            fingerprint: ETag or Last-Modified value of the remote file
+            chunk_size: Chunk size used when splitting
+            chunk_overlap: Chunk overlap used when splitting
+            embedding_model: Embedding model used for the vectors
+            variant: Loader variant (e.g. 'llm' / 'std')
+        """
+        parts = [document_url]
+        if variant:
+            parts.append(variant)
+        parts.append(f"etag={fingerprint}")
+        parts.append(f"chunks={chunk_size}/{chunk_overlap}")
+        parts.append(f"model={embedding_model}")
+        return "::".join(parts)
     
     def _get_cache_key(self, document_url: str) -> str:
         """Generate cache key from document URL"""
@@ -50,9 +85,14 @@ class VectorStoreCache:
         """Get cache file path for a given cache key"""
         return self.cache_dir / f"{cache_key}.vs"
     
+    def _resolve_cache_key(self, document_url: str) -> str:
+        """Cache key whose file holds the store for a document URL, following an alias"""
+        cache_key = self._get_cache_key(document_url)
+        return self.metadata.get(cache_key, {}).get("alias_of", cache_key)
+    
     def has_cached_store(self, document_url: str) -> bool:
         """Check if a cached vector store exists for the document URL"""
-        cache_key = self._get_cache_key(document_url)
+        cache_key = self._resolve_cache_key(document_url)
         cache_path = self._get_cache_path(cache_key)
         
         if cache_path.exists() and cache_key in self.metadata:
@@ -62,13 +102,37 @@ class VectorStoreCache:
     
     def get_cache_path(self, document_url: str) -> Optional[str]:
         """Get cache file path for a document URL if it exists"""
-        cache_key = self._get_cache_key(document_url)
+        cache_key = self._resolve_cache_key(document_url)
         cache_path = self._get_cache_path(cache_key)
         
         if cache_path.exists() and cache_key in self.metadata:
             return str(cache_path)
         return None
     
+    def alias_cache(self, document_url: str, target_url: str) -> bool:
+        """Point document_url at the store already cached for target_url, without another dump
+        
+        Args:
+            document_url: The URL (or cache key) to add
+            target_url: The URL (or cache key) whose cached store it should load
+            
+        Returns:
+            bool: Success status
+        """
+        target_key = self._resolve_cache_key(target_url)
+        if target_key not in self.metadata:
+            return False
+        
+        cache_key = self._get_cache_key(document_url)
+        if cache_key != target_key:
+            self.metadata[cache_key] = {
+                "document_url": document_url,
+                "alias_of": target_key,
+            }
+            self._save_metadata()
+            logger.debug("Aliased cached vector store for URL: %s", document_url[:50])
+        return True
+    
     def cache_vector_store(self, document_url: str, vector_store_path: str) -> bool:
         """Cache a vector store for a document URL
         
@@ -94,14 +158,14 @@ class VectorStoreCache:
                 }
                 
                 self._save_metadata()
-                print(f"Cached vector store for URL: {document_url[:50]}...")
+                logger.debug("Cached vector store for URL: %s", document_url[:50])
                 return True
             else:
-                print(f"Vector store file not found: {vector_store_path}")
+                logger.warning("Vector store file not found: %s", vector_store_path)
                 return False
                 
         except Exception as e:
-            print(f"Error caching vector store: {e}")
+            logger.error("Error caching vector store: %s", e)
             return False
     
     def get_cache_info(self, document_url: str) -> Optional[Dict[str, Any]]:
@@ -112,6 +176,9 @@ class VectorStoreCache:
     def clear_cache(self, document_url: Optional[str] = None):
         """Clear cache for specific URL or all cache
         
+        Answers cached against the document are dropped as well, since they
+        are stale once its store is gone.
+        
         Args:
             document_url: Specific URL to clear, None to clear all
         """
@@ -125,19 +192,24 @@ class VectorStoreCache:
                 
                 if cache_key in self.metadata:
                     del self.metadata[cache_key]
+                
+                # Aliases of a removed store would point at a missing file
+                for key in [key for key, entry in self.metadata.items() if entry.get("alias_of") == cache_key]:
+                    del self.metadata[key]
                     
-                print(f"Cleared cache for URL: {document_url[:50]}...")
+                logger.debug("Cleared cache for URL: %s", document_url[:50])
             else:
                 for cache_file in self.cache_dir.glob("*.vs"):
                     cache_file.unlink()
                 
                 self.metadata.clear()
-                print("Cleared all vector store cache")
+                logger.debug("Cleared all vector store cache")
             
             self._save_metadata()
+            semantic_answer_cache.clear(document_url)
             
         except Exception as e:
-            print(f"Error clearing cache: {e}")
+            logger.error("Error clearing cache: %s", e)
     
     def list_cached_urls(self) -> list:
         """List all cached document URLs"""
@@ -2,6 +2,8 @@ from app.services.vector_stores.pinecone_vector_store import PineconeVectorStore
 from app.services.vector_stores.supabase_vector_store import SupabaseVectorStoreService
 from app.services.vector_stores.qdrant_vector_store import QdrantVectorStoreService
 from app.services.vector_stores.inmemory_vector_store import InMemoryVectorStoreService
+from app.services.vector_stores.hnsw_vector_store import HNSWVectorStoreService
+from app.services.vector_stores.faiss_vector_store import FaissIVFPQVectorStoreService
 from app.services.vector_stores.base_vector_store import BaseVectorStore
 from app.config.settings import Settings
 
@@ -27,8 +29,12 @@ class VectorStoreFactory:
             instance = VectorStoreFactory._create_qdrant_store(settings)
         elif vector_store_type == "inmemory":
             instance = VectorStoreFactory._create_inmemory_store(settings)
+        elif vector_store_type == "hnsw":
+            instance = VectorStoreFactory._create_hnsw_store(settings)
+        elif vector_store_type == "ivfpq":
+            instance = VectorStoreFactory._create_ivfpq_store(settings)
         else:
-            raise ValueError(f"Unsupported vector store type: {vector_store_type}. Supported types: 'pinecone', 'supabase', 'qdrant', 'inmemory'")
+            raise ValueError(f"Unsupported vector store type: {vector_store_type}. Supported types: 'pinecone', 'supabase', 'qdrant', 'inmemory', 'hnsw', 'ivfpq'")
         
         VectorStoreFactory._instances[vector_store_type] = instance
         return instance
@@ -73,7 +79,8 @@ class VectorStoreFactory:
             url=settings.QDRANT_URL,
             api_key=settings.QDRANT_API_KEY,
             path=settings.QDRANT_PATH,
-            prefer_grpc=settings.QDRANT_PREFER_GRPC
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            pool_size=settings.QDRANT_POOL_SIZE
         )
     
     @staticmethod
@@ -82,3 +89,20 @@ class VectorStoreFactory:
         return InMemoryVectorStoreService(
             embedding_model=settings.EMBEDDING_MODEL
         )
+    
+    @staticmethod
+    def _create_hnsw_store(settings: Settings) -> HNSWVectorStoreService:
+        """Create HNSW vector store instance"""
+        return HNSWVectorStoreService(
+            embedding_model=settings.EMBEDDING_MODEL,
+            backend=settings.HNSW_BACKEND
+        )
+    
+    @staticmethod
+    def _create_ivfpq_store(settings: Settings) -> FaissIVFPQVectorStoreService:
+        """Create FAISS IVF-PQ vector store instance"""
+        return FaissIVFPQVectorStoreService(
+            embedding_model=settings.EMBEDDING_MODEL,
+            train_threshold=settings.IVFPQ_TRAIN_THRESHOLD,
+            nprobe=settings.IVFPQ_NPROBE
+        )
@@ -65,15 +65,18 @@ class ProcessDocumentTool(BaseTool):
             # Ensure processor uses the requested loader type
             self.document_processor.file_processor.use_llm_pdf_loader = llm_friendly
 
-            # Compose a cache key that differentiates between loader variants
-            cache_key = f"{document_url}::{'llm' if llm_friendly else 'std'}"
+            # Compose a content-aware cache key that differentiates between loader variants
+            cache_key = None
+            if settings.ENABLE_CACHING and self.vector_store.supports_caching():
+                cache_key = await self.document_processor.get_cache_key(
+                    document_url, variant="llm" if llm_friendly else "std"
+                )
 
             # If requested, attempt to load existing cache for this URL (variant-sensitive)
             cached_loaded = False
             if (
                 use_cache
-                and settings.ENABLE_CACHING
-                and self.vector_store.supports_caching()
+                and cache_key
                 and self.vector_store.has_cache(cache_key)
             ):
                 if self.vector_store.load_from_cache(cache_key):
@@ -100,11 +103,7 @@ class ProcessDocumentTool(BaseTool):
 
                 chunks_processed = processing_result["chunks_processed"]
 
-                if (
-                    settings.ENABLE_CACHING
-                    and self.vector_store.supports_caching()
-                    and chunks_processed >= settings.CACHE_MIN_CHUNKS
-                ):
+                if cache_key and chunks_processed >= settings.CACHE_MIN_CHUNKS:
                     self.vector_store.save_to_cache(cache_key)
 
             return ToolResult(
@@ -113,6 +112,7 @@ class ProcessDocumentTool(BaseTool):
                     "document_id": document_id,
                     "chunks_processed": chunks_processed,
                     "cached_used": cached_loaded,
+                    "cache_key": cache_key,
                 },
             )
         except Exception as exc:
@@ -24,10 +24,7 @@ class RAGTool(BaseTool):
         )
         
         self.vector_store = VectorStoreFactory.create_vector_store(settings)
-        self.llm_provider = LLMProviderFactory.create_provider(
-            settings.DEFAULT_LLM_PROVIDER, 
-            settings
-        )
+        self.llm_provider = LLMProviderFactory.get_shared_provider(settings.DEFAULT_LLM_PROVIDER)
         self.document_processor = DocumentProcessor(
             vector_store=self.vector_store,
             chunk_size=settings.CHUNK_SIZE,
@@ -47,20 +44,11 @@ class RAGTool(BaseTool):
         for question in questions:
             print(f"Retrieving context for: {question}")
             
-            if hasattr(self.vector_store, 'asimilarity_search_with_score'):
-                task = self.vector_store.asimilarity_search_with_score(
-                    query=question,
-                    k=k,
-                    filter={"document_id": document_id}
-                )
-            else:
-                task = asyncio.to_thread(
-                    self.vector_store.similarity_search_with_score,
-                    query=question,
-                    k=k,
-                    filter={"document_id": document_id}
-                )
-            search_tasks.append(task)
+            search_tasks.append(self.vector_store.asimilarity_search_with_score(
+                query=question,
+                k=k,
+                filter={"document_id": document_id}
+            ))
         
         try:
             search_results = await asyncio.gather(*search_tasks, return_exceptions=True)
@@ -180,8 +168,12 @@ class RAGTool(BaseTool):
             # Set the OCR/LLM loader preference
             self.document_processor.file_processor.use_llm_pdf_loader = use_ocr
             
-            # Compose a cache key that differentiates between loader variants
-            cache_key = f"{document_url}::{'ocr' if use_ocr else 'std'}"
+            # Compose a content-aware cache key that differentiates between loader variants
+            cache_key = None
+            if settings.ENABLE_CACHING and self.vector_store.supports_caching():
+                cache_key = await self.document_processor.get_cache_key(
+                    document_url, variant="ocr" if use_ocr else "std"
+                )
             
             print(f"Cleaning vector store before RAG processing...")
             if hasattr(self.vector_store, 'adelete_all_documents'):
@@ -191,8 +183,7 @@ class RAGTool(BaseTool):
             
             # If requested, attempt to load existing cache for this URL (variant-sensitive)
             if (use_cache and 
-                settings.ENABLE_CACHING and 
-                self.vector_store.supports_caching() and 
+                cache_key and 
                 self.vector_store.has_cache(cache_key)):
                 
                 print(f"Found cached vector store for document: {document_url[:50]}... (variant: {'ocr' if use_ocr else 'std'})")
@@ -227,8 +218,7 @@ class RAGTool(BaseTool):
                 
                 chunks_processed = processing_result["chunks_processed"]
                 
-                if (settings.ENABLE_CACHING and 
-                    self.vector_store.supports_caching() and 
+                if (cache_key and 
                     chunks_processed >= settings.CACHE_MIN_CHUNKS):
                     print(f"Caching large document ({chunks_processed} chunks) with key: {cache_key}")
                     self.vector_store.save_to_cache(cache_key)
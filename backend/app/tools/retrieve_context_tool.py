@@ -23,9 +23,7 @@ class RetrieveContextTool(BaseTool):
             description="Retrieve relevant chunks from a previously processed document"
         )
         self.vector_store = VectorStoreFactory.create_vector_store(settings)
-        self.llm_provider = LLMProviderFactory.create_provider(
-            settings.DEFAULT_LLM_PROVIDER, settings
-        )
+        self.llm_provider = LLMProviderFactory.get_shared_provider(settings.DEFAULT_LLM_PROVIDER)
 
     @property
     def parameters_schema(self) -> Dict[str, Any]:
@@ -54,37 +52,19 @@ class RetrieveContextTool(BaseTool):
 
             docs_with_scores = []
             
-            if hasattr(self.vector_store, "asimilarity_search_with_score"):
-                print(f"Executing {len(queries)} vector searches in parallel...")
-                search_tasks = [
-                    self.vector_store.asimilarity_search_with_score(query=q, k=k)
-                    for q in queries
-                ]
-                
-                search_results = await asyncio.gather(*search_tasks, return_exceptions=True)
-                
-                for i, result in enumerate(search_results):
-                    if isinstance(result, Exception):
-                        print(f"Search failed for query '{queries[i]}': {result}")
-                        continue
-                    docs_with_scores.extend(result)
-                    
-            else:
-                print(f"Executing {len(queries)} vector searches in parallel (sync fallback)...")
-                search_tasks = [
-                    asyncio.to_thread(
-                        self.vector_store.similarity_search_with_score,
-                        query=q, k=k
-                    ) for q in queries
-                ]
-                
-                search_results = await asyncio.gather(*search_tasks, return_exceptions=True)
-                
-                for i, result in enumerate(search_results):
-                    if isinstance(result, Exception):
-                        print(f"Search failed for query '{queries[i]}': {result}")
-                        continue
-                    docs_with_scores.extend(result)
+            print(f"Executing {len(queries)} vector searches in parallel...")
+            search_tasks = [
+                self.vector_store.asimilarity_search_with_score(query=q, k=k)
+                for q in queries
+            ]
+            
+            search_results = await asyncio.gather(*search_tasks, return_exceptions=True)
+            
+            for i, result in enumerate(search_results):
+                if isinstance(result, Exception):
+                    print(f"Search failed for query '{queries[i]}': {result}")
+                    continue
+                docs_with_scores.extend(result)
 
             chunks = [
                 {"content": doc.page_content, "similarity_score": float(score)}
@@ -19,9 +19,7 @@ class TraditionalRAGTool(BaseTool):
         )
 
         self.vector_store = VectorStoreFactory.create_vector_store(settings)
-        self.llm_provider = LLMProviderFactory.create_provider(
-            settings.DEFAULT_LLM_PROVIDER, settings
-        )
+        self.llm_provider = LLMProviderFactory.get_shared_provider(settings.DEFAULT_LLM_PROVIDER)
         self.document_processor = DocumentProcessor(
             vector_store=self.vector_store,
             chunk_size=settings.CHUNK_SIZE,
@@ -0,0 +1,5 @@
+import os
+
+# app.config.settings validates these on import; unit tests never reach the services
+for _name in ("BEARER_TOKEN", "OPENAI_API_KEY", "PINECONE_API_KEY", "SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_KEY"):
+    os.environ.setdefault(_name, "test")
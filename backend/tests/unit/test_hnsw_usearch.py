@@ -0,0 +1,50 @@
+"""Smoke test for the HNSW vector store's USearch backend"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("usearch")
+pytest.importorskip("langchain_openai")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from app.services.vector_stores.hnsw_vector_store import HNSWVectorStoreService
+    
+    return HNSWVectorStoreService(backend="usearch", initial_capacity=4)
+
+
+def _add(store, ids, vectors):
+    texts = [f"text {doc_id}" for doc_id in ids]
+    return store._add_vectors(store._documents(texts, [{} for _ in ids], ids), vectors)
+
+
+def test_add_past_capacity_and_search(store):
+    vectors = np.eye(8, dtype=np.float32)
+    _add(store, [str(i) for i in range(8)], vectors)
+    
+    assert store.get_document_count() == 8
+    
+    doc, score = store._search(vectors[3], k=2)[0]
+    assert doc.id == "3"
+    assert score == pytest.approx(1.0)
+    
+    batched = store._search_many(vectors[[1, 6]], k=1)
+    assert [results[0][0].id for results in batched] == ["1", "6"]
+
+
+def test_readd_replaces_previous_vector(store):
+    vectors = np.eye(4, dtype=np.float32)
+    _add(store, ["a", "b"], vectors[:2])
+    _add(store, ["a"], vectors[2:3])
+    
+    assert store.get_document_count() == 2
+    ids = [doc.id for doc, _ in store._search(vectors[0], k=4)]
+    assert sorted(ids) == ["a", "b"]
+    
+    doc, score = store._search(vectors[2], k=1)[0]
+    assert doc.id == "a"
+    assert score == pytest.approx(1.0)
+    
+    store.delete_documents(["a"])
+    assert [doc.id for doc, _ in store._search(vectors[2], k=4)] == ["b"]